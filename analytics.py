@@ -0,0 +1,150 @@
+# analytics.py
+"""
+Incremental session analytics.
+ScoreAnalytics keeps running aggregates of a session's scores (count, mean,
+EWMA trend, min/max and the mean of each evaluation category), updated in
+O(1) per answered question, together with the score chart series and the
+interviewer's response times. The sidebar, the chart and the export read
+these instead of recomputing them from the score lists and the usage log on
+every Streamlit rerun.
+"""
+
+from dataclasses import dataclass, field
+
+from evaluation import EVALUATION_CATEGORIES
+
+# Weight of the newest score in the EWMA trend
+DEFAULT_ALPHA = 0.4
+
+def _is_score(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+@dataclass
+class RunningStat:
+    """Count, sum, min and max of a stream of values"""
+    count: int = 0
+    total: float = 0.0
+    min: float = None
+    max: float = None
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+@dataclass
+class ScoreAnalytics:
+    """
+    Running score aggregates for one session.
+
+    Args:
+        alpha: EWMA weight of the newest score (0-1]
+    """
+    alpha: float = DEFAULT_ALPHA
+    overall: RunningStat = field(default_factory=RunningStat)
+    ewma: float = None
+    categories: dict = field(default_factory=lambda: {name: RunningStat() for name in EVALUATION_CATEGORIES})
+    series: list = field(default_factory=list)
+    # Seconds per interviewer response (history summaries excluded)
+    latency: RunningStat = field(default_factory=RunningStat)
+
+    def update(self, question_num, scores):
+        """
+        Add one answer's scores: a dict with "overall" and the evaluation
+        categories (see session.TurnResult.final_scores); None or missing
+        values are skipped.
+        """
+        overall = scores.get("overall")
+        if _is_score(overall):
+            self.overall.add(overall)
+            self.ewma = overall if self.ewma is None else self.alpha * overall + (1 - self.alpha) * self.ewma
+            self.series.append({"question": question_num, "score": overall, "trend": round(self.ewma, 2)})
+        for name in EVALUATION_CATEGORIES:
+            value = scores.get(name)
+            if _is_score(value):
+                self.categories[name].add(value)
+
+    def add_latency(self, seconds):
+        """Add one interviewer response's API latency; None is skipped"""
+        if _is_score(seconds):
+            self.latency.add(seconds)
+
+    @property
+    def mean(self):
+        return self.overall.mean
+
+    @property
+    def trend(self):
+        """Change of the EWMA over the last scored answer (None before the second)"""
+        if len(self.series) < 2:
+            return None
+        return self.series[-1]["trend"] - self.series[-2]["trend"]
+
+    def category_means(self):
+        """{category: mean score} for the categories scored so far"""
+        return {name: stat.mean for name, stat in self.categories.items() if stat.count}
+
+    def summary(self):
+        """JSON-serializable aggregates for the export"""
+        def rounded(value):
+            return round(value, 2) if value is not None else None
+        return {
+            "scored_answers": self.overall.count,
+            "mean": rounded(self.mean),
+            "ewma": rounded(self.ewma),
+            "trend": rounded(self.trend),
+            "min": self.overall.min,
+            "max": self.overall.max,
+            "categories": {name: rounded(mean) for name, mean in self.category_means().items()},
+        }
+
+    def to_dict(self):
+        """State for the session store (see from_dict)"""
+        return {
+            "alpha": self.alpha,
+            "overall": vars(self.overall).copy(),
+            "ewma": self.ewma,
+            "categories": {name: vars(stat).copy() for name, stat in self.categories.items()},
+            "series": list(self.series),
+            "latency": vars(self.latency).copy(),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        analytics = cls(alpha=data.get("alpha", DEFAULT_ALPHA), ewma=data.get("ewma"), series=list(data.get("series", [])))
+        analytics.overall = RunningStat(**data.get("overall", {}))
+        analytics.latency = RunningStat(**data.get("latency", {}))
+        for name, stat in data.get("categories", {}).items():
+            if name in analytics.categories:
+                analytics.categories[name] = RunningStat(**stat)
+        return analytics
+
+    @classmethod
+    def from_records(cls, response_scores, scores, usage_log=()):
+        """
+        Rebuild the aggregates from a session's records (sessions stored
+        before analytics were kept): response_scores entries carry the
+        `**Score**` overall, scores entries the JSON overall and details,
+        usage_log entries the response latencies.
+        """
+        turns = {}
+        for record in scores:
+            # A missing JSON overall_score was stored as 0
+            final = turns.setdefault(record["question_num"], {"overall": record.get("overall") or None})
+            for name, details in (record.get("details") or {}).items():
+                if isinstance(details, dict):
+                    final[name] = details.get("score")
+        for record in response_scores:
+            turns.setdefault(record["question_num"], {})["overall"] = record["overall"]
+        analytics = cls()
+        for question_num in sorted(turns):
+            analytics.update(question_num, turns[question_num])
+        for entry in usage_log:
+            if not entry.get("summary"):
+                analytics.add_latency(entry.get("latency"))
+        return analytics
@@ -11,22 +11,23 @@ Features:
 """
 
 import streamlit as st
+import itertools
 import json
+import os
 from datetime import datetime
-from prompts import (
-    get_zero_shot_prompt,
-    get_few_shot_prompt,
-    get_chain_of_thought_prompt,
-    get_persona_prompt,
-    get_role_specific_prompt,
-    get_structured_json_prompt,
-    get_mixed_techniques_prompt,
-)
-from utils import (
-    call_openai,
-    moderate_input,
-    extract_json_from_response,
+from prompts import ROLES, LEVELS, DOMAINS
+from session import (
+    InterviewSession, InterviewConfig, TONE_EMOJI, CATEGORY_LABELS, message_badges, score_badge, provisional_badges
 )
+from utils import InputFlaggedError
+from cache import CompletionCache, DEFAULT_CACHE_PATH
+from resilience import get_resilience_stats
+from hedging import get_hedge_stats
+from ratelimit import call_with_queue_notices, get_rate_limit_stats
+from singleflight import get_single_flight_stats
+from routing import RoutingPolicy
+from store import SQLiteSessionStore, SessionPool, DEFAULT_STORE_PATH
+from question_bank import QuestionBank, DEFAULT_BANK_PATH
 
 # Page configuration
 st.set_page_config(
@@ -65,38 +66,82 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# Chat messages rendered per page of history
+HISTORY_PAGE_SIZE = 20
+
+# Sidebar settings restored when a stored session is resumed
+RESUMED_SETTINGS = ("role", "level", "domain", "tone", "prompt_style", "model")
+
+@st.cache_resource
+def get_completion_cache():
+    """Completion cache shared by all sessions in this process"""
+    return CompletionCache(os.environ.get("COMPLETION_CACHE_PATH", DEFAULT_CACHE_PATH))
+
+@st.cache_resource
+def get_session_store():
+    """Durable session store shared by all sessions in this process"""
+    return SQLiteSessionStore(os.environ.get("SESSION_STORE_PATH", DEFAULT_STORE_PATH))
+
+@st.cache_resource
+def get_session_pool():
+    """Bounded set of sessions kept in memory; the rest are reloaded on demand"""
+    return SessionPool(get_session_store(), max_sessions=int(os.environ.get("SESSION_POOL_SIZE", 100)))
+
+@st.cache_resource
+def open_question_bank(path):
+    return QuestionBank(path)
+
+def get_question_bank():
+    """Pre-generated questions (build with `python question_bank.py build`), or None until built"""
+    path = os.environ.get("QUESTION_BANK_PATH", DEFAULT_BANK_PATH)
+    return open_question_bank(path) if os.path.exists(path) else None
+
+@st.cache_data(ttl=60)
+def count_bank_questions(path):
+    """Questions in the bank; cached so reruns do not count them again"""
+    return len(open_question_bank(path)) if os.path.exists(path) else 0
+
+def resume_session(session_id):
+    return InterviewSession.resume(session_id, get_session_store(), question_bank=get_question_bank())
+
 # Initialize session state
-def init_session_state():
-    """Initialize all session state variables"""
-    if "messages" not in st.session_state:
-        st.session_state.messages = []
-    if "current_prompt" not in st.session_state:
-        st.session_state.current_prompt = ""
-    if "interview_started" not in st.session_state:
-        st.session_state.interview_started = False
-    if "session_cost" not in st.session_state:
-        st.session_state.session_cost = 0.0
-    if "total_tokens" not in st.session_state:
-        st.session_state.total_tokens = 0
-    if "question_count" not in st.session_state:
-        st.session_state.question_count = 0
-    if "scores" not in st.session_state:
-        st.session_state.scores = []
-    if "session_start_time" not in st.session_state:
-        st.session_state.session_start_time = datetime.now()
-    if "json_mode" not in st.session_state:
-        st.session_state.json_mode = False
-    if "response_scores" not in st.session_state:
-        st.session_state.response_scores = []
-    if "average_score" not in st.session_state:
-        st.session_state.average_score = 0.0
-
-init_session_state()
+def attach_session():
+    """
+    This browser session's interview, if it has one: from the in-memory
+    pool, or resumed from the store by the ID in the URL after a reconnect
+    or restart.
+    """
+    session_id = st.session_state.get("session_id") or st.query_params.get("session")
+    interview = get_session_pool().get(session_id, resume_session) if session_id else None
+    if interview is not None and "session_id" not in st.session_state:
+        # Start the sidebar from the resumed session's settings
+        for key in RESUMED_SETTINGS:
+            st.session_state[key] = getattr(interview.config, key)
+    if interview is not None:
+        st.session_state.session_id = interview.session_id
+    return interview
+
+def init_session_state(interview, config, cache):
+    """Create the interview engine for this browser session if needed"""
+    if interview is None:
+        interview = InterviewSession(config, cache=cache, store=get_session_store(), question_bank=get_question_bank())
+        get_session_pool().put(interview.session_id, interview)
+        st.session_state.session_id = interview.session_id
+    st.query_params["session"] = interview.session_id
+    # Sidebar settings may change between turns
+    interview.config = config
+    interview.cache = cache
+    interview.question_bank = get_question_bank()
+    return interview
 
 # Header
 st.markdown('<h1 class="main-header">🧠 AI Interview Preparation Tool</h1>', unsafe_allow_html=True)
 st.markdown("**Practice interviews with AI • Get instant feedback • Improve your skills**")
 
+attached_interview = attach_session()
+if "tone" not in st.session_state:
+    st.session_state.tone = "Professional"
+
 # Sidebar Configuration
 st.sidebar.title("⚙️ Interview Configuration")
 
@@ -104,29 +149,22 @@ st.sidebar.title("⚙️ Interview Configuration")
 st.sidebar.header("📋 Interview Setup")
 role = st.sidebar.selectbox(
     "Choose Interview Role",
-    [
-        "Frontend Developer",
-        "Backend Developer",
-        "Full Stack Developer",
-        "Data Scientist",
-        "Data Analyst",
-        "Product Manager",
-        "UX Designer",
-        "DevOps Engineer",
-        "ML Engineer"
-    ],
+    ROLES,
+    key="role",
     help="Select the role you're preparing for"
 )
 
 level = st.sidebar.radio(
     "Experience Level",
-    ["Junior", "Mid", "Senior"],
+    LEVELS,
+    key="level",
     help="Junior: 0-2 years | Mid: 3-5 years | Senior: 5+ years"
 )
 
 domain = st.sidebar.selectbox(
     "Industry Domain",
-    ["General", "Tech/Startup", "Finance", "Healthcare", "E-commerce", "Enterprise", "Consulting"],
+    DOMAINS,
+    key="domain",
     help="Industry focus for your interview preparation"
 )
 
@@ -134,7 +172,7 @@ domain = st.sidebar.selectbox(
 tone = st.sidebar.selectbox(
     "Interviewer Tone",
     ["Friendly", "Professional", "Strict"],
-    index=1,
+    key="tone",
     help="""
     Friendly: Warm, encouraging, supportive
     Professional: Balanced, neutral, business-like
@@ -157,6 +195,7 @@ prompt_style = st.sidebar.selectbox(
         "Structured JSON",
         "Mixed Techniques"
     ],
+    key="prompt_style",
     help="""
     Zero-shot: Direct instructions
     Few-shot: Learn from examples
@@ -180,10 +219,17 @@ model = st.sidebar.selectbox(
         "gpt-4-turbo",
         "gpt-4"
     ],
-    index=0,
+    key="model",
     help="Choose the AI model. Mini is faster and cheaper, GPT-4 is more capable."
 )
 
+use_routing = st.sidebar.checkbox(
+    "Route Turns by Content",
+    value=False,
+    help="Evaluate short and simple answers with gpt-4o-mini and long or technical ones with gpt-4o. "
+         "Savings are measured against the model selected above."
+)
+
 # Advanced Settings Expander
 with st.sidebar.expander("🔧 Advanced Parameters", expanded=False):
     temperature = st.slider(
@@ -230,30 +276,155 @@ with st.sidebar.expander("🔧 Advanced Parameters", expanded=False):
         step=0.1,
         help="Penalize tokens that have appeared. Positive values encourage new topics."
     )
+    
+    history_turns = st.slider(
+        "History Turns Sent Verbatim",
+        min_value=2,
+        max_value=20,
+        value=6,
+        step=1,
+        help="Older turns are folded into a running summary to keep each request small and fast"
+    )
+    
+    use_cache = st.checkbox(
+        "Cache Deterministic Responses",
+        value=True,
+        key="use_cache",
+        help="Reuse stored responses for identical requests at temperature 0"
+    )
+    
+    force_cache = st.checkbox(
+        "Cache Even When Temperature > 0",
+        value=False,
+        disabled=not use_cache,
+        help="Replay stored responses for identical requests regardless of temperature (QA and demos)"
+    )
+    
+    request_timeout = st.slider(
+        "Request Timeout (seconds)",
+        min_value=5,
+        max_value=120,
+        value=30,
+        step=5,
+        help="Each API attempt is aborted after this long and retried with backoff"
+    )
+    
+    use_fallback = st.checkbox(
+        "Fall Back to gpt-4o-mini",
+        value=True,
+        help="Answer with gpt-4o-mini when the selected model keeps failing"
+    )
+    
+    bank_available = count_bank_questions(os.environ.get("QUESTION_BANK_PATH", DEFAULT_BANK_PATH)) > 0
+    use_question_bank = st.checkbox(
+        "Ask Questions from the Question Bank",
+        value=bank_available,
+        disabled=not bank_available,
+        help="Take the next question from the pre-generated bank so the model only evaluates your answer"
+             + ("" if bank_available else " (build it with `python question_bank.py build`)")
+    )
+    
+    use_hedging = st.checkbox(
+        "Hedge Slow Requests",
+        value=False,
+        help="Send a duplicate request when the first token is slower than the recent p95 (at most 5% extra requests)"
+    )
+
+interview = init_session_state(
+    attached_interview,
+    InterviewConfig(
+        role=role,
+        level=level,
+        domain=domain,
+        prompt_style=prompt_style,
+        tone=tone,
+        model=model,
+        temperature=temperature,
+        max_tokens=max_tokens,
+        top_p=top_p,
+        frequency_penalty=frequency_penalty,
+        presence_penalty=presence_penalty,
+        history_turns=history_turns,
+        force_cache=force_cache,
+        request_timeout=request_timeout,
+        use_fallback=use_fallback,
+        use_hedging=use_hedging,
+        use_routing=use_routing,
+        use_question_bank=use_question_bank
+    ),
+    get_completion_cache() if use_cache else None
+)
+state = interview.state
 
 st.sidebar.divider()
 
 # Session Stats
 st.sidebar.header("📊 Session Statistics")
-duration = datetime.now() - st.session_state.session_start_time
-st.sidebar.metric("Questions Answered", st.session_state.question_count)
-
-# Display average score with color
-if st.session_state.average_score > 0:
-    score_color = "🟢" if st.session_state.average_score >= 7 else "🟡" if st.session_state.average_score >= 5 else "🔴"
-    st.sidebar.metric("Average Score", f"{score_color} {st.session_state.average_score:.1f}/10")
+duration = datetime.now() - state.started_at
+st.sidebar.metric("Questions Answered", state.question_count)
+
+# Display average score with color and its recent trend
+analytics = state.analytics
+if analytics.mean is not None:
+    score_color = "🟢" if analytics.mean >= 7 else "🟡" if analytics.mean >= 5 else "🔴"
+    st.sidebar.metric(
+        "Average Score",
+        f"{score_color} {analytics.mean:.1f}/10",
+        delta=f"{analytics.trend:+.1f} trend" if analytics.trend is not None else None,
+        help=f"Range: {analytics.overall.min}-{analytics.overall.max} | Recent (EWMA): {analytics.ewma:.1f}"
+    )
 else:
     st.sidebar.metric("Average Score", "Not yet scored")
+category_means = analytics.category_means()
+if category_means:
+    st.sidebar.caption(" | ".join(
+        f"{label}: {category_means[key]:.1f}" for key, label in CATEGORY_LABELS if key in category_means
+    ))
 
 st.sidebar.metric("Session Duration", f"{duration.seconds // 60}m {duration.seconds % 60}s")
-st.sidebar.metric("Total Tokens Used", st.session_state.total_tokens)
-st.sidebar.metric("Estimated Cost", f"${st.session_state.session_cost:.4f}")
+st.sidebar.metric(
+    "Total Tokens Used",
+    state.total_tokens,
+    help=f"Input: {state.prompt_tokens} | Output: {state.completion_tokens}"
+)
+st.sidebar.metric("Session Cost", f"${state.session_cost:.4f}")
+if state.routing_savings:
+    st.sidebar.caption(f"🔀 Saved by routing: ${state.routing_savings:.4f} against {model}")
+if analytics.latency.count:
+    st.sidebar.metric("Avg Response Time", f"{analytics.latency.mean:.1f}s")
+if use_hedging:
+    hedge_stats = get_hedge_stats()
+    if hedge_stats["hedges"]:
+        st.sidebar.caption(f"⏱️ Hedged requests: {hedge_stats['hedges']} | Hedge wins: {hedge_stats['hedge_wins']}")
+resilience_stats = get_resilience_stats()
+if resilience_stats["retries"] or resilience_stats["fallbacks"]:
+    open_breakers = [m for m, state in resilience_stats["breakers"].items() if state != "closed"]
+    st.sidebar.caption(
+        f"🩺 API retries: {resilience_stats['retries']} | Fallbacks: {resilience_stats['fallbacks']}"
+        + (f" | Unhealthy: {', '.join(open_breakers)}" if open_breakers else "")
+    )
+rate_limit_stats = get_rate_limit_stats()
+if rate_limit_stats["queued"] or rate_limit_stats["timeouts"]:
+    st.sidebar.caption(
+        f"🚦 Queued for quota: {rate_limit_stats['queued']} requests "
+        f"({rate_limit_stats['wait_seconds']:.0f}s total) | Timed out: {rate_limit_stats['timeouts']}"
+    )
+single_flight_stats = get_single_flight_stats()
+if single_flight_stats["coalesced"]:
+    st.sidebar.caption(f"🔗 Duplicate API calls coalesced: {single_flight_stats['coalesced']}")
+if use_cache:
+    cache_stats = get_completion_cache().stats()
+    if cache_stats["hits"] + cache_stats["misses"] > 0:
+        st.sidebar.metric(
+            "Cache Hit Rate",
+            f"{cache_stats['hit_rate']:.0%}",
+            help=f"Hits: {cache_stats['hits']} | Misses: {cache_stats['misses']} | Entries: {cache_stats['entries']}"
+        )
 
 # Score history chart
-if len(st.session_state.response_scores) > 0:
+if analytics.series:
     st.sidebar.markdown("**📈 Score Progress**")
-    scores_display = [score["overall"] for score in st.session_state.response_scores]
-    st.sidebar.line_chart(scores_display)
+    st.sidebar.line_chart(analytics.series, x="question", y=["score", "trend"])
 
 # Session Controls
 st.sidebar.divider()
@@ -262,338 +433,123 @@ with col1:
     if st.button("🔄 Reset Session", use_container_width=True):
         for key in list(st.session_state.keys()):
             del st.session_state[key]
+        st.query_params.clear()
         st.rerun()
 
 with col2:
     if st.button("💾 Export Chat", use_container_width=True):
-        export_data = {
-            "role": role,
-            "level": level,
-            "domain": domain,
-            "tone": tone,
-            "prompt_style": prompt_style,
-            "messages": st.session_state.messages,
-            "scores": st.session_state.scores,
-            "response_scores": st.session_state.response_scores,
-            "average_score": st.session_state.average_score,
-            "session_duration": str(duration),
-            "total_cost": st.session_state.session_cost
-        }
         st.sidebar.download_button(
             "📥 Download JSON",
-            data=json.dumps(export_data, indent=2),
+            data=json.dumps(interview.export(), indent=2),
             file_name=f"interview_session_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
             mime="application/json",
             use_container_width=True
         )
 
+# Resume a stored session by ID
+st.sidebar.caption(f"🔑 Session ID: `{interview.session_id}`")
+resume_id = st.sidebar.text_input(
+    "Resume Session",
+    placeholder="Paste a session ID",
+    help="Continue an earlier interview; the session ID is also kept in the page URL"
+).strip()
+if resume_id and resume_id != interview.session_id:
+    if get_session_pool().get(resume_id, resume_session) is None:
+        st.sidebar.error("Session not found")
+    else:
+        for key in list(st.session_state.keys()):
+            del st.session_state[key]
+        st.query_params["session"] = resume_id
+        st.rerun()
+
 # Main content area
-tone_emoji = {"Friendly": "😊", "Professional": "💼", "Strict": "📋"}
 st.subheader(f"💼 Mock Interview: {level} {role} ({domain})")
-st.caption(f"**Technique:** {prompt_style} | **Model:** {model} | **Tone:** {tone_emoji[tone]} {tone}")
-
-# Get tone instructions
-def get_tone_instructions(tone):
-    """Return tone-specific instructions for the AI"""
-    if tone == "Friendly":
-        return """
-TONE: Friendly and Supportive
-- Use warm, encouraging language
-- Celebrate good answers enthusiastically
-- Provide constructive criticism gently
-- Use phrases like "Great!", "Excellent point!", "I appreciate that..."
-- Be patient and understanding
-- Offer helpful hints when candidate struggles
-- Make the candidate feel comfortable and valued
-"""
-    elif tone == "Strict":
-        return """
-TONE: Strict and Demanding
-- Be direct and to-the-point
-- Set high standards and expectations
-- Point out weaknesses clearly
-- Don't sugarcoat feedback
-- Use phrases like "That's insufficient", "You need to...", "Expected more..."
-- Challenge the candidate to think deeper
-- Be professional but demanding
-- Only praise truly excellent answers
-"""
-    else:  # Professional
-        return """
-TONE: Professional and Balanced
-- Maintain a neutral, business-like demeanor
-- Be objective and fair in assessments
-- Provide balanced feedback (positives and areas for improvement)
-- Use clear, professional language
-- Be respectful but not overly warm
-- Focus on facts and competencies
-- Standard phrases: "Your answer demonstrates...", "Consider improving..."
-"""
+routing_policy = RoutingPolicy()
+model_label = f"Auto ({routing_policy.cheap_model} / {routing_policy.capable_model})" if use_routing else model
+st.caption(f"**Technique:** {prompt_style} | **Model:** {model_label} | **Tone:** {TONE_EMOJI[tone]} {tone}")
 
-# Update system prompt based on selection
-def update_system_prompt():
-    """Update the system prompt based on current configuration"""
-    tone_instruction = get_tone_instructions(tone)
-    
-    if prompt_style == "Zero-shot":
-        base_prompt = get_zero_shot_prompt(role, level, domain)
-    elif prompt_style == "Few-shot":
-        base_prompt = get_few_shot_prompt(role, level, domain)
-    elif prompt_style == "Chain-of-Thought":
-        base_prompt = get_chain_of_thought_prompt(role, level, domain)
-    elif prompt_style == "Persona Interview":
-        base_prompt = get_persona_prompt(role, level, domain)
-    elif prompt_style == "Role-specific":
-        base_prompt = get_role_specific_prompt(role, level, domain)
-    elif prompt_style == "Structured JSON":
-        st.session_state.json_mode = True
-        base_prompt = get_structured_json_prompt(role, level, domain)
-    elif prompt_style == "Mixed Techniques":
-        base_prompt = get_mixed_techniques_prompt(role, level, domain)
-    else:
-        base_prompt = get_zero_shot_prompt(role, level, domain)
-    
-    # Add scoring instruction to all prompts
-    scoring_instruction = """
-
-SCORING REQUIREMENT:
-After each candidate answer, you MUST provide a numerical score from 1-10 for their response.
-Include this scoring in your feedback using this format:
-
-**Score: X/10**
-
-Base your score on:
-- Technical accuracy and depth (if applicable)
-- Clarity and structure of communication
-- Completeness of the answer
-- Relevance to the question
-- Examples and evidence provided
-
-Scoring Guide:
-- 1-3: Poor/Inadequate answer, major gaps
-- 4-5: Below average, missing key points
-- 6-7: Good, meets basic expectations
-- 8-9: Excellent, thorough and well-articulated
-- 10: Outstanding, exceeds all expectations
-"""
-    
-    return base_prompt + "\n" + tone_instruction + "\n" + scoring_instruction
-
-st.session_state.current_prompt = update_system_prompt()
+# Start interview if not yet started
+interview.start()
+
+# Display chat history: only the most recent page is rendered, so a rerun
+# costs the same however long the session gets
+if "history_visible" not in st.session_state:
+    st.session_state.history_visible = HISTORY_PAGE_SIZE
+hidden_count = max(0, len(state.messages) - st.session_state.history_visible)
+if hidden_count:
+    if st.button(f"⬆️ Show earlier messages ({hidden_count} hidden)", use_container_width=True):
+        st.session_state.history_visible += HISTORY_PAGE_SIZE
+        st.rerun()
 
-# Display chat history
-for idx, message in enumerate(st.session_state.messages):
+for message in state.messages[hidden_count:]:
     role_display = "assistant" if message["role"] == "assistant" else "user"
     with st.chat_message(role_display):
         st.markdown(message["content"])
-        
-        # Display scores for this response
-        if "response_score" in message and message["response_score"] is not None:
-            score_val = message["response_score"]
-            score_class = "score-high" if score_val >= 7 else "score-medium" if score_val >= 5 else "score-low"
-            st.markdown(
-                f'<div class="score-badge {score_class}">Response Score: {score_val}/10</div>',
-                unsafe_allow_html=True
-            )
-        
-        # Display structured scores if available in JSON mode
-        if "scores" in message and message["scores"]:
-            scores = message["scores"]
-            cols = st.columns(4)
-            metrics = [
-                ("Technical", scores.get("technical_accuracy", {}).get("score", 0)),
-                ("Communication", scores.get("communication", {}).get("score", 0)),
-                ("Problem Solving", scores.get("problem_solving", {}).get("score", 0)),
-                ("Completeness", scores.get("completeness", {}).get("score", 0))
-            ]
-            
-            for col, (label, score) in zip(cols, metrics):
-                score_class = "score-high" if score >= 7 else "score-medium" if score >= 5 else "score-low"
-                col.markdown(
-                    f'<div class="score-badge {score_class}">{label}: {score}/10</div>',
-                    unsafe_allow_html=True
-                )
-
-# Start interview if not yet started
-if not st.session_state.interview_started and len(st.session_state.messages) == 0:
-    with st.chat_message("assistant"):
-        tone_greetings = {
-            "Friendly": "Welcome! I'm so excited to help you prepare! 😊",
-            "Professional": "Welcome to your interview preparation session.",
-            "Strict": "Welcome. Let's begin the interview. I expect focused, detailed answers."
-        }
-        
-        welcome_msg = f"""{tone_greetings[tone]}
-
-**Session Configuration:**
-- Role: {level} {role}
-- Domain: {domain}
-- Technique: {prompt_style}
-- Interviewer Tone: {tone_emoji[tone]} {tone}
-
-{"💡 Remember: I'll be scoring each of your responses from 1-10 based on quality, depth, and relevance." if tone != "Strict" else "⚠️ Note: Each response will be scored from 1-10. I maintain high standards."}
-
-Let's begin with our first question:
-
-**Tell me about yourself and why you're interested in this {role} position.**"""
-        st.markdown(welcome_msg)
-        st.session_state.messages.append({
-            "role": "assistant",
-            "content": welcome_msg,
-            "response_score": None
-        })
-        st.session_state.interview_started = True
+        # Score badges are built once when the message is stored
+        badges_html = message_badges(message)
+        if badges_html:
+            st.markdown(badges_html, unsafe_allow_html=True)
 
 # Chat input
 if user_input := st.chat_input("Type your answer here...", key="chat_input"):
-    # Security check
-    if moderate_input(user_input):
-        st.error("⚠️ **Security Alert:** Inappropriate input detected. Please provide a professional interview response.")
-        st.stop()
-    
     # Display user message
     with st.chat_message("user"):
         st.markdown(user_input)
     
-    st.session_state.messages.append({
-        "role": "user",
-        "content": user_input
-    })
-    
     # Get AI response
     with st.chat_message("assistant"):
-        with st.spinner("🤔 Analyzing your response..."):
-            try:
-                # Prepare messages for API call
-                api_messages = []
-                for msg in st.session_state.messages:
-                    api_messages.append({
-                        "role": msg["role"],
-                        "content": msg["content"]
-                    })
-                
-                # Determine if JSON mode should be used
-                response_format = {"type": "json_object"} if st.session_state.json_mode else None
-                
-                # Call OpenAI API
-                ai_response = call_openai(
-                    system_prompt=st.session_state.current_prompt,
-                    messages=api_messages,
-                    model=model,
-                    temperature=temperature,
-                    max_tokens=max_tokens,
-                    top_p=top_p,
-                    frequency_penalty=frequency_penalty,
-                    presence_penalty=presence_penalty,
-                    response_format=response_format
-                )
-                
-                # Extract score from response
-                import re
-                score_match = re.search(r'\*\*Score:\s*(\d+(?:\.\d+)?)\s*/\s*10\*\*', ai_response)
-                response_score = None
-                if score_match:
-                    try:
-                        response_score = float(score_match.group(1))
-                        response_score = min(10.0, max(1.0, response_score))  # Clamp between 1-10
-                    except:
-                        pass
-                
-                # Parse JSON response if in structured mode
-                scores_data = None
-                display_response = ai_response
-                
-                if st.session_state.json_mode:
-                    json_data = extract_json_from_response(ai_response)
-                    if json_data:
-                        scores_data = json_data.get("evaluation", {})
-                        
-                        # Format the display response
-                        display_response = f"""
-**Evaluation:**
-
-📊 **Overall Score:** {json_data.get('overall_score', 'N/A')}/10
-
-**Detailed Feedback:**
-"""
-                        for category, details in scores_data.items():
-                            if isinstance(details, dict):
-                                score = details.get('score', 'N/A')
-                                feedback = details.get('feedback', '')
-                                display_response += f"\n**{category.replace('_', ' ').title()}:** {score}/10\n{feedback}\n"
-                        
-                        if json_data.get('strengths'):
-                            display_response += f"\n**✅ Strengths:**\n"
-                            for strength in json_data['strengths']:
-                                display_response += f"- {strength}\n"
-                        
-                        if json_data.get('improvements'):
-                            display_response += f"\n**💡 Areas for Improvement:**\n"
-                            for improvement in json_data['improvements']:
-                                display_response += f"- {improvement}\n"
-                        
-                        if json_data.get('recommendation'):
-                            display_response += f"\n**Recommendation:**\n{json_data['recommendation']}\n"
-                        
-                        if json_data.get('question'):
-                            display_response += f"\n**Next Question:**\n{json_data['question']}"
-                        
-                        # Store scores
-                        st.session_state.scores.append({
-                            "question_num": st.session_state.question_count + 1,
-                            "overall": json_data.get('overall_score', 0),
-                            "details": scores_data
-                        })
-                
-                st.markdown(display_response)
-                
-                # Store the score for this response
-                if response_score is not None:
-                    st.session_state.response_scores.append({
-                        "question_num": st.session_state.question_count + 1,
-                        "overall": response_score
-                    })
-                    
-                    # Calculate average score
-                    all_scores = [s["overall"] for s in st.session_state.response_scores]
-                    st.session_state.average_score = sum(all_scores) / len(all_scores)
-                    
-                    # Display score badge
-                    score_class = "score-high" if response_score >= 7 else "score-medium" if response_score >= 5 else "score-low"
-                    st.markdown(
-                        f'<div class="score-badge {score_class}">Your Score: {response_score}/10</div>',
-                        unsafe_allow_html=True
-                    )
-                
-                # Save to chat history
-                st.session_state.messages.append({
-                    "role": "assistant",
-                    "content": display_response,
-                    "scores": scores_data,
-                    "response_score": response_score
-                })
-                
-                st.session_state.question_count += 1
-                
-                # Update token usage (approximate - would need actual API response for exact count)
-                estimated_tokens = len(user_input.split()) * 1.3 + len(ai_response.split()) * 1.3
-                st.session_state.total_tokens += int(estimated_tokens)
-                
-                # Estimate cost (very approximate)
-                if model == "gpt-4o-mini":
-                    cost_per_1k = 0.00015
-                elif model == "gpt-4o":
-                    cost_per_1k = 0.0025
-                elif model == "gpt-4-turbo":
-                    cost_per_1k = 0.01
+        response_placeholder = st.empty()
+        queue_notice = st.empty()
+        score_placeholder = st.empty()
+        
+        def show_queue_position(position, queue_length, queued_model):
+            queue_notice.info(f"⏳ High demand right now: you are #{position} of {queue_length} in the queue for {queued_model}")
+        
+        try:
+            # Security checks run first (local guard) and alongside the
+            # completion (Moderation API); the response streams in as generated
+            with response_placeholder.container():
+                # Keep the spinner up only until the first token arrives
+                with st.spinner("🤔 Analyzing your response..."):
+                    # Requests (and hedged attempts) queue for the rate limit in
+                    # worker threads; their positions are shown from this thread
+                    turn = call_with_queue_notices(lambda: interview.stream_answer(user_input), show_queue_position)
+                    # Local estimate until the interviewer's score arrives
+                    score_placeholder.markdown(provisional_badges(turn.provisional), unsafe_allow_html=True)
+                    if interview.config.json_mode:
+                        # Show each category's score as soon as it is parsed
+                        response_chunks = turn.evaluation_updates()
+                    else:
+                        response_chunks = iter(turn)
+                    first_chunk = call_with_queue_notices(lambda: next(response_chunks, ""), show_queue_position)
+                queue_notice.empty()
+                if interview.config.json_mode:
+                    evaluation_placeholder = st.empty()
+                    for partial_evaluation in itertools.chain([first_chunk], response_chunks):
+                        evaluation_placeholder.markdown(partial_evaluation)
                 else:
-                    cost_per_1k = 0.03
-                
-                st.session_state.session_cost += (estimated_tokens / 1000) * cost_per_1k
-                
-            except Exception as e:
-                st.error(f"❌ Error: {str(e)}")
-                st.info("💡 Tip: Check your OpenAI API key in `.streamlit/secrets.toml`")
+                    st.write_stream(itertools.chain([first_chunk], response_chunks))
+            result = turn.result
+            
+            response_placeholder.markdown(result.display_response)
+            
+            # Replace the estimate with the interviewer's score
+            if result.response_score is not None:
+                score_placeholder.markdown(score_badge("Your Score", result.response_score), unsafe_allow_html=True)
+            else:
+                score_placeholder.empty()
+            
+        except InputFlaggedError:
+            response_placeholder.empty()
+            queue_notice.empty()
+            score_placeholder.empty()
+            st.error("⚠️ **Security Alert:** Inappropriate input detected. Please provide a professional interview response.")
+            st.stop()
+        except Exception as e:
+            queue_notice.empty()
+            score_placeholder.empty()
+            st.error(f"❌ Error: {str(e)}")
+            st.info("💡 Tip: Check your OpenAI API key in `.streamlit/secrets.toml`")
     
     st.rerun()
 
@@ -0,0 +1,99 @@
+# benchmarks/bench_json_extract.py
+"""
+Correctness and speed of JSON extraction from model responses.
+Runs the original regex-fallback extractor and utils.extract_json over the
+corpus in json_corpus.jsonl (well-formed and malformed evaluation outputs)
+and times both on growing pathological inputs. The correctness cases and
+fuzzing run as tests in tests/test_json_extract.py.
+
+Usage:
+    python benchmarks/bench_json_extract.py
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# utils creates the OpenAI client at import; nothing here calls the API
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from utils import extract_json
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "json_corpus.jsonl")
+
+def legacy_extract_json(response_text):
+    """The original extract_json_from_response"""
+    try:
+        return json.loads(response_text)
+    except:
+        json_match = re.search(r'```json\s*(.*?)\s*```', response_text, re.DOTALL)
+        if json_match:
+            try:
+                return json.loads(json_match.group(1))
+            except:
+                pass
+        json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
+        if json_match:
+            try:
+                return json.loads(json_match.group(0))
+            except:
+                pass
+    return None
+
+def load_corpus(path=CORPUS_PATH):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def overall_score(data):
+    return data.get("overall_score") if isinstance(data, dict) else None
+
+def per_call_us(func, number=200):
+    return min(timeit.repeat(func, number=number, repeat=3)) / number * 1e6
+
+def run_corpus(corpus):
+    """Print per-case correctness and timing; returns (legacy_ok, new_ok)"""
+    print(f"{'case':<26} {'legacy':>7} {'new':>5} {'strategy':>9} {'legacy µs':>10} {'new µs':>8}")
+    legacy_ok = new_ok = 0
+    for case in corpus:
+        text, expected = case["text"], case["overall_score"]
+        legacy_correct = overall_score(legacy_extract_json(text)) == expected
+        extraction = extract_json(text)
+        new_correct = overall_score(extraction.data) == expected
+        legacy_ok += legacy_correct
+        new_ok += new_correct
+        print(f"{case['name']:<26} {'ok' if legacy_correct else 'FAIL':>7} {'ok' if new_correct else 'FAIL':>5} "
+              f"{extraction.strategy:>9} {per_call_us(lambda: legacy_extract_json(text)):>10.1f} "
+              f"{per_call_us(lambda: extract_json(text)):>8.1f}")
+    print(f"\nCorrect: legacy {legacy_ok}/{len(corpus)}, new {new_ok}/{len(corpus)}\n")
+    return legacy_ok, new_ok
+
+def run_scaling():
+    """Inputs that make repeated scanning expensive"""
+    print(f"{'pathological input':<34} {'legacy µs':>12} {'new µs':>10}")
+    for size in (1_000, 10_000, 30_000):
+        cases = {
+            f"unclosed braces x{size}": "{ " * size,
+            f"prose braces x{size}": "{a} " * size + '{"overall_score": 5}',
+            f"quoted prose braces x{size}": '{"a} ' * size,
+        }
+        for name, text in cases.items():
+            legacy = per_call_us(lambda: legacy_extract_json(text), number=3)
+            new = per_call_us(lambda: extract_json(text), number=3)
+            print(f"{name:<34} {legacy:>12.0f} {new:>10.0f}")
+    print()
+
+def main():
+    argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter).parse_args()
+
+    corpus = load_corpus()
+    _, new_ok = run_corpus(corpus)
+    run_scaling()
+    if new_ok < len(corpus):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
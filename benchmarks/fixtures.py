@@ -0,0 +1,65 @@
+# benchmarks/fixtures.py
+"""
+Realistic inputs for the benchmarks: long candidate answers, well-formed and
+malformed model outputs, and long conversation histories. Everything is
+generated from fixed seeds so runs are comparable.
+"""
+
+import json
+import random
+
+WORDS = (
+    "i designed a caching layer for our api using redis and measured latency "
+    "before and after the change the team reviewed the trade offs and we "
+    "rolled it out behind a feature flag while monitoring error rates"
+).split()
+
+EVALUATION = {
+    "question": "How would you design a rate limiter for a public API?",
+    "evaluation": {
+        "technical_accuracy": {"score": 7, "feedback": "Correct use of token buckets; distributed state not covered."},
+        "communication": {"score": 8, "feedback": "Clear structure, moved from requirements to design."},
+        "problem_solving": {"score": 6, "feedback": "Did not consider clock skew or burst handling."},
+        "completeness": {"score": 7, "feedback": "Monitoring and client feedback (429s) were mentioned."}
+    },
+    "overall_score": 7,
+    "strengths": ["Structured approach", "Concrete example from past work"],
+    "improvements": ["Discuss failure modes", "Quantify expected load"],
+    "recommendation": "Practice walking through failure scenarios for distributed components.",
+    "next_question_hint": "distributed systems"
+}
+
+def make_answer(length, seed=0):
+    """Realistic-looking candidate answer of exactly `length` characters"""
+    rng = random.Random(seed)
+    words = []
+    while sum(len(w) + 1 for w in words) < length:
+        words.append(rng.choice(WORDS))
+    return " ".join(words)[:length]
+
+def text_feedback(score=7, seed=0):
+    """Plain-text interviewer reply with a score marker"""
+    return (
+        f"{make_answer(600, seed)}\n\n**Score: {score}/10**\n\n"
+        f"Next question: {EVALUATION['question']}"
+    )
+
+def json_outputs():
+    """Structured JSON replies as models actually emit them, keyed by shape"""
+    body = json.dumps(EVALUATION, indent=2)
+    return {
+        "bare": body,
+        "fenced": f"Here is my evaluation:\n\n```json\n{body}\n```\n",
+        "prose_braces": f"I scored each {{category}} separately.\n{body}\nLet me know if {{anything}} is unclear.",
+        "two_objects": f"{body}\n\nPrevious draft: {json.dumps({'overall_score': 3})}",
+        "truncated": body[:len(body) // 2],
+        "no_json": make_answer(1500, seed=3),
+    }
+
+def make_history(turns, seed=0):
+    """Conversation of `turns` question/answer pairs after the welcome message"""
+    messages = [{"role": "assistant", "content": "Welcome. Tell me about yourself."}]
+    for i in range(turns):
+        messages.append({"role": "user", "content": make_answer(800, seed + i)})
+        messages.append({"role": "assistant", "content": text_feedback(score=5 + i % 5, seed=seed + i)})
+    return messages
@@ -0,0 +1,221 @@
+# benchmarks/loadtest.py
+"""
+Concurrent-session load test.
+Drives N simulated candidates, each an InterviewSession answering a number
+of questions, against the local mock OpenAI server (started in-process
+unless --base-url is given) and reports per-turn latency percentiles,
+time to first token, throughput, error counts and per-session memory.
+
+Usage:
+    python benchmarks/loadtest.py --sessions 50 --turns 5 --concurrency 50 \\
+        --ttft lognormal:0.5,0.4 --error-rate 0.02
+
+Set OPENAI_RPM / OPENAI_TPM (see ratelimit.py) to run under a quota.
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mock_openai import MockOpenAIServer, add_mock_arguments, config_from_args
+from prompts import ROLES, LEVELS
+
+ANSWERS = [
+    "I led the migration of our monolith's billing module to a separate service. "
+    "We started by putting an API in front of the existing code, moved traffic over "
+    "behind a feature flag and cut p95 latency from 900ms to 250ms.",
+    "When a teammate and I disagreed about the database schema, I suggested we write "
+    "down the access patterns first. That made the trade-offs obvious and we picked "
+    "the design that kept writes simple.",
+    "I would start with a token bucket per API key stored in Redis, return 429 with a "
+    "Retry-After header, and add a sliding-window check for burst protection.",
+    "I profile first: the network waterfall, then the server timings. Most slow pages "
+    "I have debugged came down to an N+1 query or an uncompressed bundle.",
+    "I explain the options in terms of cost, risk and time to deliver, and recommend "
+    "one with a clear reason, keeping the technical detail for follow-up questions.",
+]
+
+def percentile(samples, q):
+    """q-th percentile (nearest rank) of a list of numbers"""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, int(round(q / 100 * len(ordered))) - 1))
+    return ordered[rank]
+
+class LoadStats:
+    """Per-turn measurements collected from all worker threads"""
+
+    def __init__(self):
+        self.latencies = []
+        self.ttfts = []
+        self.errors = {}
+        self._lock = threading.Lock()
+
+    def record(self, latency, ttft):
+        with self._lock:
+            self.latencies.append(latency)
+            if ttft is not None:
+                self.ttfts.append(ttft)
+
+    def record_error(self, error):
+        with self._lock:
+            name = type(error).__name__
+            self.errors[name] = self.errors.get(name, 0) + 1
+
+def run_session(session, turns, think_time, stats, seed):
+    """One candidate answering `turns` questions"""
+    rng = random.Random(seed)
+    session.start()
+    for _ in range(turns):
+        if think_time:
+            time.sleep(rng.uniform(0, think_time))
+        start = time.perf_counter()
+        try:
+            result = session.submit_answer(rng.choice(ANSWERS))
+        except Exception as e:
+            stats.record_error(e)
+            continue
+        stats.record(time.perf_counter() - start, result.completion.time_to_first_token)
+
+def run_load(args, base_url):
+    """Run the load test and return the report dict"""
+    os.environ["OPENAI_BASE_URL"] = base_url
+    os.environ.setdefault("OPENAI_API_KEY", "mock-key")
+    # Mock scores are random; keep them out of the scorer calibration log
+    os.environ.setdefault("PROVISIONAL_SCORE_LOG", "")
+    # Imported here so the OpenAI client is created with the mock's base URL
+    from session import InterviewSession, InterviewConfig
+    from hedging import get_hedge_stats
+    from resilience import get_resilience_stats
+    from ratelimit import get_rate_limit_stats
+    from singleflight import get_single_flight_stats
+    from routing import get_routing_stats
+    from question_bank import QuestionBank
+
+    config = InterviewConfig(
+        role=args.role,
+        level=args.level,
+        prompt_style=args.prompt_style,
+        model=args.model,
+        history_turns=args.history_turns,
+        use_hedging=args.hedging,
+        use_routing=args.routing,
+        use_question_bank=args.question_bank is not None,
+    )
+    stats = LoadStats()
+
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    question_bank = QuestionBank(args.question_bank) if args.question_bank else None
+    sessions = [InterviewSession(config, question_bank=question_bank) for _ in range(args.sessions)]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        futures = [
+            executor.submit(run_session, session, args.turns, args.think_time, stats, seed)
+            for seed, session in enumerate(sessions)
+        ]
+        for future in futures:
+            future.result()
+    elapsed = time.perf_counter() - start
+
+    retained = tracemalloc.get_traced_memory()[0] - baseline
+    peak = tracemalloc.get_traced_memory()[1] - baseline
+    tracemalloc.stop()
+
+    def summary(samples):
+        return {
+            "p50": percentile(samples, 50),
+            "p95": percentile(samples, 95),
+            "p99": percentile(samples, 99),
+            "max": max(samples) if samples else None,
+        }
+
+    return {
+        "sessions": args.sessions,
+        "turns_per_session": args.turns,
+        "concurrency": args.concurrency,
+        "completed_turns": len(stats.latencies),
+        "output_tokens_per_turn": (
+            sum(session.state.completion_tokens for session in sessions) / len(stats.latencies)
+            if stats.latencies else None
+        ),
+        "errors": stats.errors,
+        "elapsed_seconds": elapsed,
+        "throughput_turns_per_second": len(stats.latencies) / elapsed if elapsed else None,
+        "turn_latency": summary(stats.latencies),
+        "time_to_first_token": summary(stats.ttfts),
+        "memory_per_session_kib": retained / args.sessions / 1024,
+        "peak_memory_mib": peak / 1024 / 1024,
+        "resilience": get_resilience_stats(),
+        "hedging": {k: v for k, v in get_hedge_stats().items() if k != "latency"},
+        "rate_limit": get_rate_limit_stats(),
+        "single_flight": get_single_flight_stats(),
+        "routing": get_routing_stats(),
+    }
+
+def print_report(report):
+    def fmt(value):
+        return "-" if value is None else f"{value * 1000:.0f}ms"
+
+    print(f"Sessions: {report['sessions']} x {report['turns_per_session']} turns "
+          f"(concurrency {report['concurrency']})")
+    print(f"Completed turns: {report['completed_turns']}  Errors: {report['errors'] or 'none'}")
+    if report["output_tokens_per_turn"] is not None:
+        print(f"Output tokens per turn: {report['output_tokens_per_turn']:.0f}")
+    print(f"Throughput: {report['throughput_turns_per_second']:.1f} turns/s "
+          f"over {report['elapsed_seconds']:.1f}s")
+    for name, key in (("Turn latency", "turn_latency"), ("Time to first token", "time_to_first_token")):
+        values = report[key]
+        print(f"{name}: p50 {fmt(values['p50'])}  p95 {fmt(values['p95'])}  "
+              f"p99 {fmt(values['p99'])}  max {fmt(values['max'])}")
+    print(f"Memory: {report['memory_per_session_kib']:.1f} KiB retained per session, "
+          f"peak {report['peak_memory_mib']:.1f} MiB")
+    print(f"Retries: {report['resilience']['retries']}  Hedges: {report['hedging']['hedges']}  "
+          f"Queued for quota: {report['rate_limit']['queued']} (timeouts {report['rate_limit']['timeouts']})")
+    print(f"Coalesced duplicate calls: {report['single_flight']['coalesced']}")
+    if report["routing"]["decisions"]:
+        print(f"Routing: {report['routing']['decisions']}  saved ${report['routing']['saved']:.4f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=20, help="simulated candidates")
+    parser.add_argument("--turns", type=int, default=5, help="answers per candidate")
+    parser.add_argument("--concurrency", type=int, default=20, help="sessions running at once")
+    parser.add_argument("--think-time", type=float, default=0.0, help="max random pause before each answer")
+    parser.add_argument("--role", default=ROLES[0], choices=ROLES)
+    parser.add_argument("--level", default=LEVELS[1], choices=LEVELS)
+    parser.add_argument("--model", default="gpt-4o-mini")
+    parser.add_argument("--prompt-style", default="Zero-shot")
+    parser.add_argument("--history-turns", type=int, default=6)
+    parser.add_argument("--hedging", action="store_true", help="enable hedged requests")
+    parser.add_argument("--routing", action="store_true", help="route turns between gpt-4o-mini and gpt-4o")
+    parser.add_argument("--question-bank", metavar="PATH", help="ask questions from this question bank")
+    parser.add_argument("--base-url", help="use a running server instead of the in-process mock")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    add_mock_arguments(parser)
+    args = parser.parse_args()
+
+    if args.base_url:
+        report = run_load(args, args.base_url)
+    else:
+        with MockOpenAIServer(config_from_args(args)) as server:
+            report = run_load(args, server.base_url)
+            report["mock"] = server.stats.to_dict()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+if __name__ == "__main__":
+    main()
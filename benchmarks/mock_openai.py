@@ -0,0 +1,323 @@
+# benchmarks/mock_openai.py
+"""
+Local stand-in for the OpenAI chat completions and moderations endpoints.
+Serves canned interview feedback (with `**Score: X/10**` markers, or the
+Structured JSON evaluation when a response_format is requested), supports
+streaming with usage chunks, configurable latency distributions and error
+injection. Point the app or the load generator at it with
+OPENAI_BASE_URL=http://127.0.0.1:8765/v1 and any OPENAI_API_KEY.
+
+Usage:
+    python benchmarks/mock_openai.py --port 8765 --ttft lognormal:0.6,0.5 \\
+        --token-delay 0.01 --error-rate 0.02
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tokens import count_tokens, count_message_tokens
+
+# Inputs containing this marker are flagged by the mock moderation endpoint
+FLAG_MARKER = "MOCK_FLAG"
+
+QUESTIONS = [
+    "How would you design a rate limiter for a public API?",
+    "Tell me about a time you disagreed with a teammate. How did you resolve it?",
+    "How do you decide what to test first in a new feature?",
+    "Walk me through how you would debug a slow page load.",
+    "How would you explain a complex technical trade-off to a non-technical stakeholder?",
+    "What metrics would you track after launching this feature, and why?",
+]
+
+FEEDBACK = [
+    "You covered the main points and structured the answer clearly.",
+    "Good use of a concrete example; the outcome could be quantified.",
+    "The answer stays high level; walk through the actual steps you took.",
+    "Solid reasoning about trade-offs, but edge cases were not discussed.",
+]
+
+def parse_distribution(spec):
+    """
+    Parse a latency distribution: "fixed:S", "uniform:A,B",
+    "lognormal:MEDIAN,SIGMA" or "exponential:MEAN" (seconds).
+    Returns a zero-argument sampler.
+    """
+    kind, _, args = spec.partition(":")
+    values = [float(v) for v in args.split(",") if v]
+    if kind == "fixed":
+        return lambda: values[0]
+    if kind == "uniform":
+        return lambda: random.uniform(values[0], values[1])
+    if kind == "lognormal":
+        import math
+        mu = math.log(values[0])
+        return lambda: random.lognormvariate(mu, values[1])
+    if kind == "exponential":
+        return lambda: random.expovariate(1 / values[0])
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+@dataclass
+class MockConfig:
+    """
+    Args:
+        ttft: Sampler for the delay before the first token (or the response)
+        token_delay: Delay between streamed chunks in seconds
+        moderation_latency: Sampler for the moderation endpoint delay
+        error_rate: Fraction of completion requests that fail
+        error_codes: Status codes to fail with (429 responses carry Retry-After)
+        chunk_size: Characters per streamed chunk
+    """
+    ttft: object = field(default_factory=lambda: parse_distribution("lognormal:0.5,0.4"))
+    token_delay: float = 0.005
+    moderation_latency: object = field(default_factory=lambda: parse_distribution("fixed:0.1"))
+    error_rate: float = 0.0
+    error_codes: tuple = (429, 500, 503)
+    chunk_size: int = 12
+
+class MockStats:
+    """Request counters"""
+
+    def __init__(self):
+        self.completions = 0
+        self.streams = 0
+        self.moderations = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def incr(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "completions": self.completions,
+                "streams": self.streams,
+                "moderations": self.moderations,
+                "errors": self.errors,
+            }
+
+def canned_content(request):
+    """Interview feedback shaped like what the requested prompt asks for"""
+    system = request["messages"][0]["content"] if request.get("messages") else ""
+    if "running summary" in system:
+        return "- Asked about system design; candidate gave a structured answer. Score 7/10."
+    score = random.randint(4, 9)
+    question = random.choice(QUESTIONS)
+    # The question bank supplies the next question; the model only evaluates
+    evaluation_only = "QUESTION SELECTION:" in system
+    if request.get("response_format"):
+        categories = ["technical_accuracy", "communication", "problem_solving", "completeness"]
+        # Same field order as evaluation.EVALUATION_SCHEMA
+        evaluation = {
+            "evaluation": {
+                name: {"score": max(1, min(10, score + random.randint(-2, 2))), "feedback": random.choice(FEEDBACK)}
+                for name in categories
+            },
+            "overall_score": score,
+            "strengths": [random.choice(FEEDBACK)],
+            "improvements": [random.choice(FEEDBACK)],
+            "recommendation": random.choice(FEEDBACK),
+        }
+        if not evaluation_only:
+            evaluation.update({"question": question, "next_question_hint": "system design"})
+        return json.dumps(evaluation)
+    feedback = f"{random.choice(FEEDBACK)} {random.choice(FEEDBACK)}\n\n**Score: {score}/10**"
+    return feedback if evaluation_only else f"{feedback}\n\nNext question: {question}"
+
+def make_handler(config, stats):
+    """Request handler class bound to a MockConfig and MockStats"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status, payload, headers=None):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _read_json(self):
+            length = int(self.headers.get("Content-Length", 0))
+            return json.loads(self.rfile.read(length) or b"{}")
+
+        def do_POST(self):
+            request = self._read_json()
+            if self.path.endswith("/chat/completions"):
+                self._chat_completion(request)
+            elif self.path.endswith("/moderations"):
+                self._moderation(request)
+            else:
+                self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+        def _moderation(self, request):
+            stats.incr("moderations")
+            time.sleep(config.moderation_latency())
+            inputs = request.get("input", "")
+            inputs = inputs if isinstance(inputs, list) else [inputs]
+            self._send_json(200, {
+                "id": f"modr-{uuid.uuid4().hex}",
+                "model": "omni-moderation-latest",
+                "results": [
+                    {"flagged": FLAG_MARKER in text, "categories": {}, "category_scores": {}}
+                    for text in inputs
+                ],
+            })
+
+        def _chat_completion(self, request):
+            model = request.get("model", "gpt-4o-mini")
+            time.sleep(config.ttft())
+
+            if random.random() < config.error_rate:
+                stats.incr("errors")
+                status = random.choice(config.error_codes)
+                headers = {"Retry-After": "1"} if status == 429 else None
+                self._send_json(status, {"error": {"message": "Injected mock error", "type": "mock_error"}}, headers)
+                return
+
+            content = canned_content(request)
+            usage = {
+                "prompt_tokens": count_message_tokens(request.get("messages", []), model),
+                "completion_tokens": count_tokens(content, model),
+            }
+            usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+            completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+            created = int(time.time())
+
+            if not request.get("stream"):
+                stats.incr("completions")
+                self._send_json(200, {
+                    "id": completion_id,
+                    "object": "chat.completion",
+                    "created": created,
+                    "model": model,
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop",
+                    }],
+                    "usage": usage,
+                })
+                return
+
+            stats.incr("streams")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+
+            def chunk(delta, finish_reason=None, chunk_usage=None, choices=True):
+                payload = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}] if choices else [],
+                }
+                if chunk_usage is not None:
+                    payload["usage"] = chunk_usage
+                self.wfile.write(f"data: {json.dumps(payload)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+
+            try:
+                chunk({"role": "assistant", "content": ""})
+                for i in range(0, len(content), config.chunk_size):
+                    chunk({"content": content[i:i + config.chunk_size]})
+                    time.sleep(config.token_delay)
+                chunk({}, finish_reason="stop")
+                if (request.get("stream_options") or {}).get("include_usage"):
+                    chunk(None, chunk_usage=usage, choices=False)
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                # Client closed the stream (cancelled or hedged request)
+                pass
+
+    return Handler
+
+class MockOpenAIServer:
+    """Threaded mock server; use as a context manager or call start()/stop()"""
+
+    def __init__(self, config=None, host="127.0.0.1", port=0):
+        self.config = config or MockConfig()
+        self.stats = MockStats()
+        self.httpd = ThreadingHTTPServer((host, port), make_handler(self.config, self.stats))
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+def add_mock_arguments(parser):
+    """Command-line options shared with the load generator"""
+    parser.add_argument("--ttft", default="lognormal:0.5,0.4",
+                        help="time-to-first-token distribution, e.g. fixed:0.5, uniform:0.2,1.5, lognormal:0.5,0.4")
+    parser.add_argument("--token-delay", type=float, default=0.005, help="seconds between streamed chunks")
+    parser.add_argument("--moderation-latency", default="fixed:0.1", help="moderation latency distribution")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of completions that fail")
+    parser.add_argument("--error-codes", default="429,500,503", help="status codes used for injected errors")
+
+def config_from_args(args):
+    return MockConfig(
+        ttft=parse_distribution(args.ttft),
+        token_delay=args.token_delay,
+        moderation_latency=parse_distribution(args.moderation_latency),
+        error_rate=args.error_rate,
+        error_codes=tuple(int(code) for code in args.error_codes.split(",")),
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_mock_arguments(parser)
+    args = parser.parse_args()
+
+    server = MockOpenAIServer(config_from_args(args), args.host, args.port)
+    print(f"Mock OpenAI server listening on {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        print(json.dumps(server.stats.to_dict()))
+
+if __name__ == "__main__":
+    main()
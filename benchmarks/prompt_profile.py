@@ -0,0 +1,145 @@
+# benchmarks/prompt_profile.py
+"""
+System prompt token profiler.
+Assembles the system prompt for every style x tone x role x level x domain
+combination (7 x 3 x 9 x 3 x 7) and reports the tokens of each section
+(scoring, criteria, tone, technique, examples) per style, and for every
+model in prompts.SYSTEM_PROMPT_BUDGETS the size after budget trimming.
+
+--check compares against the stored report and exits with status 1 if any
+prompt is over its model's budget or a style's largest prompt grew by more
+than the threshold allows.
+
+Usage:
+    python benchmarks/prompt_profile.py                    # print the report
+    python benchmarks/prompt_profile.py --check            # fail on budget or growth
+    python benchmarks/prompt_profile.py --update-baseline  # record a new report
+    python benchmarks/prompt_profile.py --csv prompts.csv  # tokens per section per combination
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+from statistics import mean
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from prompts import (
+    ROLES, LEVELS, DOMAINS, PROMPT_BUILDERS, TONE_INSTRUCTIONS, SYSTEM_PROMPT_BUDGETS,
+    system_prompt_sections, fit_system_prompt, join_sections,
+)
+from tokens import count_tokens, tiktoken
+
+REPORT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "prompt_tokens.json")
+DEFAULT_THRESHOLD = 1.05
+SECTIONS = ("scoring", "criteria", "tone", "technique", "examples")
+
+def profile(model="gpt-4o-mini"):
+    """One row per combination: the configuration, tokens per section and the total"""
+    rows = []
+    for style, tone, role, level, domain in itertools.product(PROMPT_BUILDERS, TONE_INSTRUCTIONS, ROLES, LEVELS, DOMAINS):
+        sections = system_prompt_sections(role, level, domain, style, tone)
+        row = {"style": style, "tone": tone, "role": role, "level": level, "domain": domain}
+        row.update({f"{name}_tokens": 0 for name in SECTIONS})
+        row.update({f"{name}_tokens": count_tokens(text, model) for name, text in sections})
+        row["total"] = count_tokens(join_sections(sections), model)
+        for budget_model in SYSTEM_PROMPT_BUDGETS:
+            fitted = fit_system_prompt(sections, budget_model, role, level)
+            row[budget_model] = count_tokens(join_sections(fitted), budget_model)
+        rows.append(row)
+    return rows
+
+def summarize(rows):
+    """The report: per-style section statistics and per-model budget use"""
+    styles = {}
+    for style in PROMPT_BUILDERS:
+        style_rows = [row for row in rows if row["style"] == style]
+        styles[style] = {
+            "sections": {name: round(mean(row[f"{name}_tokens"] for row in style_rows), 1) for name in SECTIONS},
+            "min": min(row["total"] for row in style_rows),
+            "mean": round(mean(row["total"] for row in style_rows), 1),
+            "max": max(row["total"] for row in style_rows),
+        }
+    models = {}
+    for model, budget in SYSTEM_PROMPT_BUDGETS.items():
+        models[model] = {
+            "budget": budget,
+            "max": max(row[model] for row in rows),
+            "trimmed": sum(1 for row in rows if row[model] < row["total"]),
+            "over_budget": sum(1 for row in rows if row[model] > budget),
+        }
+    return {
+        "tokenizer": "tiktoken" if tiktoken else "estimate",
+        "combinations": len(rows),
+        "styles": styles,
+        "models": models,
+    }
+
+def check(report, baseline, threshold):
+    """Problems that should fail CI: prompts over budget and styles that grew"""
+    problems = [
+        f"{model}: {result['over_budget']} prompts over the {result['budget']}-token budget"
+        for model, result in report["models"].items() if result["over_budget"]
+    ]
+    if baseline and baseline.get("tokenizer") == report["tokenizer"]:
+        for style, result in report["styles"].items():
+            expected = baseline["styles"].get(style)
+            if expected and result["max"] > expected["max"] * threshold:
+                problems.append(f"{style}: largest prompt grew from {expected['max']} to {result['max']} tokens")
+    elif baseline:
+        print(f"Baseline was counted with {baseline.get('tokenizer')}, not {report['tokenizer']}; "
+              f"only checking budgets")
+    return problems
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--check", action="store_true", help="fail on prompts over budget or grown beyond the threshold")
+    parser.add_argument("--update-baseline", action="store_true", help="write the report as the new baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed growth factor of a style's largest prompt")
+    parser.add_argument("--baseline", default=REPORT_PATH)
+    parser.add_argument("--csv", help="also write tokens per section for every combination to this file")
+    args = parser.parse_args()
+
+    rows = profile()
+    report = summarize(rows)
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    print(f"{report['combinations']} combinations, token counts from {report['tokenizer']}\n")
+    print(f"{'style':<20} " + " ".join(f"{name:>9}" for name in SECTIONS) + f" {'min':>6} {'mean':>7} {'max':>6}")
+    for style, result in report["styles"].items():
+        print(f"{style:<20} " + " ".join(f"{result['sections'][name]:>9.1f}" for name in SECTIONS)
+              + f" {result['min']:>6} {result['mean']:>7.1f} {result['max']:>6}")
+    print(f"\n{'model':<20} {'budget':>7} {'max':>6} {'trimmed':>8} {'over':>6}")
+    for model, result in report["models"].items():
+        print(f"{model:<20} {result['budget']:>7} {result['max']:>6} {result['trimmed']:>8} {result['over_budget']:>6}")
+
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"\nPer-combination tokens written to {args.csv}")
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"\nReport written to {args.baseline}")
+
+    if args.check:
+        problems = check(report, baseline, args.threshold)
+        if problems:
+            print("\n" + "\n".join(problems))
+            sys.exit(1)
+        print("\nAll prompts within budget" + (f" and within {args.threshold}x of the baseline" if baseline else ""))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+# cache.py
+"""
+Persistent completion cache.
+Stores chat completions on local disk (SQLite) keyed on a hash of everything
+that determines the model output, with LRU size limits, TTL eviction and
+hit/miss counters.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_CACHE_PATH = os.path.join(".cache", "completions.sqlite3")
+
+def make_cache_key(params):
+    """
+    Hash of a chat completion request: system prompt, messages, model and
+    sampling parameters. Key order does not matter.
+    """
+    relevant = {k: v for k, v in params.items() if k not in ("stream", "stream_options")}
+    payload = json.dumps(relevant, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class CompletionCache:
+    """
+    SQLite-backed completion cache.
+
+    Args:
+        path: Database file (created if missing)
+        max_entries: Maximum number of cached completions; least recently
+            used entries are evicted beyond this
+        ttl: Seconds an entry stays valid (None = no expiry)
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=5000, ttl=7 * 24 * 3600):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS completions (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    created REAL NOT NULL,
+                    accessed REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS completions_accessed ON completions (accessed)")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def should_use(temperature, force=False):
+        """Sampled (temperature > 0) outputs are only cached when forced"""
+        return force or temperature <= 0
+
+    def get(self, key):
+        """Return the cached value for a key, or None on a miss"""
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT value, created FROM completions WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and self.ttl is not None and now - row[1] > self.ttl:
+                conn.execute("DELETE FROM completions WHERE key = ?", (key,))
+                row = None
+                with self._lock:
+                    self.evictions += 1
+            if row is not None:
+                conn.execute("UPDATE completions SET accessed = ? WHERE key = ?", (now, key))
+        with self._lock:
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return json.loads(row[0]) if row is not None else None
+
+    def put(self, key, value):
+        """Store a JSON-serializable value and evict beyond max_entries"""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO completions (key, value, created, accessed) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now)
+            )
+            count = conn.execute("SELECT COUNT(*) FROM completions").fetchone()[0]
+            excess = count - self.max_entries
+            if excess > 0:
+                conn.execute(
+                    "DELETE FROM completions WHERE key IN "
+                    "(SELECT key FROM completions ORDER BY accessed LIMIT ?)",
+                    (excess,)
+                )
+                with self._lock:
+                    self.evictions += excess
+
+    def purge_expired(self):
+        """Delete all entries older than the TTL"""
+        if self.ttl is None:
+            return 0
+        with self._connect() as conn:
+            deleted = conn.execute(
+                "DELETE FROM completions WHERE created < ?", (time.time() - self.ttl,)
+            ).rowcount
+        with self._lock:
+            self.evictions += deleted
+        return deleted
+
+    def clear(self):
+        """Remove every cached entry"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM completions")
+
+    def stats(self):
+        """Hit/miss counters and current size"""
+        with self._connect() as conn:
+            size = conn.execute("SELECT COUNT(*) FROM completions").fetchone()[0]
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": size,
+            }
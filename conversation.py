@@ -0,0 +1,123 @@
+# conversation.py
+"""
+Token-budgeted conversation window.
+Keeps the most recent interview turns verbatim and folds older turns into a
+running summary, so the prompt sent on every turn stays roughly the same size
+no matter how long the interview runs.
+"""
+
+from tokens import count_tokens, count_message_tokens
+
+# Input-token budget per model for one chat completion request
+# (system prompt + summary + verbatim history)
+CONTEXT_BUDGETS = {
+    "gpt-4o": 6000,
+    "gpt-4o-mini": 6000,
+    "gpt-4-turbo": 6000,
+    "gpt-4": 4000,
+}
+DEFAULT_CONTEXT_BUDGET = 4000
+
+SUMMARY_HEADER = "Summary of the earlier part of this interview (questions asked, answers given, scores):"
+
+def last_question(messages):
+    """
+    The last question the interviewer asked, or None: the last line of the
+    last interviewer message with a "?", or the line introduced by "...
+    question:" (the welcome message's first question).
+    """
+    for message in reversed(messages):
+        if message["role"] == "assistant":
+            lines = [line.replace("**", "").strip() for line in message["content"].splitlines()]
+            lines = [line for line in lines if line]
+            questions = [
+                line for i, line in enumerate(lines)
+                if "?" in line or (i and lines[i - 1].endswith("question:"))
+            ]
+            return questions[-1] if questions else None
+    return None
+
+class ConversationWindow:
+    """
+    Builds the message list for each API call from the full chat history.
+
+    The last `keep_turns` question/answer turns are sent verbatim. Older turns
+    are folded into `summary` by the `summarize` callable, which receives the
+    previous summary and the newly evicted messages and returns the refreshed
+    summary text. Folding happens in batches of `fold_turns` (see fold), which
+    callers run after a turn completes so the summarizer is off the critical
+    path of the next request; build only folds when the request would
+    otherwise exceed the model's input-token budget.
+    """
+
+    def __init__(self, summarize, keep_turns=6, fold_turns=2, budgets=None,
+                 summary="", summarized_count=0):
+        self.summarize = summarize
+        self.keep_turns = keep_turns
+        self.fold_turns = fold_turns
+        self.budgets = budgets or CONTEXT_BUDGETS
+        self.summary = summary
+        self.summarized_count = summarized_count
+
+    def budget_for(self, model):
+        """Input-token budget for a model"""
+        return self.budgets.get(model, DEFAULT_CONTEXT_BUDGET)
+
+    def needs_fold(self, messages):
+        """Whether a batch of turns has fallen out of the verbatim window"""
+        return len(messages) - self.summarized_count >= (self.keep_turns + self.fold_turns) * 2
+
+    def fold(self, messages):
+        """
+        Fold the turns that fell out of the verbatim window into the summary
+        once a full batch has; returns whether the summary changed.
+        """
+        if not self.needs_fold(messages):
+            return False
+        history = [{"role": m["role"], "content": m["content"]} for m in messages]
+        return self._fold(history, len(history) - self.keep_turns * 2)
+
+    def build(self, messages, system_prompt, model, enforce_budget=True):
+        """
+        Return the messages to send (without the system prompt) for the
+        current turn. With enforce_budget, the oldest verbatim turns are
+        folded into the summary while the request is over the model's
+        input-token budget.
+        """
+        history = [{"role": m["role"], "content": m["content"]} for m in messages]
+        if not enforce_budget:
+            return self._assemble(history)
+
+        budget = self.budget_for(model) - count_tokens(system_prompt, model)
+        while (self.summarized_count < len(history) - 1 and
+               count_message_tokens(self._assemble(history), model) > budget):
+            if not self._fold(history, min(self.summarized_count + 2, len(history) - 1)):
+                break
+
+        return self._assemble(history)
+
+    def reset(self):
+        """Forget the running summary"""
+        self.summary = ""
+        self.summarized_count = 0
+
+    def _fold(self, history, upto):
+        """Fold history[summarized_count:upto] into the running summary"""
+        evicted = history[self.summarized_count:upto]
+        if not evicted:
+            return False
+        try:
+            self.summary = self.summarize(self.summary, evicted)
+        except Exception as e:
+            print(f"Conversation summary error: {e}")
+            # Keep the turns verbatim and retry on the next turn
+            return False
+        self.summarized_count = upto
+        return True
+
+    def _assemble(self, history):
+        """Summary message followed by the verbatim window"""
+        window = history[self.summarized_count:]
+        if not self.summary:
+            return window
+        return [{"role": "system", "content": f"{SUMMARY_HEADER}\n{self.summary}"}] + window
@@ -0,0 +1,198 @@
+# evaluation.py
+"""
+Structured JSON evaluation support.
+Defines the JSON schema for the evaluation shape, used as a strict
+Structured Outputs response_format on models that support it, and an
+incremental JSON parser that exposes the evaluation while it streams in so
+category scores can be shown as soon as they arrive.
+"""
+
+import json
+import re
+
+EVALUATION_CATEGORIES = ["technical_accuracy", "communication", "problem_solving", "completeness"]
+
+_SCORE_SCHEMA = {"type": "integer", "minimum": 1, "maximum": 10, "description": "Score from 1 to 10"}
+
+_CATEGORY_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "score": _SCORE_SCHEMA,
+        "feedback": {"type": "string"},
+    },
+    "required": ["score", "feedback"],
+    "additionalProperties": False,
+}
+
+# Property order is the order the model generates fields in: scores first,
+# the next question last
+EVALUATION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "evaluation": {
+            "type": "object",
+            "properties": {category: _CATEGORY_SCHEMA for category in EVALUATION_CATEGORIES},
+            "required": EVALUATION_CATEGORIES,
+            "additionalProperties": False,
+        },
+        "overall_score": _SCORE_SCHEMA,
+        "strengths": {"type": "array", "items": {"type": "string"}},
+        "improvements": {"type": "array", "items": {"type": "string"}},
+        "recommendation": {"type": "string"},
+        "question": {"type": "string", "description": "The next interview question"},
+        "next_question_hint": {"type": "string"},
+    },
+    "required": [
+        "evaluation", "overall_score", "strengths", "improvements",
+        "recommendation", "question", "next_question_hint",
+    ],
+    "additionalProperties": False,
+}
+
+# Top-level keys of a complete evaluation
+EVALUATION_KEYS = tuple(EVALUATION_SCHEMA["required"])
+
+# Fields the model leaves out when the next question comes from the question bank
+QUESTION_KEYS = ("question", "next_question_hint")
+
+EVALUATION_ONLY_SCHEMA = {
+    **EVALUATION_SCHEMA,
+    "properties": {k: v for k, v in EVALUATION_SCHEMA["properties"].items() if k not in QUESTION_KEYS},
+    "required": [k for k in EVALUATION_SCHEMA["required"] if k not in QUESTION_KEYS],
+}
+EVALUATION_ONLY_KEYS = tuple(EVALUATION_ONLY_SCHEMA["required"])
+
+# Models that accept a strict json_schema response_format
+STRUCTURED_OUTPUT_MODELS = ("gpt-4o", "gpt-4o-mini")
+
+def evaluation_response_format(model, evaluation_only=False):
+    """
+    Strict evaluation schema where supported, plain JSON mode otherwise.
+    With evaluation_only the schema has no next-question fields.
+    """
+    if model in STRUCTURED_OUTPUT_MODELS:
+        schema = EVALUATION_ONLY_SCHEMA if evaluation_only else EVALUATION_SCHEMA
+        return {
+            "type": "json_schema",
+            "json_schema": {"name": "interview_evaluation", "strict": True, "schema": schema},
+        }
+    return {"type": "json_object"}
+
+_STRING_RUN = re.compile(r'[^"\\]+')
+_SCALAR_CHARS = frozenset("0123456789+-.eEtruefalsn")
+_WHITESPACE = frozenset(" \t\r\n")
+
+class _Frame:
+    """An open object or array"""
+    __slots__ = ("container", "key", "expecting_key")
+
+    def __init__(self, container):
+        self.container = container
+        self.key = 0 if isinstance(container, list) else None
+        self.expecting_key = isinstance(container, dict)
+
+class IncrementalJSONParser:
+    """
+    Parses one JSON object from text fed in arbitrary chunks.
+
+    `value` is the document parsed so far: objects and arrays appear as soon
+    as they open, scalars once they are complete. feed() returns the
+    (path, value) pairs of the scalars completed by that chunk, e.g.
+    (("evaluation", "communication", "score"), 7). Text before the first
+    "{" (such as a code fence) and after the closing brace is ignored.
+    """
+
+    def __init__(self):
+        self.value = None
+        self.done = False
+        self._stack = []
+        self._token = None
+        self._buffer = []
+        self._escape = False
+
+    def feed(self, text):
+        events = []
+        i, n = 0, len(text)
+        while i < n and not self.done:
+            if self._token == "string":
+                i = self._scan_string(text, i, events)
+                continue
+
+            c = text[i]
+            if self._token == "scalar":
+                if c in _SCALAR_CHARS:
+                    self._buffer.append(c)
+                    i += 1
+                    continue
+                self._add_value(json.loads("".join(self._buffer)), events)
+                self._token = None
+                self._buffer = []
+
+            i += 1
+            if c in _WHITESPACE:
+                continue
+            if not self._stack:
+                if c == "{" and self.value is None:
+                    self.value = {}
+                    self._stack.append(_Frame(self.value))
+                continue
+
+            frame = self._stack[-1]
+            if c == '"':
+                self._token = "string"
+            elif c == "{" or c == "[":
+                container = {} if c == "{" else []
+                self._add_value(container, events)
+                self._stack.append(_Frame(container))
+            elif c == "}" or c == "]":
+                self._stack.pop()
+                if not self._stack:
+                    self.done = True
+            elif c == ",":
+                if isinstance(frame.container, list):
+                    frame.key += 1
+                else:
+                    frame.expecting_key = True
+            elif c == ":":
+                continue
+            elif c in _SCALAR_CHARS:
+                self._token = "scalar"
+                self._buffer = [c]
+            else:
+                raise ValueError(f"Unexpected character {c!r} in JSON stream")
+        return events
+
+    def _scan_string(self, text, i, events):
+        """Consume string characters from text[i:]; returns the new offset"""
+        if self._escape:
+            self._buffer.append("\\" + text[i])
+            self._escape = False
+            return i + 1
+        c = text[i]
+        if c == "\\":
+            self._escape = True
+            return i + 1
+        if c == '"':
+            value = json.loads('"' + "".join(self._buffer) + '"')
+            self._token = None
+            self._buffer = []
+            frame = self._stack[-1]
+            if frame.expecting_key:
+                frame.key = value
+                frame.expecting_key = False
+            else:
+                self._add_value(value, events)
+            return i + 1
+        run = _STRING_RUN.match(text, i)
+        self._buffer.append(run.group())
+        return run.end()
+
+    def _add_value(self, value, events):
+        """Store a value at the current position of the innermost container"""
+        frame = self._stack[-1]
+        if isinstance(frame.container, list):
+            frame.container.append(value)
+        else:
+            frame.container[frame.key] = value
+        if not isinstance(value, (dict, list)):
+            events.append((tuple(f.key for f in self._stack), value))
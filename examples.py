@@ -0,0 +1,185 @@
+# examples.py
+"""
+Graded few-shot examples, retrieved per prompt.
+The examples live in examples.jsonl (one graded question, answer and
+feedback per line, tagged with the roles and levels it suits). ExampleStore
+indexes them with TF-IDF vectors so the Few-shot prompt gets the most
+relevant examples for the role, level and the question being answered,
+within a token budget, instead of one fixed block per role family.
+
+Usage:
+    python examples.py "How would you design a rate limiter?" --role "Backend Developer" --level Senior
+"""
+
+import argparse
+import json
+import math
+import os
+import re
+from collections import Counter
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+
+from tokens import count_tokens
+
+DEFAULT_EXAMPLES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "examples.jsonl")
+
+DEFAULT_K = 2
+DEFAULT_TOKEN_BUDGET = 350
+
+# Added to the text similarity (0-1) of examples written for the exact role/level
+ROLE_BOOST = 0.3
+LEVEL_BOOST = 0.1
+
+_WORD = re.compile(r"[a-z][a-z0-9+#/]*")
+_STOPWORDS = frozenset("""
+a an and are as at be but by can do does for from how i in is it me of on or that the this to
+was we what when where which who why with would you your
+""".split())
+
+def _terms(text):
+    return [w for w in _WORD.findall(text.lower()) if w not in _STOPWORDS]
+
+@dataclass(frozen=True)
+class Example:
+    """A graded interview exchange; empty `roles`/`levels` means any"""
+    id: str
+    question: str
+    answer: str
+    feedback: tuple
+    roles: tuple = ()
+    levels: tuple = ()
+    tags: tuple = ()
+
+    def matches(self, role, level):
+        return (not self.roles or role in self.roles) and (not self.levels or level in self.levels)
+
+    def render(self, number):
+        """The example in the Few-shot prompt format"""
+        return (f'Example {number}:\nQ: "{self.question}"\nA: "{self.answer}"\n\n'
+                f'Feedback:\n' + "\n".join(self.feedback))
+
+class ExampleStore:
+    """
+    TF-IDF index over the examples' question, answer and tags (tags count
+    twice). Rows are L2-normalized, so relevance to a query is one
+    matrix-vector product.
+
+    Args:
+        examples: Example instances
+    """
+
+    def __init__(self, examples):
+        self.examples = tuple(examples)
+        documents = [
+            Counter(_terms(" ".join((e.question, e.answer) + e.tags * 2)))
+            for e in self.examples
+        ]
+        self.vocabulary = {term: i for i, term in enumerate(sorted(set().union(*documents)))} if documents else {}
+        df = np.zeros(len(self.vocabulary))
+        for counts in documents:
+            df[[self.vocabulary[t] for t in counts]] += 1
+        self.idf = np.log((1 + len(documents)) / (1 + df)) + 1
+        self.matrix = np.zeros((len(documents), len(self.vocabulary)))
+        for row, counts in enumerate(documents):
+            for term, count in counts.items():
+                self.matrix[row, self.vocabulary[term]] = 1 + math.log(count)
+        self.matrix *= self.idf
+        norms = np.linalg.norm(self.matrix, axis=1, keepdims=True)
+        self.matrix /= np.where(norms == 0, 1, norms)
+        self._tokens = {}
+
+    @classmethod
+    def load(cls, path=DEFAULT_EXAMPLES_PATH):
+        """Store with the examples in a JSON Lines file"""
+        examples = []
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    item = json.loads(line)
+                    examples.append(Example(
+                        id=item["id"],
+                        question=item["question"],
+                        answer=item["answer"],
+                        feedback=tuple(item["feedback"]),
+                        roles=tuple(item.get("roles", ())),
+                        levels=tuple(item.get("levels", ())),
+                        tags=tuple(item.get("tags", ())),
+                    ))
+        return cls(examples)
+
+    def relevance(self, query):
+        """Cosine similarity of every example to `query` (zeros if empty)"""
+        vector = np.zeros(len(self.vocabulary))
+        for term, count in Counter(_terms(query or "")).items():
+            index = self.vocabulary.get(term)
+            if index is not None:
+                vector[index] = 1 + math.log(count)
+        vector *= self.idf
+        norm = np.linalg.norm(vector)
+        return self.matrix @ (vector / norm) if norm else np.zeros(len(self.examples))
+
+    def select(self, role, level, question=None, k=DEFAULT_K, token_budget=DEFAULT_TOKEN_BUDGET):
+        """
+        Up to `k` examples that suit the role and level, most relevant to
+        `question` first, whose rendered size fits within `token_budget`.
+        The best example is always included so the prompt has a format to
+        follow. Without a question, examples written for the exact role and
+        level rank first.
+        """
+        relevance = self.relevance(question)
+        ranked = sorted(
+            (i for i, e in enumerate(self.examples) if e.matches(role, level)),
+            key=lambda i: -(relevance[i]
+                            + ROLE_BOOST * (role in self.examples[i].roles)
+                            + LEVEL_BOOST * (level in self.examples[i].levels))
+        )
+        selected, used = [], 0
+        for i in ranked:
+            example = self.examples[i]
+            cost = self._token_cost(example)
+            if selected and used + cost > token_budget:
+                continue
+            selected.append(example)
+            used += cost
+            if len(selected) == k:
+                break
+        return selected
+
+    def _token_cost(self, example):
+        if example.id not in self._tokens:
+            self._tokens[example.id] = count_tokens(example.render(1))
+        return self._tokens[example.id]
+
+def format_examples(examples):
+    """Numbered examples for the Few-shot prompt"""
+    return "\n\n".join(example.render(number) for number, example in enumerate(examples, 1))
+
+@lru_cache(maxsize=1)
+def get_example_store():
+    """Store with the examples in FEW_SHOT_EXAMPLES_PATH, or examples.jsonl"""
+    path = os.environ.get("FEW_SHOT_EXAMPLES_PATH") or DEFAULT_EXAMPLES_PATH
+    try:
+        return ExampleStore.load(path)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Few-shot examples not loaded: {e}")
+        return ExampleStore(())
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("question", nargs="?", help="the question being answered")
+    parser.add_argument("--role", default="Backend Developer")
+    parser.add_argument("--level", default="Mid")
+    parser.add_argument("-k", type=int, default=DEFAULT_K)
+    parser.add_argument("--token-budget", type=int, default=DEFAULT_TOKEN_BUDGET)
+    args = parser.parse_args()
+
+    examples = get_example_store().select(args.role, args.level, args.question, args.k, args.token_budget)
+    text = format_examples(examples)
+    print(text)
+    print(f"\n{len(examples)} examples, {count_tokens(text)} tokens")
+
+if __name__ == "__main__":
+    main()
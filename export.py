@@ -0,0 +1,236 @@
+# export.py
+"""
+Bulk export of stored interview sessions for cohort analysis.
+Streams every session in the session store to gzip-compressed NDJSON, one
+record per answered question (turn), and optionally to Parquet (requires
+pyarrow). Sessions are loaded one at a time and rows are written in
+batches, so memory stays bounded however many sessions are exported.
+
+Exports are incremental: a state file next to the NDJSON output records
+how many turns of each session were exported and the newest session update
+seen. The next run only reads sessions updated since then and appends
+their new turns (as another gzip member, which gzip readers concatenate;
+Parquet gets a new part file per run).
+
+Usage:
+    python export.py --out exports/turns.ndjson.gz [--parquet exports/turns] [--store .cache/sessions.sqlite3]
+    python export.py --out exports/turns.ndjson.gz --full   # ignore the state file and export everything
+"""
+
+import argparse
+import gzip
+import json
+import os
+import time
+
+from conversation import last_question
+from evaluation import EVALUATION_CATEGORIES
+from store import SQLiteSessionStore, DEFAULT_STORE_PATH
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # optional dependency
+    pyarrow = None
+
+DEFAULT_BATCH_SIZE = 1000
+
+# Column name -> pyarrow type name, in output order
+TURN_COLUMNS = {
+    "session_id": "string",
+    "turn": "int64",
+    "started_at": "string",
+    "role": "string",
+    "level": "string",
+    "domain": "string",
+    "prompt_style": "string",
+    "tone": "string",
+    "question": "string",
+    "answer": "string",
+    "feedback": "string",
+    "overall": "float64",
+    **{category: "float64" for category in EVALUATION_CATEGORIES},
+    "model": "string",
+    "prompt_tokens": "int64",
+    "completion_tokens": "int64",
+    "cost": "float64",
+    "latency": "float64",
+}
+
+def _score(value):
+    return float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+def session_turns(session_id, stored):
+    """
+    One flat record per answered question of a stored session (see
+    SessionStore.load), in turn order, with TURN_COLUMNS as keys.
+    Usage of each turn sums every API call stamped with it: the evaluation
+    plus any history summary made for that turn. `model` and `latency` are
+    those of the evaluation call.
+    """
+    config = stored["config"]
+    messages = stored["messages"]
+    json_overall = {record["question_num"]: record.get("overall") for record in stored["scores"]}
+    usage = {}
+    for entry in stored["usage_log"]:
+        turn = usage.setdefault(entry.get("question_num"), {
+            "model": None,
+            "latency": None,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "cost": 0.0,
+        })
+        if not entry.get("summary"):
+            turn["model"] = entry.get("model")
+            turn["latency"] = entry.get("latency")
+        turn["prompt_tokens"] += entry.get("prompt_tokens") or 0
+        turn["completion_tokens"] += entry.get("completion_tokens") or 0
+        turn["cost"] += entry.get("cost") or 0.0
+
+    turns = []
+    for i in range(1, len(messages) - 1, 2):
+        answer, reply = messages[i], messages[i + 1]
+        if answer["role"] != "user" or reply["role"] != "assistant":
+            continue
+        number = len(turns) + 1
+        details = reply.get("scores") or {}
+        overall = reply.get("response_score")
+        if overall is None:
+            # A missing JSON overall_score was stored as 0
+            overall = json_overall.get(number) or None
+        turn_usage = usage.get(number, {})
+        record = {
+            "session_id": session_id,
+            "turn": number,
+            "started_at": stored["fields"].get("started_at"),
+            "role": config.get("role"),
+            "level": config.get("level"),
+            "domain": config.get("domain"),
+            "prompt_style": config.get("prompt_style"),
+            "tone": config.get("tone"),
+            "question": last_question(messages[:i]),
+            "answer": answer["content"],
+            "feedback": reply["content"],
+            "overall": _score(overall),
+            "model": turn_usage.get("model"),
+            "prompt_tokens": turn_usage.get("prompt_tokens"),
+            "completion_tokens": turn_usage.get("completion_tokens"),
+            "cost": turn_usage.get("cost"),
+            "latency": turn_usage.get("latency"),
+        }
+        for category in EVALUATION_CATEGORIES:
+            value = details.get(category)
+            record[category] = _score(value.get("score")) if isinstance(value, dict) else None
+        turns.append({column: record[column] for column in TURN_COLUMNS})
+    return turns
+
+class ParquetWriter:
+    """Writes turn records to a Parquet file one row group per batch"""
+
+    def __init__(self, path):
+        if pyarrow is None:
+            raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow)")
+        self.schema = pyarrow.schema([(name, getattr(pyarrow, kind)()) for name, kind in TURN_COLUMNS.items()])
+        self.path = path
+        self._writer = None
+
+    def write(self, rows):
+        if not rows:
+            return
+        if self._writer is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._writer = pyarrow.parquet.ParquetWriter(self.path, self.schema, compression="zstd")
+        self._writer.write_table(pyarrow.Table.from_pylist(rows, schema=self.schema))
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+def load_export_state(path):
+    """{"updated_after": float, "turns": {session_id: exported turns}} (empty if missing)"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"updated_after": 0.0, "turns": {}}
+
+def save_export_state(path, state):
+    temporary = f"{path}.tmp"
+    with open(temporary, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(temporary, path)
+
+def export_sessions(store, out, parquet_dir=None, state_path=None, batch_size=DEFAULT_BATCH_SIZE, full=False):
+    """
+    Append the turns of every session updated since the last export to the
+    gzip NDJSON file `out` (and a new Parquet part file in `parquet_dir`).
+    Returns (sessions read, turns written).
+    """
+    state_path = state_path or f"{out}.state.json"
+    state = {"updated_after": 0.0, "turns": {}} if full else load_export_state(state_path)
+    directory = os.path.dirname(out)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    parquet = None
+    if parquet_dir:
+        parquet = ParquetWriter(os.path.join(parquet_dir, f"turns-{time.strftime('%Y%m%d-%H%M%S')}.parquet"))
+
+    sessions = written = 0
+    batch = []
+    newest = state["updated_after"]
+
+    def flush():
+        for row in batch:
+            ndjson.write(json.dumps(row, ensure_ascii=False) + "\n")
+        if parquet is not None:
+            parquet.write(batch)
+        batch.clear()
+
+    try:
+        with gzip.open(out, "wt" if full else "at", encoding="utf-8") as ndjson:
+            for session_id, updated in store.iter_sessions(state["updated_after"]):
+                stored = store.load(session_id)
+                if stored is None:
+                    continue
+                sessions += 1
+                newest = max(newest, updated)
+                turns = session_turns(session_id, stored)
+                new_turns = turns[state["turns"].get(session_id, 0):]
+                if not new_turns:
+                    continue
+                batch.extend(new_turns)
+                written += len(new_turns)
+                state["turns"][session_id] = len(turns)
+                if len(batch) >= batch_size:
+                    flush()
+            flush()
+    finally:
+        if parquet is not None:
+            parquet.close()
+
+    state["updated_after"] = newest
+    save_export_state(state_path, state)
+    return sessions, written
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--store", default=os.environ.get("SESSION_STORE_PATH", DEFAULT_STORE_PATH))
+    parser.add_argument("--out", default=os.path.join("exports", "turns.ndjson.gz"), help="gzip NDJSON output")
+    parser.add_argument("--parquet", help="directory for Parquet part files (requires pyarrow)")
+    parser.add_argument("--state", help="export state file (default: <out>.state.json)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="rows per write and Parquet row group")
+    parser.add_argument("--full", action="store_true", help="ignore the state file, overwrite and export everything")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    sessions, turns = export_sessions(
+        SQLiteSessionStore(args.store), args.out, args.parquet, args.state, args.batch_size, args.full
+    )
+    print(f"Exported {turns} turns from {sessions} updated sessions to {args.out}"
+          + (f" and {args.parquet}" if args.parquet and turns else "")
+          + f" in {time.perf_counter() - started:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+# guard.py
+"""
+Input and system prompt guard engine.
+Prompt injection patterns are compiled once into a multi-pattern matcher,
+the text is normalized once per check, and system prompt validation results
+are cached, so the guard is cheap enough to run over batch transcripts.
+Has no OpenAI or Streamlit dependency.
+"""
+
+import json
+import os
+import re
+from functools import lru_cache
+
+MAX_INPUT_LENGTH = 2000
+
+DEFAULT_INJECTION_PATTERNS = [
+    r"ignore\s+(previous|above|all)\s+instructions?",
+    r"disregard\s+(previous|above|all)",
+    r"you\s+are\s+now",
+    r"new\s+instructions?:",
+    r"system\s*:\s*",
+    r"</?\s*system\s*>",
+    r"<\|im_start\|>",
+    r"<\|im_end\|>",
+]
+
+DEFAULT_DANGEROUS_KEYWORDS = ["jailbreak", "DAN", "developer mode", "unrestricted"]
+
+# JSON file with extra "injection_patterns" and "dangerous_keywords" lists
+GUARD_CONFIG_ENV = "GUARD_CONFIG_PATH"
+
+_REGEX_SPECIAL = set(".^$*+?{}[]()|\\")
+_QUANTIFIERS = set("*?{")
+
+def _literal_prefix(pattern):
+    """
+    Literal text every match of `pattern` must start with ("" if unknown).
+    Used as a cheap substring prefilter before running the regex.
+    """
+    # A top-level alternation means no single prefix is required. Inside a
+    # character class everything up to the closing "]" is literal, including
+    # "(", ")" and "|"; a "]" right after "[" or "[^" does not close it.
+    depth = 0
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\":
+            i += 2
+            continue
+        if char == "[":
+            i += 1
+            if i < len(pattern) and pattern[i] == "^":
+                i += 1
+            if i < len(pattern) and pattern[i] == "]":
+                i += 1
+            while i < len(pattern) and pattern[i] != "]":
+                i += 2 if pattern[i] == "\\" else 1
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "|" and depth == 0:
+            return ""
+        i += 1
+    
+    prefix = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\" and i + 1 < len(pattern) and not pattern[i + 1].isalnum():
+            literal, i = pattern[i + 1], i + 2
+        elif char not in _REGEX_SPECIAL:
+            literal, i = char, i + 1
+        else:
+            break
+        # A quantified character is optional or repeated, so it ends the prefix
+        if i < len(pattern) and pattern[i] in _QUANTIFIERS:
+            break
+        prefix.append(literal)
+    return "".join(prefix)
+
+class _MultiPatternMatcher:
+    """
+    Matches many regexes against one normalized text. Each pattern is
+    compiled once and guarded by its literal prefix, so a pattern's regex
+    only runs when its prefix occurs in the text (a fast substring scan).
+    Python's re cannot use its literal-prefix search for a combined
+    alternation, which makes a single alternation slower than this.
+    """
+
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        self._entries = [(_literal_prefix(p), re.compile(p)) for p in self.patterns]
+
+    def search(self, text):
+        """Return the first pattern matching the (normalized) text, or None"""
+        for i, (prefix, regex) in enumerate(self._entries):
+            if prefix and prefix not in text:
+                continue
+            if regex.search(text):
+                return self.patterns[i]
+        return None
+
+def _keyword_pattern(keyword):
+    """
+    Whole-word pattern for one keyword: a word boundary only on the edges
+    that are word characters ("<|im_start|>" or "sudo:" have no boundary
+    on their punctuation side, so "\\b" there would never match)
+    """
+    keyword = keyword.lower()
+    start = r"\b" if re.match(r"\w", keyword) else ""
+    end = r"\b" if re.search(r"\w$", keyword) else ""
+    return start + re.escape(keyword) + end
+
+def _compile_keywords(keywords):
+    """Compile keywords into one whole-word alternation"""
+    patterns = sorted((_keyword_pattern(keyword) for keyword in keywords if keyword), key=len, reverse=True)
+    return re.compile("|".join(patterns)) if patterns else re.compile(r"(?!)")
+
+class Guard:
+    """
+    Compiled guard for candidate input and system prompts.
+
+    Args:
+        injection_patterns: Regexes (written for lowercase text) that mark
+            a prompt injection attempt
+        dangerous_keywords: Words that must not appear in a system prompt
+        max_length: Maximum accepted input length in characters
+    """
+
+    def __init__(self, injection_patterns=None, dangerous_keywords=None, max_length=MAX_INPUT_LENGTH):
+        self.injection_patterns = list(injection_patterns or DEFAULT_INJECTION_PATTERNS)
+        self.dangerous_keywords = list(dangerous_keywords or DEFAULT_DANGEROUS_KEYWORDS)
+        self.max_length = max_length
+        self._injection_matcher = _MultiPatternMatcher(self.injection_patterns)
+        self._keyword_re = _compile_keywords(self.dangerous_keywords)
+        self.validate_system_prompt = lru_cache(maxsize=1024)(self._validate_system_prompt)
+
+    def extend(self, injection_patterns=(), dangerous_keywords=()):
+        """Return a new Guard with additional patterns and keywords"""
+        return Guard(
+            self.injection_patterns + list(injection_patterns),
+            self.dangerous_keywords + list(dangerous_keywords),
+            self.max_length,
+        )
+
+    def find_injection(self, text):
+        """Return the injection pattern matched in text, or None"""
+        return self._injection_matcher.search(text.lower())
+
+    def check_input(self, prompt):
+        """
+        Local security checks that need no network round trip: empty input,
+        length limit and prompt injection patterns. Returns True if blocked.
+        """
+        if not prompt or not prompt.strip():
+            return True
+        if len(prompt) > self.max_length:
+            return True
+        return self._injection_matcher.search(prompt.lower()) is not None
+
+    def _validate_system_prompt(self, system_prompt):
+        """Validate that system prompt hasn't been tampered with"""
+        return self._keyword_re.search(system_prompt.lower()) is None
+
+def load_guard_config(path):
+    """Read extra guard patterns and keywords from a JSON file"""
+    with open(path, encoding="utf-8") as f:
+        config = json.load(f)
+    return {
+        "injection_patterns": config.get("injection_patterns", []),
+        "dangerous_keywords": config.get("dangerous_keywords", []),
+    }
+
+@lru_cache(maxsize=1)
+def get_default_guard():
+    """Guard with the default rules plus any configured in GUARD_CONFIG_PATH"""
+    guard = Guard()
+    path = os.environ.get(GUARD_CONFIG_ENV)
+    if path:
+        guard = guard.extend(**load_guard_config(path))
+    return guard
@@ -0,0 +1,176 @@
+# hedging.py
+"""
+Hedged requests.
+When a call has not responded within a high percentile of the recently
+observed latency for its model, a duplicate request is issued and the first
+one to respond wins. The loser is cancelled (streams are closed) or its
+result discarded, and the number of hedges is capped by a budget.
+"""
+
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass
+
+@dataclass
+class HedgePolicy:
+    """
+    Args:
+        percentile: Hedge once the call is slower than this percentile of
+            recent latencies for the model
+        budget_ratio: Maximum hedges as a fraction of all requests
+        min_samples: Latency observations required before hedging starts
+        min_delay: Never hedge earlier than this (seconds)
+    """
+    percentile: float = 95.0
+    budget_ratio: float = 0.05
+    min_samples: int = 20
+    min_delay: float = 0.2
+
+class LatencyTracker:
+    """Sliding window of observed latencies per (model, kind)"""
+
+    def __init__(self, window=200):
+        self.window = window
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, model, kind, seconds):
+        with self._lock:
+            if (model, kind) not in self._samples:
+                self._samples[(model, kind)] = deque(maxlen=self.window)
+            self._samples[(model, kind)].append(seconds)
+
+    def count(self, model, kind):
+        with self._lock:
+            return len(self._samples.get((model, kind), ()))
+
+    def percentile(self, model, kind, q):
+        """q-th percentile (nearest rank) of recent latencies, or None"""
+        with self._lock:
+            samples = sorted(self._samples.get((model, kind), ()))
+        if not samples:
+            return None
+        rank = max(0, min(len(samples) - 1, int(round(q / 100 * len(samples))) - 1))
+        return samples[rank]
+
+class HedgeBudget:
+    """Allows a hedge only while hedges stay below `ratio` of requests"""
+
+    def __init__(self):
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self._lock = threading.Lock()
+
+    def record_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def try_acquire(self, ratio):
+        with self._lock:
+            if self.hedges + 1 > ratio * self.requests:
+                return False
+            self.hedges += 1
+            return True
+
+    def record_win(self):
+        with self._lock:
+            self.hedge_wins += 1
+
+latency_tracker = LatencyTracker()
+hedge_budget = HedgeBudget()
+_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="hedge")
+
+def get_hedge_stats():
+    """Hedging counters and the current p50/p95 latency per model"""
+    with hedge_budget._lock:
+        stats = {
+            "requests": hedge_budget.requests,
+            "hedges": hedge_budget.hedges,
+            "hedge_wins": hedge_budget.hedge_wins,
+        }
+    with latency_tracker._lock:
+        keys = list(latency_tracker._samples)
+    stats["latency"] = {
+        f"{model}/{kind}": {
+            "p50": latency_tracker.percentile(model, kind, 50),
+            "p95": latency_tracker.percentile(model, kind, 95),
+        }
+        for model, kind in keys
+    }
+    return stats
+
+def hedge_delay(model, kind, policy):
+    """Seconds to wait before hedging, or None if hedging is not possible yet"""
+    if policy is None or latency_tracker.count(model, kind) < policy.min_samples:
+        return None
+    return max(policy.min_delay, latency_tracker.percentile(model, kind, policy.percentile))
+
+def run_hedged(attempt, model, kind, policy=None, cancel=None):
+    """
+    Run attempt() and hedge it with a duplicate if it is slow.
+
+    Args:
+        attempt: Callable performing one request; returns once the request
+            has produced its first token (streams) or finished
+        model: Model name, for the latency history
+        kind: Latency kind ("ttft" for streams, "total" otherwise)
+        policy: HedgePolicy, or None to only record latency
+        cancel: Called with the losing attempt's result to release it
+
+    Returns:
+        The result of the first attempt to respond successfully
+    """
+    start = time.perf_counter()
+    hedge_budget.record_request()
+    delay = hedge_delay(model, kind, policy)
+
+    if delay is None:
+        result = attempt()
+        latency_tracker.record(model, kind, time.perf_counter() - start)
+        return result
+
+    # Attempts run in worker threads but keep the caller's context variables
+    primary = _executor.submit(contextvars.copy_context().run, attempt)
+    done, _ = wait([primary], timeout=delay)
+    if done or not hedge_budget.try_acquire(policy.budget_ratio):
+        result = primary.result()
+        latency_tracker.record(model, kind, time.perf_counter() - start)
+        return result
+
+    hedge = _executor.submit(contextvars.copy_context().run, attempt)
+    pending = {primary, hedge}
+    error = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is not None:
+                error = future.exception()
+                continue
+            latency_tracker.record(model, kind, time.perf_counter() - start)
+            if future is hedge:
+                hedge_budget.record_win()
+            for loser in pending:
+                _discard(loser, cancel)
+            for other in done:
+                if other is not future and other.exception() is None:
+                    _discard(other, cancel)
+            return future.result()
+    raise error
+
+def _discard(future, cancel):
+    """Cancel a losing attempt, or release its result once it arrives"""
+    if future.cancel() or cancel is None:
+        return
+
+    def release(f):
+        if f.exception() is None:
+            try:
+                cancel(f.result())
+            except Exception as e:
+                print(f"Hedge cancel error: {e}")
+
+    future.add_done_callback(release)
@@ -5,6 +5,26 @@ Implements: Zero-shot, Few-shot, Chain-of-Thought, Persona-based, Role-specific,
 and Structured Output prompts.
 """
 
+from functools import lru_cache
+
+from examples import DEFAULT_K, get_example_store, format_examples
+from tokens import count_tokens
+
+# Interview options offered in the sidebar
+ROLES = [
+    "Frontend Developer",
+    "Backend Developer",
+    "Full Stack Developer",
+    "Data Scientist",
+    "Data Analyst",
+    "Product Manager",
+    "UX Designer",
+    "DevOps Engineer",
+    "ML Engineer"
+]
+LEVELS = ["Junior", "Mid", "Senior"]
+DOMAINS = ["General", "Tech/Startup", "Finance", "Healthcare", "E-commerce", "Enterprise", "Consulting"]
+
 def get_zero_shot_prompt(role, level, domain="General"):
     """
     Zero-shot prompting: Direct instruction without examples.
@@ -33,11 +53,24 @@ Experience Level: {level}
 
 Begin the interview naturally and professionally."""
 
-def get_few_shot_prompt(role, level, domain="General"):
+def get_few_shot_prompt(role, level, domain="General", include_examples=True):
     """
     Few-shot prompting: Provide examples to guide the model's behavior.
     Better for specific formatting or evaluation styles.
+    With include_examples=False the examples are left out so that
+    compile_system_prompt can place them after the shared sections.
     """
+    if not include_examples:
+        return f"""You are conducting mock interviews for {role} positions at {level} level in the {domain} domain.
+
+Using the interview examples below as your reference, conduct an interview for a {level} {role} position following the same format:
+1. Ask a relevant question
+2. Wait for the candidate's response
+3. Provide structured feedback, scoring each aspect as shown in the examples
+4. Offer specific improvement suggestions
+
+Your questions should test both technical knowledge and soft skills relevant to {domain}."""
+    
     examples = get_examples_for_role(role, level)
     
     return f"""You are conducting mock interviews for {role} positions at {level} level in the {domain} domain.
@@ -178,29 +211,29 @@ def get_structured_json_prompt(role, level, domain="General"):
 You MUST respond in valid JSON format with this exact structure:
 
 {{
-  "question": "Your interview question here",
   "evaluation": {{
     "technical_accuracy": {{
-      "score": 0-10,
+      "score": 1-10,
       "feedback": "Detailed technical feedback"
     }},
     "communication": {{
-      "score": 0-10,
+      "score": 1-10,
       "feedback": "Communication assessment"
     }},
     "problem_solving": {{
-      "score": 0-10,
+      "score": 1-10,
       "feedback": "Problem-solving evaluation"
     }},
     "completeness": {{
-      "score": 0-10,
+      "score": 1-10,
       "feedback": "Answer completeness"
     }}
   }},
-  "overall_score": 0-10,
+  "overall_score": 1-10,
   "strengths": ["strength1", "strength2"],
   "improvements": ["improvement1", "improvement2"],
   "recommendation": "Detailed feedback and next steps",
+  "question": "Your next interview question here",
   "next_question_hint": "Topic for next question"
 }}
 
@@ -209,8 +242,7 @@ Interview Context:
 - Level: {level} ({get_level_context(level)})
 - Domain: {domain}
 
-First interaction: Include a "question" field with an opening question.
-Subsequent: Evaluate the previous answer with the evaluation structure, then provide the next "question".
+Evaluate the candidate's latest answer with the evaluation structure, then provide the next "question".
 
 Ensure all JSON is valid and properly formatted."""
 
@@ -247,7 +279,7 @@ INTERVIEW METHODOLOGY (Chain-of-Thought):
    ✅ Strong Points: [2-3 specific things done well]
    ⚠️ Areas to Develop: [1-2 specific improvements]
    💡 Expert Tip: [Actionable advice]
-   🎯 Score: X/10 (with justification)
+   🎯 **Score: X/10** (with justification)
    ```
 
 4. PROGRESSION:
@@ -268,55 +300,15 @@ def get_level_context(level):
     }
     return contexts.get(level, "Professional level")
 
-def get_examples_for_role(role, level):
-    """Generate few-shot examples based on role"""
-    if "Developer" in role or "Engineer" in role:
-        return """
-Example 1:
-Q: "Explain the difference between let, const, and var in JavaScript."
-A: "Var is function-scoped and can be redeclared. Let and const are block-scoped. Const can't be reassigned after declaration."
-
-Feedback:
-✅ Technical Accuracy: 8/10 - Correct core differences
-✅ Clarity: 7/10 - Clear and concise
-⚠️ Depth: 6/10 - Missing hoisting behavior and temporal dead zone
-💡 Improvement: Add examples and discuss edge cases like hoisting
----
-
-Example 2:
-Q: "Describe a challenging bug you fixed recently."
-A: "I had a memory leak in our React app. I used Chrome DevTools to profile, found we weren't cleaning up event listeners, and fixed it by adding cleanup in useEffect."
-
-Feedback:
-✅ Problem-Solving: 9/10 - Systematic debugging approach
-✅ Technical Skills: 9/10 - Proper tools and solution
-✅ Communication: 8/10 - Clear STAR format
-💡 Great answer! Shows practical experience and good practices.
-"""
-    elif "Data" in role:
-        return """
-Example 1:
-Q: "What's the difference between supervised and unsupervised learning?"
-A: "Supervised learning uses labeled data to train models, like classification. Unsupervised finds patterns in unlabeled data, like clustering."
-
-Feedback:
-✅ Technical Accuracy: 8/10 - Correct definitions
-✅ Examples: 7/10 - Good basic examples
-⚠️ Depth: 6/10 - Could mention semi-supervised, reinforcement learning
-💡 Improvement: Discuss real-world use cases and algorithm examples
-"""
-    else:
-        return """
-Example 1:
-Q: "Tell me about a time you had to handle conflict in a team."
-A: "Our designer and developer disagreed on implementation. I facilitated a meeting where we discussed constraints and priorities, and we found a compromise that worked technically and met design goals."
-
-Feedback:
-✅ Leadership: 9/10 - Proactive facilitation
-✅ Communication: 8/10 - Clear situation and resolution
-✅ Problem-Solving: 8/10 - Found balanced solution
-💡 Excellent use of STAR method!
-"""
+@lru_cache(maxsize=256)
+def get_examples_for_role(role, level, question=None, k=DEFAULT_K):
+    """
+    Up to `k` few-shot examples retrieved from the example store: the ones
+    most relevant to the role, level and (if given) the question being
+    answered, within the store's token budget. Memoized per arguments.
+    """
+    store = get_example_store()
+    return "\n" + format_examples(store.select(role, level, question, k)) + "\n"
 
 def get_persona_style(level):
     """Customize persona behavior based on candidate level"""
@@ -345,10 +337,9 @@ Special considerations for Mid-level candidates:
 - Encourage stepping up to new challenges
 """
 
-def get_role_details(role, level, domain):
-    """Generate detailed role-specific requirements"""
-    role_map = {
-        "Frontend Developer": f"""
+# Role requirement templates, formatted on demand for the selected role only
+ROLE_DETAILS = {
+    "Frontend Developer": """
 Technical Focus Areas:
 - HTML/CSS/JavaScript fundamentals
 - Modern frameworks (React, Vue, Angular)
@@ -358,7 +349,7 @@ Technical Focus Areas:
 - Testing and debugging
 
 {level} Expectations:
-{get_level_context(level)}
+{level_context}
 
 Key Questions to Cover:
 - Component architecture and design patterns
@@ -367,7 +358,7 @@ Key Questions to Cover:
 - CSS methodologies and modern features
 - Build tools and development workflow
 """,
-        "Backend Developer": f"""
+    "Backend Developer": """
 Technical Focus Areas:
 - Server-side languages and frameworks
 - Database design and optimization
@@ -377,7 +368,7 @@ Technical Focus Areas:
 - Testing and deployment
 
 {level} Expectations:
-{get_level_context(level)}
+{level_context}
 
 Key Questions to Cover:
 - System architecture and design
@@ -386,7 +377,26 @@ Key Questions to Cover:
 - Microservices vs monolith
 - Caching strategies
 """,
-        "Data Scientist": f"""
+    "Full Stack Developer": """
+Technical Focus Areas:
+- Frontend frameworks
+- Server-side frameworks and APIs
+- Database design
+- Web security
+- Deployment and CI/CD
+- Testing and debugging
+
+{level} Expectations:
+{level_context}
+
+Key Questions to Cover:
+- Building a feature from UI to database
+- API design between client and server
+- Caching across layers
+- Performance on the client and the server
+- Framework trade-offs
+""",
+    "Data Scientist": """
 Technical Focus Areas:
 - Statistics and probability
 - Machine learning algorithms
@@ -396,7 +406,7 @@ Technical Focus Areas:
 - Data visualization
 
 {level} Expectations:
-{get_level_context(level)}
+{level_context}
 
 Key Questions to Cover:
 - ML algorithm selection and trade-offs
@@ -405,7 +415,45 @@ Key Questions to Cover:
 - Real-world deployment challenges
 - A/B testing and experimentation
 """,
-        "Product Manager": f"""
+    "Data Analyst": """
+Technical Focus Areas:
+- SQL querying and data modeling
+- BI tools (Tableau, Power BI)
+- Statistics and hypothesis testing
+- Data cleaning and validation
+- Data visualization
+- Business metrics and reporting
+
+{level} Expectations:
+{level_context}
+
+Key Questions to Cover:
+- Analytical SQL queries
+- Handling messy data
+- Choosing the right chart
+- Defining and tracking KPIs
+- Presenting insights to stakeholders
+""",
+    "ML Engineer": """
+Technical Focus Areas:
+- Machine learning and deep learning
+- Training pipelines
+- Model serving
+- Experiment tracking
+- Model monitoring
+- PyTorch/TensorFlow and MLOps tools
+
+{level} Expectations:
+{level_context}
+
+Key Questions to Cover:
+- Taking a model to production
+- Scaling training and inference
+- Model versioning and rollback
+- Detecting and handling drift
+- Accuracy versus cost and latency
+""",
+    "Product Manager": """
 Focus Areas:
 - Product strategy and vision
 - User research and data analysis
@@ -415,7 +463,7 @@ Focus Areas:
 - Metrics and KPIs
 
 {level} Expectations:
-{get_level_context(level)}
+{level_context}
 
 Key Questions to Cover:
 - Product prioritization frameworks
@@ -424,7 +472,7 @@ Key Questions to Cover:
 - Data-driven decision making
 - Product launch experience
 """,
-        "UX Designer": f"""
+    "UX Designer": """
 Focus Areas:
 - User research methodologies
 - Information architecture
@@ -434,7 +482,7 @@ Focus Areas:
 - Usability testing
 
 {level} Expectations:
-{get_level_context(level)}
+{level_context}
 
 Key Questions to Cover:
 - Design process and methodology
@@ -442,10 +490,29 @@ Key Questions to Cover:
 - Design tools and prototyping
 - Accessibility considerations
 - Collaboration with developers
+""",
+    "DevOps Engineer": """
+Technical Focus Areas:
+- Linux systems and networking
+- CI/CD pipelines and release automation
+- Docker and Kubernetes
+- Infrastructure as code
+- Monitoring and alerting
+- Cloud platforms
+
+{level} Expectations:
+{level_context}
+
+Key Questions to Cover:
+- Designing a deployment pipeline
+- Zero-downtime releases
+- Incident response
+- Service reliability
+- Security and secrets management
 """
-    }
-    
-    return role_map.get(role, f"""
+}
+
+DEFAULT_ROLE_DETAILS = """
 General Focus for {role}:
 - Core competencies for the role
 - Technical and soft skills
@@ -454,6 +521,195 @@ General Focus for {role}:
 - Industry knowledge
 
 {level} Expectations:
-{get_level_context(level)}
-""")
+{level_context}
+"""
+
+def get_role_details(role, level, domain):
+    """Generate detailed role-specific requirements"""
+    template = ROLE_DETAILS.get(role, DEFAULT_ROLE_DETAILS)
+    return template.format(role=role, level=level, level_context=get_level_context(level))
+
+# System prompt compilation
+
+TONE_INSTRUCTIONS = {
+    "Friendly": """
+TONE: Friendly and Supportive
+- Use warm, encouraging language
+- Celebrate good answers enthusiastically
+- Provide constructive criticism gently
+- Use phrases like "Great!", "Excellent point!", "I appreciate that..."
+- Be patient and understanding
+- Offer helpful hints when candidate struggles
+- Make the candidate feel comfortable and valued
+""",
+    "Strict": """
+TONE: Strict and Demanding
+- Be direct and to-the-point
+- Set high standards and expectations
+- Point out weaknesses clearly
+- Don't sugarcoat feedback
+- Use phrases like "That's insufficient", "You need to...", "Expected more..."
+- Challenge the candidate to think deeper
+- Be professional but demanding
+- Only praise truly excellent answers
+""",
+    "Professional": """
+TONE: Professional and Balanced
+- Maintain a neutral, business-like demeanor
+- Be objective and fair in assessments
+- Provide balanced feedback (positives and areas for improvement)
+- Use clear, professional language
+- Be respectful but not overly warm
+- Focus on facts and competencies
+- Standard phrases: "Your answer demonstrates...", "Consider improving..."
+""",
+}
+
+SCORING_INSTRUCTION = """
+SCORING REQUIREMENT:
+After each candidate answer, you MUST provide a numerical score from 1-10 for their response.
+Include this scoring in your feedback using this format:
+
+**Score: X/10**
+"""
+
+# Structured JSON carries its scores in the evaluation fields instead
+JSON_SCORING_INSTRUCTION = """
+SCORING REQUIREMENT:
+After each candidate answer, score every evaluation category and the overall_score from 1-10.
+"""
+
+SCORING_GUIDE = """
+Scoring Guide:
+- 1-3: Poor/Inadequate answer, major gaps
+- 4-5: Below average, missing key points
+- 6-7: Good, meets basic expectations
+- 8-9: Excellent, thorough and well-articulated
+- 10: Outstanding, exceeds all expectations
+"""
+
+SCORING_CRITERIA = """
+Base your score on:
+- Technical accuracy and depth (if applicable)
+- Clarity and structure of communication
+- Completeness of the answer
+- Relevance to the question
+- Examples and evidence provided
+"""
+
+# Styles whose technique body already lists the aspects to evaluate;
+# SCORING_CRITERIA would repeat them
+STYLES_WITH_CRITERIA = {"Zero-shot", "Chain-of-Thought", "Structured JSON", "Mixed Techniques"}
+
+# System prompt token budget per model; assemble_system_prompt trims
+# optional sections to stay within it
+SYSTEM_PROMPT_BUDGETS = {
+    "gpt-4o": 900,
+    "gpt-4o-mini": 1200,
+    "gpt-4-turbo": 900,
+    "gpt-4": 600,
+}
+DEFAULT_SYSTEM_PROMPT_BUDGET = 900
+
+EVALUATION_ONLY_INSTRUCTION = """
+QUESTION SELECTION:
+The interview system asks the next question itself from a vetted question bank.
+Evaluate the candidate's latest answer only. Do not ask, suggest or preview another
+question (in JSON responses, leave out "question" and "next_question_hint").
+"""
+
+PROMPT_BUILDERS = {
+    "Zero-shot": get_zero_shot_prompt,
+    "Few-shot": get_few_shot_prompt,
+    "Chain-of-Thought": get_chain_of_thought_prompt,
+    "Persona Interview": get_persona_prompt,
+    "Role-specific": get_role_specific_prompt,
+    "Structured JSON": get_structured_json_prompt,
+    "Mixed Techniques": get_mixed_techniques_prompt,
+}
+
+def get_tone_instructions(tone):
+    """Return tone-specific instructions for the AI"""
+    return TONE_INSTRUCTIONS.get(tone, TONE_INSTRUCTIONS["Professional"])
+
+def system_prompt_sections(role, level, domain, prompt_style, tone, evaluation_only=False, question=None):
+    """
+    The system prompt as (name, text) sections, ordered from most to least
+    shared: the scoring instruction, the scoring criteria (left out for
+    styles whose body lists its own), the tone block and the technique body
+    with the role, level and domain. Sessions that share a style family and
+    tone send a byte-identical prefix, and every turn of a session repeats
+    the whole prompt up to the examples, which lets the provider's automatic
+    prompt caching reuse it.
+    
+    With evaluation_only the model is told not to ask the next question
+    (it comes from the question bank), after the technique body.
+    
+    For Few-shot, `question` (the question being answered) picks the most
+    relevant examples from the example store; they change every turn, so
+    they go last, after the cacheable prefix. Other styles ignore it.
+    """
+    scoring = JSON_SCORING_INSTRUCTION if prompt_style == "Structured JSON" else SCORING_INSTRUCTION
+    sections = [("scoring", scoring.strip() + "\n\n" + SCORING_GUIDE.strip())]
+    if prompt_style not in STYLES_WITH_CRITERIA:
+        sections.append(("criteria", SCORING_CRITERIA.strip()))
+    sections.append(("tone", get_tone_instructions(tone).strip()))
+    
+    if prompt_style == "Few-shot":
+        sections.append(("technique", get_few_shot_prompt(role, level, domain, include_examples=False)))
+    else:
+        builder = PROMPT_BUILDERS.get(prompt_style, get_zero_shot_prompt)
+        sections.append(("technique", builder(role, level, domain)))
+    
+    if evaluation_only:
+        sections.append(("evaluation_only", EVALUATION_ONLY_INSTRUCTION.strip()))
+    
+    if prompt_style == "Few-shot":
+        sections.append(("examples", "INTERVIEW EXAMPLES:\n" + get_examples_for_role(role, level, question).strip()))
+    
+    return sections
 
+def join_sections(sections):
+    return "\n\n".join(text for _, text in sections)
+
+def fit_system_prompt(sections, model, role, level, question=None):
+    """
+    Trim sections to the model's SYSTEM_PROMPT_BUDGETS entry: first down to
+    one few-shot example, then without the scoring criteria. The scoring
+    format, tone and technique body are never cut; a prompt that is still
+    over budget is returned as is and reported.
+    """
+    budget = SYSTEM_PROMPT_BUDGETS.get(model, DEFAULT_SYSTEM_PROMPT_BUDGET)
+    if count_tokens(join_sections(sections), model) <= budget:
+        return sections
+    trims = [
+        ("examples", "INTERVIEW EXAMPLES:\n" + get_examples_for_role(role, level, question, k=1).strip()),
+        ("criteria", None),
+    ]
+    for name, replacement in trims:
+        sections = [
+            (section, replacement if section == name else text)
+            for section, text in sections
+            if not (section == name and replacement is None)
+        ]
+        if count_tokens(join_sections(sections), model) <= budget:
+            return sections
+    size = count_tokens(join_sections(sections), model)
+    if size > budget:
+        print(f"System prompt is {size} tokens, over the {budget}-token budget for {model}")
+    return sections
+
+@lru_cache(maxsize=256)
+def compile_system_prompt(role, level, domain, prompt_style, tone, evaluation_only=False, question=None, model=None):
+    """
+    Build the complete system prompt for an interview configuration from
+    system_prompt_sections. With a model, the prompt is trimmed to that
+    model's system prompt budget (see fit_system_prompt). Results are
+    memoized per configuration, so Streamlit reruns do not rebuild the
+    prompt; callers should pass question=None for styles other than
+    Few-shot to keep one cached prompt per setup.
+    """
+    sections = system_prompt_sections(role, level, domain, prompt_style, tone, evaluation_only, question)
+    if model:
+        sections = fit_system_prompt(sections, model, role, level, question)
+    return join_sections(sections)
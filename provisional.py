@@ -0,0 +1,261 @@
+# provisional.py
+"""
+Instant provisional scoring.
+Estimates the overall and per-category scores of an answer locally (CPU
+only, well under a millisecond) from simple features: length, structure,
+STAR markers, reasoning words, filler words and coverage of the role's focus
+areas from prompts.get_role_details. The estimate is shown while the model
+evaluates and is replaced by the model's score when it arrives.
+
+Each turn's (features, provisional, final) scores are appended to a JSON
+Lines log, from which the weights can be recalibrated offline:
+
+Usage:
+    python provisional.py calibrate [--log .cache/provisional_scores.jsonl] [--out weights.json]
+
+Point PROVISIONAL_WEIGHTS at the written file to use the calibrated weights.
+"""
+
+import argparse
+import json
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+
+from evaluation import EVALUATION_CATEGORIES
+from prompts import get_role_details
+
+DEFAULT_LOG_PATH = os.path.join(".cache", "provisional_scores.jsonl")
+
+FEATURE_NAMES = (
+    "length", "sentences", "sentence_length", "paragraphs", "list_items", "numbers",
+    "star", "focus_coverage", "reasoning", "filler", "bias",
+)
+OUTPUTS = ("overall",) + tuple(EVALUATION_CATEGORIES)
+
+# Rows follow OUTPUTS, columns FEATURE_NAMES; replaced by calibrated weights
+DEFAULT_WEIGHTS = np.array([
+    # len  sent  slen  para  list  num   star  focus reas  fill  bias
+    [3.2, 0.6, -0.8, 0.4, 0.4, 0.6, 1.2, 2.0, 1.0, -3.0, 1.5],  # overall
+    [1.8, 0.2, -0.4, 0.0, 0.2, 1.0, 0.4, 3.5, 0.8, -2.0, 1.5],  # technical_accuracy
+    [2.0, 1.2, -1.6, 1.0, 1.0, 0.2, 0.8, 0.6, 0.6, -4.0, 2.5],  # communication
+    [2.2, 0.4, -0.6, 0.2, 0.4, 0.6, 1.6, 1.2, 2.0, -2.0, 1.5],  # problem_solving
+    [4.0, 0.6, -0.4, 0.6, 0.6, 0.6, 1.2, 2.0, 0.6, -2.0, 0.8],  # completeness
+])
+
+_WORD = re.compile(r"[a-z][a-z0-9+#]*")
+_SENTENCE_END = re.compile(r"[.!?]+(?:\s|$)")
+_LIST_ITEM = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s+", re.MULTILINE)
+_NUMBER = re.compile(r"\b\d+(?:[.,]\d+)?\s?(?:%|ms|s|x|k|m|gb|mb|users|hours|days|weeks)?\b", re.IGNORECASE)
+_STAR_MARKERS = [
+    re.compile(pattern, re.IGNORECASE) for pattern in (
+        r"\b(?:when i|at my (?:last|previous)|in my (?:last|previous)|we had|there was|situation|context)\b",
+        r"\b(?:my (?:task|goal|role|job) was|i was (?:asked|responsible)|needed to|had to|objective)\b",
+        r"\b(?:i (?:built|led|designed|implemented|wrote|decided|proposed|set up|created|started|introduced|moved))\b",
+        r"\b(?:as a result|result(?:ed)?|outcome|reduced|increased|improved|saved|cut|grew|learned)\b",
+    )
+]
+_REASONING = re.compile(
+    r"\b(?:because|therefore|so that|trade-?offs?|however|instead|alternatively|depends on|the reason|which means)\b",
+    re.IGNORECASE
+)
+_FILLER = re.compile(r"\b(?:um+|uh+|like|maybe|i guess|i think|not sure|kind of|sort of|stuff|things)\b", re.IGNORECASE)
+
+_STOPWORDS = frozenset("""
+and the for with vs of to in on best practices modern core key questions cover focus areas
+expectations real world approaches their fundamentals general skills abilities industry
+""".split())
+
+def _stem(word):
+    return word[:-1] if len(word) > 4 and word.endswith("s") else word
+
+@lru_cache(maxsize=256)
+def focus_matrix(role, level, domain):
+    """
+    (vocabulary, matrix) for a role's focus areas: one row per bullet in
+    get_role_details, one column per content word, 1 where the area uses it.
+    """
+    details = get_role_details(role, level, domain)
+    areas = [line[2:] for line in (l.strip() for l in details.splitlines()) if line.startswith("- ")]
+    area_words = [
+        {_stem(w) for w in _WORD.findall(area.lower()) if len(w) > 2 and w not in _STOPWORDS}
+        for area in areas
+    ]
+    vocabulary = sorted(set().union(*area_words)) if area_words else []
+    index = {word: i for i, word in enumerate(vocabulary)}
+    matrix = np.zeros((len(area_words), len(vocabulary)), dtype=np.float32)
+    for row, words in enumerate(area_words):
+        matrix[row, [index[w] for w in words]] = 1.0
+    return tuple(vocabulary), matrix
+
+def extract_features(answer, role, level, domain="General"):
+    """Feature vector (FEATURE_NAMES order, roughly 0-1 each) for one answer"""
+    text = answer.strip()
+    lowered = text.lower()
+    words = _WORD.findall(lowered)
+    n_words = len(words)
+    sentences = max(1, len(_SENTENCE_END.findall(text))) if n_words else 0
+
+    vocabulary, matrix = focus_matrix(role, level, domain)
+    if len(vocabulary):
+        answer_words = {_stem(w) for w in words}
+        present = np.fromiter((w in answer_words for w in vocabulary), dtype=np.float32, count=len(vocabulary))
+        focus_coverage = float(np.mean(matrix @ present > 0)) if matrix.shape[0] else 0.0
+    else:
+        focus_coverage = 0.0
+
+    raw = np.array([
+        np.log1p(n_words) / np.log1p(300),
+        sentences / 12,
+        (n_words / sentences if sentences else 0) / 40,
+        (text.count("\n\n") + 1 if text else 0) / 5,
+        len(_LIST_ITEM.findall(text)) / 8,
+        len(_NUMBER.findall(text)) / 5,
+        sum(1 for marker in _STAR_MARKERS if marker.search(lowered)) / len(_STAR_MARKERS),
+        focus_coverage,
+        len(_REASONING.findall(lowered)) / 5,
+        (len(_FILLER.findall(lowered)) / n_words * 10) if n_words else 0,
+        1.0,
+    ])
+    return np.clip(raw, 0.0, 1.5)
+
+@dataclass
+class ProvisionalScore:
+    """Estimated scores for one answer (1-10, one decimal)"""
+    overall: float
+    categories: dict
+    features: list
+
+    def to_dict(self):
+        return {"overall": self.overall, **self.categories}
+
+class ProvisionalScorer:
+    """
+    Linear model over extract_features, one row of weights per output.
+
+    Args:
+        weights: Array of shape (len(OUTPUTS), len(FEATURE_NAMES))
+    """
+
+    def __init__(self, weights=DEFAULT_WEIGHTS):
+        self.weights = np.asarray(weights, dtype=float)
+
+    @classmethod
+    def load(cls, path):
+        """Scorer with weights written by calibrate()"""
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if tuple(data["feature_names"]) != FEATURE_NAMES or tuple(data["outputs"]) != OUTPUTS:
+            raise ValueError(f"{path} was calibrated for different features")
+        return cls(np.array(data["weights"]))
+
+    def predict(self, features):
+        """Scores for a feature matrix (n, features) -> (n, outputs), clipped to 1-10"""
+        return np.clip(np.atleast_2d(features) @ self.weights.T, 1.0, 10.0)
+
+    def score(self, answer, role, level, domain="General"):
+        features = extract_features(answer, role, level, domain)
+        values = np.round(self.predict(features)[0], 1)
+        return ProvisionalScore(
+            overall=float(values[0]),
+            categories={name: float(value) for name, value in zip(OUTPUTS[1:], values[1:])},
+            features=[round(float(f), 4) for f in features],
+        )
+
+@lru_cache(maxsize=1)
+def get_provisional_scorer():
+    """Scorer with the weights in PROVISIONAL_WEIGHTS, or the defaults"""
+    path = os.environ.get("PROVISIONAL_WEIGHTS")
+    if path:
+        try:
+            return ProvisionalScorer.load(path)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Provisional scorer weights not loaded: {e}")
+    return ProvisionalScorer()
+
+_log_lock = threading.Lock()
+
+def log_calibration_pair(provisional, final, role, level, model, path=None):
+    """
+    Append a (provisional, final) pair to the calibration log
+    (PROVISIONAL_SCORE_LOG, default .cache/provisional_scores.jsonl; set it
+    to an empty string to disable logging).
+    """
+    path = os.environ.get("PROVISIONAL_SCORE_LOG", DEFAULT_LOG_PATH) if path is None else path
+    if not path:
+        return
+    record = {
+        "ts": time.time(),
+        "role": role,
+        "level": level,
+        "model": model,
+        "features": provisional.features,
+        "provisional": provisional.to_dict(),
+        "final": final,
+    }
+    try:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with _log_lock, open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+    except OSError as e:
+        print(f"Provisional score log error: {e}")
+
+def calibrate(records, ridge=1.0, min_samples=20):
+    """
+    Fit new weights to logged pairs by ridge regression, per output. Outputs
+    with fewer than `min_samples` final scores keep the default weights.
+    Returns (weights, report) where report maps output to (samples, MAE
+    before, MAE after).
+    """
+    X = np.array([r["features"] for r in records], dtype=float).reshape(-1, len(FEATURE_NAMES))
+    weights = DEFAULT_WEIGHTS.copy()
+    report = {}
+    for i, name in enumerate(OUTPUTS):
+        y = np.array([
+            float(r["final"][name]) if isinstance(r["final"].get(name), (int, float)) else np.nan
+            for r in records
+        ])
+        mask = ~np.isnan(y)
+        if mask.sum() < min_samples:
+            report[name] = (int(mask.sum()), None, None)
+            continue
+        Xi, yi = X[mask], y[mask]
+        before = np.mean(np.abs(np.clip(Xi @ weights[i], 1, 10) - yi))
+        weights[i] = np.linalg.solve(Xi.T @ Xi + ridge * np.eye(Xi.shape[1]), Xi.T @ yi)
+        after = np.mean(np.abs(np.clip(Xi @ weights[i], 1, 10) - yi))
+        report[name] = (int(mask.sum()), float(before), float(after))
+    return weights, report
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    fit = commands.add_parser("calibrate", help="fit weights to the logged (provisional, final) pairs")
+    fit.add_argument("--log", default=os.environ.get("PROVISIONAL_SCORE_LOG") or DEFAULT_LOG_PATH)
+    fit.add_argument("--out", default="provisional_weights.json")
+    fit.add_argument("--ridge", type=float, default=1.0)
+    fit.add_argument("--min-samples", type=int, default=20)
+    args = parser.parse_args()
+
+    with open(args.log, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    records = [r for r in records if len(r.get("features", ())) == len(FEATURE_NAMES)]
+    weights, report = calibrate(records, args.ridge, args.min_samples)
+    print(f"{'output':<20} {'samples':>8} {'MAE before':>11} {'MAE after':>10}")
+    for name, (samples, before, after) in report.items():
+        if before is None:
+            print(f"{name:<20} {samples:>8} {'(kept defaults)':>22}")
+        else:
+            print(f"{name:<20} {samples:>8} {before:>11.2f} {after:>10.2f}")
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump({"feature_names": FEATURE_NAMES, "outputs": OUTPUTS, "weights": weights.tolist()}, f, indent=2)
+    print(f"Wrote {args.out}; set PROVISIONAL_WEIGHTS={args.out} to use it")
+
+if __name__ == "__main__":
+    main()
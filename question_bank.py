@@ -0,0 +1,265 @@
+# question_bank.py
+"""
+Pre-generated interview question bank.
+An offline job generates and vets questions for every (role, level, domain)
+combination and stores them in SQLite. During an interview the next
+question is drawn from the bank at random, never repeating within a
+session, so the model only has to evaluate the answer.
+
+Usage:
+    python question_bank.py build --per-cell 20 [--model gpt-4o] [--role "ML Engineer"]
+    python question_bank.py import questions.jsonl
+    python question_bank.py stats
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+from prompts import ROLES, LEVELS, DOMAINS, get_level_context
+from utils import call_openai, check_input, extract_json
+
+DEFAULT_BANK_PATH = os.path.join(".cache", "question_bank.sqlite3")
+
+# Domain used when a (role, level, domain) cell has no questions of its own
+FALLBACK_DOMAIN = "General"
+
+MIN_QUESTION_CHARS = 20
+MAX_QUESTION_CHARS = 400
+
+@dataclass(frozen=True)
+class BankQuestion:
+    """A vetted question; `id` is stable across rebuilds (hash of the text)"""
+    id: str
+    text: str
+    topic: str = ""
+
+def question_id(text):
+    normalized = re.sub(r"\W+", " ", text.lower()).strip()
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:16]
+
+class QuestionBank:
+    """
+    SQLite question bank. Questions per (role, level, domain) are loaded
+    once and kept in memory, so drawing a question needs no query.
+
+    Args:
+        path: Database file (created if missing)
+    """
+
+    def __init__(self, path=DEFAULT_BANK_PATH):
+        self.path = path
+        self._cells = {}
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS questions (
+                    id TEXT NOT NULL,
+                    role TEXT NOT NULL,
+                    level TEXT NOT NULL,
+                    domain TEXT NOT NULL,
+                    question TEXT NOT NULL,
+                    topic TEXT NOT NULL,
+                    created REAL NOT NULL,
+                    PRIMARY KEY (role, level, domain, id)
+                )
+            """)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def add(self, role, level, domain, questions):
+        """Store BankQuestions for a cell; returns how many were new"""
+        now = time.time()
+        with self._connect() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO questions (id, role, level, domain, question, topic, created) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(q.id, role, level, domain, q.text, q.topic, now) for q in questions]
+            )
+            added = conn.total_changes - before
+        with self._lock:
+            self._cells.pop((role, level, domain), None)
+        return added
+
+    def questions(self, role, level, domain):
+        """All questions for a cell (cached)"""
+        key = (role, level, domain)
+        with self._lock:
+            if key in self._cells:
+                return self._cells[key]
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, question, topic FROM questions WHERE role = ? AND level = ? AND domain = ? ORDER BY id",
+                key
+            ).fetchall()
+        questions = tuple(BankQuestion(*row) for row in rows)
+        with self._lock:
+            self._cells[key] = questions
+        return questions
+
+    def next_question(self, role, level, domain, asked=(), rng=random):
+        """
+        A random question for the cell (or its FALLBACK_DOMAIN cell) whose
+        ID is not in `asked`; None when the bank has nothing left to ask.
+        """
+        asked = set(asked)
+        for cell_domain in dict.fromkeys((domain, FALLBACK_DOMAIN)):
+            remaining = [q for q in self.questions(role, level, cell_domain) if q.id not in asked]
+            if remaining:
+                return rng.choice(remaining)
+        return None
+
+    def counts(self):
+        """{(role, level, domain): number of questions}"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT role, level, domain, COUNT(*) FROM questions GROUP BY role, level, domain"
+            ).fetchall()
+        return {(role, level, domain): count for role, level, domain, count in rows}
+
+    def __len__(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM questions").fetchone()[0]
+
+def vet_questions(candidates, existing=()):
+    """
+    Keep candidates that look like a single, safe interview question:
+    within the length limits, ending in "?", passing the input guard and
+    not duplicating each other or `existing` (BankQuestions).
+    Candidates are dicts with "question" and optional "topic".
+    """
+    seen = {q.id for q in existing}
+    vetted = []
+    for candidate in candidates:
+        if not isinstance(candidate, dict) or not isinstance(candidate.get("question"), str):
+            continue
+        text = " ".join(candidate["question"].split())
+        if not MIN_QUESTION_CHARS <= len(text) <= MAX_QUESTION_CHARS or not text.endswith("?"):
+            continue
+        if text.count("?") > 2 or check_input(text):
+            continue
+        question = BankQuestion(question_id(text), text, str(candidate.get("topic") or "")[:80])
+        if question.id in seen:
+            continue
+        seen.add(question.id)
+        vetted.append(question)
+    return vetted
+
+GENERATION_PROMPT = """You write questions for mock job interviews.
+Write {count} distinct interview questions for a {level} {role} ({level_context}) in the {domain} domain.
+Mix technical, problem-solving and behavioral questions appropriate for the level.
+Each question must be a single, self-contained question a human interviewer would ask, ending with "?".
+Do not repeat any of these existing questions:
+{existing}
+Reply in JSON: {{"questions": [{{"question": "...", "topic": "short topic label"}}]}}"""
+
+def generate_questions(role, level, domain, count, existing=(), model="gpt-4o-mini"):
+    """Ask the model for `count` new questions for a cell; returns vetted BankQuestions"""
+    completion = call_openai(
+        system_prompt=GENERATION_PROMPT.format(
+            count=count,
+            role=role,
+            level=level,
+            level_context=get_level_context(level),
+            domain=domain,
+            existing="\n".join(f"- {q.text}" for q in existing) or "(none)",
+        ),
+        messages=[{"role": "user", "content": f"Write {count} questions."}],
+        model=model,
+        temperature=0.9,
+        max_tokens=min(4000, 80 * count + 200),
+        response_format={"type": "json_object"},
+    )
+    data = extract_json(completion.content, expected_keys=("questions",)).data or {}
+    return vet_questions(data.get("questions") or [], existing)
+
+def build_bank(bank, per_cell, roles=ROLES, levels=LEVELS, domains=DOMAINS, model="gpt-4o-mini", rounds=3):
+    """
+    Fill every cell up to `per_cell` questions. Cells that are already full
+    are skipped, so an interrupted build can simply be rerun.
+    """
+    for role in roles:
+        for level in levels:
+            for domain in domains:
+                for _ in range(rounds):
+                    existing = bank.questions(role, level, domain)
+                    missing = per_cell - len(existing)
+                    if missing <= 0:
+                        break
+                    try:
+                        added = bank.add(role, level, domain,
+                                         generate_questions(role, level, domain, missing, existing, model)[:missing])
+                    except Exception as e:
+                        print(f"{level} {role} / {domain}: generation failed: {e}")
+                        break
+                    if not added:
+                        break
+                print(f"{level} {role} / {domain}: {len(bank.questions(role, level, domain))} questions")
+
+def import_questions(bank, path):
+    """
+    Add hand-written questions from a JSON Lines file with "role", "level",
+    "domain", "question" and optional "topic" per line; returns the number added.
+    """
+    cells = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                item = json.loads(line)
+                cells.setdefault((item["role"], item["level"], item["domain"]), []).append(item)
+    added = 0
+    for (role, level, domain), items in cells.items():
+        added += bank.add(role, level, domain, vet_questions(items, bank.questions(role, level, domain)))
+    return added
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--path", default=os.environ.get("QUESTION_BANK_PATH", DEFAULT_BANK_PATH))
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="generate questions for every (role, level, domain)")
+    build.add_argument("--per-cell", type=int, default=20)
+    build.add_argument("--model", default="gpt-4o-mini")
+    build.add_argument("--role", action="append", choices=ROLES, help="limit to these roles")
+    build.add_argument("--level", action="append", choices=LEVELS, help="limit to these levels")
+    build.add_argument("--domain", action="append", choices=DOMAINS, help="limit to these domains")
+    load = commands.add_parser("import", help="add questions from a JSON Lines file")
+    load.add_argument("file")
+    commands.add_parser("stats", help="questions per (role, level, domain)")
+    args = parser.parse_args()
+
+    bank = QuestionBank(args.path)
+    if args.command == "build":
+        build_bank(bank, args.per_cell, args.role or ROLES, args.level or LEVELS, args.domain or DOMAINS, args.model)
+    elif args.command == "import":
+        print(f"Added {import_questions(bank, args.file)} questions")
+    else:
+        counts = bank.counts()
+        for role in ROLES:
+            for level in LEVELS:
+                print(f"{level + ' ' + role:<28} " + " ".join(
+                    f"{domain}={counts.get((role, level, domain), 0)}" for domain in DOMAINS
+                ))
+        print(f"Total: {sum(counts.values())} questions in {len(counts)} of "
+              f"{len(ROLES) * len(LEVELS) * len(DOMAINS)} cells")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,382 @@
+# ratelimit.py
+"""
+Admission control for the organization's OpenAI quotas.
+Requests-per-minute and tokens-per-minute token buckets per model, shared
+by every session in the process and, through a SQLite backing file, by every
+worker process on the host. Callers queue in arrival order (per model and
+process) with a maximum wait; each request is charged its estimated tokens
+up front and reconciled against the usage the API reports.
+
+Limits come from the environment:
+    OPENAI_RPM / OPENAI_TPM     default limits for every model
+    OPENAI_RATE_LIMITS          per-model overrides as JSON, e.g.
+                                {"gpt-4o": {"rpm": 500, "tpm": 30000}}
+    RATE_LIMIT_MAX_WAIT         seconds a caller may queue (default 30)
+    RATE_LIMIT_DB               shared bucket file (default .cache/ratelimit.sqlite3)
+Without any limits configured the limiter admits everything immediately.
+"""
+
+import contextvars
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+from resilience import UpstreamUnavailableError
+
+DEFAULT_RATE_LIMIT_DB = os.path.join(".cache", "ratelimit.sqlite3")
+DEFAULT_MAX_WAIT = 30.0
+
+class RateLimitTimeout(UpstreamUnavailableError):
+    """Raised when a request could not be admitted within its maximum wait"""
+
+@dataclass
+class RateLimit:
+    """
+    Args:
+        rpm: Requests per minute (None = unlimited)
+        tpm: Tokens per minute, prompt plus max_tokens (None = unlimited)
+    """
+    rpm: float = None
+    tpm: float = None
+
+    @property
+    def unlimited(self):
+        return self.rpm is None and self.tpm is None
+
+class MemoryBucketBackend:
+    """Token buckets for a single process"""
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def try_acquire(self, model, limit, tokens):
+        """Take one request and `tokens`; returns 0 or the seconds to wait"""
+        with self._lock:
+            bucket = _refill(self._buckets.get(model), limit, time.time())
+            wait = _take(bucket, limit, tokens)
+            self._buckets[model] = bucket
+            return wait
+
+    def adjust(self, model, limit, tokens):
+        """Return `tokens` (negative to charge more) to the token bucket"""
+        with self._lock:
+            bucket = _refill(self._buckets.get(model), limit, time.time())
+            bucket[1] = min(limit.tpm or 0, bucket[1] + tokens)
+            self._buckets[model] = bucket
+
+class SQLiteBucketBackend:
+    """
+    Token buckets in a SQLite file, shared by all processes using it. Each
+    acquisition is one IMMEDIATE transaction.
+
+    Args:
+        path: Database file (created if missing)
+    """
+
+    def __init__(self, path=DEFAULT_RATE_LIMIT_DB):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._transaction() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS buckets (
+                    model TEXT PRIMARY KEY,
+                    requests REAL NOT NULL,
+                    tokens REAL NOT NULL,
+                    updated REAL NOT NULL
+                )
+            """)
+
+    @contextmanager
+    def _transaction(self):
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    def _update(self, model, limit, change):
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT requests, tokens, updated FROM buckets WHERE model = ?", (model,)
+            ).fetchone()
+            bucket = _refill(list(row) if row else None, limit, time.time())
+            result = change(bucket)
+            conn.execute(
+                "INSERT OR REPLACE INTO buckets (model, requests, tokens, updated) VALUES (?, ?, ?, ?)",
+                (model, *bucket)
+            )
+            return result
+
+    def try_acquire(self, model, limit, tokens):
+        return self._update(model, limit, lambda bucket: _take(bucket, limit, tokens))
+
+    def adjust(self, model, limit, tokens):
+        def change(bucket):
+            bucket[1] = min(limit.tpm or 0, bucket[1] + tokens)
+        self._update(model, limit, change)
+
+def _refill(bucket, limit, now):
+    """[requests, tokens, updated] topped up for the time elapsed (full if new)"""
+    rpm, tpm = limit.rpm or 0, limit.tpm or 0
+    if bucket is None:
+        return [rpm, tpm, now]
+    elapsed = max(0.0, now - bucket[2])
+    return [
+        min(rpm, bucket[0] + elapsed * rpm / 60),
+        min(tpm, bucket[1] + elapsed * tpm / 60),
+        now,
+    ]
+
+def _take(bucket, limit, tokens):
+    """
+    Deduct a request and its tokens if both buckets allow it; otherwise
+    return the seconds until they will. A request larger than the whole
+    token bucket is admitted once the bucket is full.
+    """
+    waits = []
+    if limit.rpm is not None and bucket[0] < 1:
+        waits.append((1 - bucket[0]) * 60 / limit.rpm)
+    needed = min(tokens, limit.tpm) if limit.tpm is not None else 0
+    if limit.tpm is not None and bucket[1] < needed:
+        waits.append((needed - bucket[1]) * 60 / limit.tpm)
+    if waits:
+        return max(waits)
+    if limit.rpm is not None:
+        bucket[0] -= 1
+    if limit.tpm is not None:
+        bucket[1] -= tokens
+    return 0
+
+class Reservation:
+    """
+    Tokens charged for one admitted request. reconcile() corrects the charge
+    to the actual usage once known; as a context manager, an exception
+    refunds the tokens (the request still counts against RPM).
+    """
+
+    def __init__(self, limiter, model, limit, tokens):
+        self.limiter = limiter
+        self.model = model
+        self.limit = limit
+        self.tokens = tokens
+        self.reconciled = False
+
+    def reconcile(self, actual_tokens):
+        """
+        Refund (or charge) the difference between the estimate and the actual
+        usage. None (usage unknown) keeps the estimate.
+        """
+        if self.reconciled or self.limit is None or self.limit.tpm is None:
+            return
+        self.reconciled = True
+        if actual_tokens is None:
+            return
+        difference = self.tokens - actual_tokens
+        if difference:
+            self.limiter.backend.adjust(self.model, self.limit, difference)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.reconcile(0)
+
+@dataclass
+class RateLimitStats:
+    """Process-wide counters"""
+    admitted: int = 0
+    queued: int = 0
+    timeouts: int = 0
+    wait_seconds: float = 0.0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def incr(self, name, amount=1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+# Called as listener(position, queue_length, model) while a caller waits
+_wait_listener = contextvars.ContextVar("rate_limit_wait_listener", default=None)
+
+@contextmanager
+def wait_listener(callback):
+    """Report queue positions of requests made in this context to `callback`"""
+    token = _wait_listener.set(callback)
+    try:
+        yield
+    finally:
+        _wait_listener.reset(token)
+
+_notice_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="rate-limit-wait")
+
+def call_with_queue_notices(func, notify):
+    """
+    Run func() in a worker thread and return its result, reporting the
+    queue positions of the requests it makes to notify(position,
+    queue_length, model) on the calling thread. For callers such as a
+    Streamlit script that can only update their page from their own thread,
+    while requests may wait in other threads (hedged attempts). Positions
+    reported after func() returned, e.g. by a losing hedged attempt, are
+    dropped.
+    """
+    notices = queue.SimpleQueue()
+    done = object()
+
+    def run():
+        try:
+            with wait_listener(lambda *notice: notices.put(notice)):
+                return func()
+        finally:
+            notices.put(done)
+
+    future = _notice_executor.submit(contextvars.copy_context().run, run)
+    while (notice := notices.get()) is not done:
+        try:
+            notify(*notice)
+        except Exception as e:
+            print(f"Rate limit listener error: {e}")
+    return future.result()
+
+class RateLimiter:
+    """
+    Fair (FIFO per model) admission in front of shared token buckets.
+
+    Args:
+        limits: {model: RateLimit}
+        default: RateLimit for models not in `limits`
+        backend: MemoryBucketBackend or SQLiteBucketBackend
+        max_wait: Default seconds a caller may queue before RateLimitTimeout
+        poll_interval: Longest sleep between bucket checks (other processes
+            may have returned tokens meanwhile)
+    """
+
+    def __init__(self, limits=None, default=None, backend=None, max_wait=DEFAULT_MAX_WAIT, poll_interval=0.25):
+        self.limits = limits or {}
+        self.default = default or RateLimit()
+        self.backend = backend or MemoryBucketBackend()
+        self.max_wait = max_wait
+        self.poll_interval = poll_interval
+        self.stats = RateLimitStats()
+        self._queues = {}
+        self._cond = threading.Condition()
+
+    def limit_for(self, model):
+        limit = self.limits.get(model, self.default)
+        return None if limit.unlimited else limit
+
+    def acquire(self, model, tokens, max_wait=None):
+        """
+        Wait for a turn and charge one request plus `tokens` for `model`.
+        Returns a Reservation; raises RateLimitTimeout after `max_wait`.
+        """
+        limit = self.limit_for(model)
+        if limit is None:
+            return Reservation(self, model, None, tokens)
+
+        ticket = object()
+        start = time.monotonic()
+        deadline = start + (self.max_wait if max_wait is None else max_wait)
+        listener = _wait_listener.get()
+        reported = None
+        with self._cond:
+            queue = self._queues.setdefault(model, deque())
+            queue.append(ticket)
+        try:
+            while True:
+                with self._cond:
+                    position = queue.index(ticket)
+                    wait = self.backend.try_acquire(model, limit, tokens) if position == 0 else self.poll_interval
+                    if wait == 0:
+                        queue.popleft()
+                        self._cond.notify_all()
+                        waited = time.monotonic() - start
+                        self.stats.incr("admitted")
+                        if reported is not None:
+                            self.stats.incr("queued")
+                            self.stats.incr("wait_seconds", waited)
+                        return Reservation(self, model, limit, tokens)
+                    queue_length = len(queue)
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.stats.incr("timeouts")
+                    raise RateLimitTimeout(f"Rate limit queue for {model} did not clear in time")
+                if listener is not None and reported != position:
+                    try:
+                        listener(position + 1, queue_length, model)
+                    except Exception as e:
+                        print(f"Rate limit listener error: {e}")
+                reported = position
+                with self._cond:
+                    self._cond.wait(min(wait, remaining, self.poll_interval))
+        finally:
+            with self._cond:
+                if ticket in queue:
+                    queue.remove(ticket)
+                    self._cond.notify_all()
+
+    @contextmanager
+    def admit(self, model, tokens, max_wait=None):
+        """acquire() as a context manager; the tokens are refunded on errors"""
+        with self.acquire(model, tokens, max_wait) as reservation:
+            yield reservation
+
+    def queue_lengths(self):
+        with self._cond:
+            return {model: len(queue) for model, queue in self._queues.items() if queue}
+
+def load_rate_limits(environ=os.environ):
+    """(per-model limits, default limit) from the environment"""
+    def number(value):
+        return float(value) if value not in (None, "") else None
+
+    default = RateLimit(rpm=number(environ.get("OPENAI_RPM")), tpm=number(environ.get("OPENAI_TPM")))
+    limits = {
+        model: RateLimit(rpm=number(values.get("rpm")), tpm=number(values.get("tpm")))
+        for model, values in json.loads(environ.get("OPENAI_RATE_LIMITS") or "{}").items()
+    }
+    return limits, default
+
+@lru_cache(maxsize=1)
+def get_rate_limiter():
+    """Process-wide limiter configured from the environment"""
+    limits, default = load_rate_limits()
+    if default.unlimited and all(limit.unlimited for limit in limits.values()):
+        return RateLimiter()
+    return RateLimiter(
+        limits,
+        default,
+        backend=SQLiteBucketBackend(os.environ.get("RATE_LIMIT_DB", DEFAULT_RATE_LIMIT_DB)),
+        max_wait=float(os.environ.get("RATE_LIMIT_MAX_WAIT", DEFAULT_MAX_WAIT)),
+    )
+
+def get_rate_limit_stats():
+    """Admission counters and current queue lengths"""
+    limiter = get_rate_limiter()
+    stats = limiter.stats
+    with stats._lock:
+        counters = {
+            "admitted": stats.admitted,
+            "queued": stats.queued,
+            "timeouts": stats.timeouts,
+            "wait_seconds": stats.wait_seconds,
+        }
+    counters["queues"] = limiter.queue_lengths()
+    return counters
@@ -0,0 +1,219 @@
+# resilience.py
+"""
+Retry, timeout and circuit-breaker policy for OpenAI calls.
+Retries rate limits, timeouts, connection errors and 5xx responses with
+jittered exponential backoff (honouring Retry-After), fails fast through a
+per-model circuit breaker while the upstream is unhealthy, and optionally
+falls back to other models.
+"""
+
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+
+import openai
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+class UpstreamUnavailableError(Exception):
+    """Raised when every attempt and fallback model failed or was rejected"""
+
+@dataclass
+class RetryPolicy:
+    """
+    Args:
+        timeout: Per-attempt request timeout in seconds
+        max_retries: Retries per model after the first attempt
+        base_delay: Backoff base in seconds (doubles every retry)
+        max_delay: Upper bound for a single backoff sleep
+        fallback_models: Models to try, in order, when the requested one fails
+    """
+    timeout: float = 30.0
+    max_retries: int = 2
+    base_delay: float = 0.5
+    max_delay: float = 8.0
+    fallback_models: tuple = ()
+
+    def backoff(self, attempt, retry_after=None):
+        """Full-jitter exponential backoff, never shorter than Retry-After"""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_delay))
+        return delay
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures and rejects calls
+    for `reset_timeout` seconds. It then lets a single trial call through
+    (half-open); a success closes it again, a failure re-opens it. A trial
+    that ends without an outcome (record_abandoned) re-opens it too, and a
+    trial that never reports back is replaced after `trial_timeout` seconds.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, trial_timeout=60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.trial_timeout = trial_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trial_started = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Whether a call may be attempted now"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            now = time.monotonic()
+            if ((self.state == self.OPEN and now - self.opened_at >= self.reset_timeout)
+                    or (self.state == self.HALF_OPEN and now - self.trial_started >= self.trial_timeout)):
+                self.state = self.HALF_OPEN
+                self.trial_started = now
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def record_abandoned(self):
+        """
+        A call ended without telling whether the model is healthy (a
+        non-retryable error, a rate limit timeout, an interrupted script);
+        a half-open trial re-opens the breaker so another trial can follow.
+        """
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+@dataclass
+class ResilienceStats:
+    """Process-wide counters"""
+    attempts: int = 0
+    retries: int = 0
+    failures: int = 0
+    fallbacks: int = 0
+    breaker_rejections: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def incr(self, name, amount=1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+stats = ResilienceStats()
+
+def get_breaker(model):
+    """Circuit breaker for a model (one per process)"""
+    with _breakers_lock:
+        if model not in _breakers:
+            _breakers[model] = CircuitBreaker()
+        return _breakers[model]
+
+def get_resilience_stats():
+    """Retry counters and the state of every model's circuit breaker"""
+    with stats._lock:
+        counters = {
+            "attempts": stats.attempts,
+            "retries": stats.retries,
+            "failures": stats.failures,
+            "fallbacks": stats.fallbacks,
+            "breaker_rejections": stats.breaker_rejections,
+        }
+    with _breakers_lock:
+        counters["breakers"] = {model: breaker.state for model, breaker in _breakers.items()}
+    return counters
+
+def is_retryable(error):
+    """Rate limits, timeouts, connection problems and 5xx responses"""
+    if isinstance(error, (openai.APITimeoutError, openai.APIConnectionError)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code in RETRYABLE_STATUS_CODES or error.status_code >= 500
+    return False
+
+def get_retry_after(error):
+    """Seconds requested by a Retry-After (or retry-after-ms) header, if any"""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        value = headers.get("retry-after")
+        if not value:
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def call_with_resilience(request, model, policy=None, sleep=time.sleep):
+    """
+    Run `request(model, timeout)` under the retry, circuit breaker and
+    fallback policy.
+
+    Args:
+        request: Callable taking (model, timeout) that performs one attempt
+        model: Requested model; fallbacks from the policy are tried after it
+        policy: RetryPolicy (defaults to RetryPolicy())
+
+    Returns:
+        (result of request, model that served it)
+    """
+    policy = policy or RetryPolicy()
+    last_error = None
+    models = [model] + [m for m in policy.fallback_models if m != model]
+
+    for index, candidate in enumerate(models):
+        breaker = get_breaker(candidate)
+        if not breaker.allow():
+            stats.incr("breaker_rejections")
+            last_error = last_error or UpstreamUnavailableError(f"circuit open for {candidate}")
+            continue
+        if index > 0:
+            stats.incr("fallbacks")
+
+        for attempt in range(policy.max_retries + 1):
+            stats.incr("attempts")
+            try:
+                result = request(candidate, policy.timeout)
+            except Exception as e:
+                if not is_retryable(e):
+                    breaker.record_abandoned()
+                    raise
+                stats.incr("failures")
+                breaker.record_failure()
+                last_error = e
+                if attempt == policy.max_retries or not breaker.allow():
+                    break
+                stats.incr("retries")
+                sleep(policy.backoff(attempt, get_retry_after(e)))
+                continue
+            except BaseException:
+                breaker.record_abandoned()
+                raise
+            breaker.record_success()
+            return result, candidate
+
+    raise UpstreamUnavailableError(f"OpenAI API error: {last_error}")
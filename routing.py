@@ -0,0 +1,117 @@
+# routing.py
+"""
+Content-aware model routing.
+Sends each turn to a cheap model (gpt-4o-mini) or a capable one (gpt-4o)
+depending on what has to be evaluated: the opening turn and short answers go
+to the cheap model; long or technical answers, reasoning-heavy prompt styles
+and turns following an evaluation the cheap model could not score go to the
+capable one. Every decision is logged with its reason, and the cost
+difference against the model picked in the sidebar is recorded.
+"""
+
+import re
+import threading
+from dataclasses import dataclass
+
+# Roles whose answers are judged on technical correctness
+TECHNICAL_ROLES = (
+    "Frontend Developer", "Backend Developer", "Full Stack Developer",
+    "Data Scientist", "DevOps Engineer", "ML Engineer",
+)
+
+# Prompt styles that ask for step-by-step or structured evaluation
+REASONING_STYLES = ("Chain-of-Thought", "Role-specific", "Structured JSON", "Mixed Techniques")
+
+# Code, complexity notation, numbers with units and common technical vocabulary
+_TECHNICAL_MARKERS = re.compile(
+    r"`|\bO\([^)]*\)|\b\d+(?:\.\d+)?\s?(?:ms|s|kb|mb|gb|tb|rps|qps|%)\b|"
+    r"\b(?:api|sql|nosql|database|index|cache|queue|thread|latency|throughput|"
+    r"shard\w*|replica\w*|kubernetes|docker|container|microservices?|algorithm|"
+    r"complexity|regression|gradient|model|pipeline|schema|async|concurrency|"
+    r"tcp|http|rest|graphql|load balancer|partition\w*)\b",
+    re.IGNORECASE
+)
+
+@dataclass
+class RoutingPolicy:
+    """
+    Args:
+        cheap_model: Model for simple turns
+        capable_model: Model for turns that need careful evaluation
+        short_words: Answers with fewer words are simple
+        long_chars: Answers at least this long are escalated
+        technical_markers: Technical terms that make an answer technical
+            (for technical roles)
+        reasoning_chars: Answers at least this long are escalated under a
+            reasoning-heavy prompt style
+    """
+    cheap_model: str = "gpt-4o-mini"
+    capable_model: str = "gpt-4o"
+    short_words: int = 30
+    long_chars: int = 1000
+    technical_markers: int = 4
+    reasoning_chars: int = 500
+
+@dataclass
+class RoutingDecision:
+    """Model chosen for a turn and why"""
+    model: str
+    reason: str
+    baseline_model: str
+
+def is_low_confidence(message):
+    """True if an interviewer message carries neither a score nor an evaluation"""
+    return message.get("response_score") is None and not message.get("scores")
+
+def route_turn(answer, config, messages, policy=None):
+    """
+    Pick the model for evaluating `answer`.
+
+    Args:
+        answer: The candidate's answer
+        config: session.InterviewConfig (role, prompt style and the
+            baseline model from the sidebar)
+        messages: Chat history before this answer
+        policy: RoutingPolicy (defaults apply if None)
+    """
+    policy = policy or RoutingPolicy()
+    text = answer.strip()
+    previous = messages[-1] if messages and messages[-1]["role"] == "assistant" else None
+
+    def decide(model, reason):
+        return RoutingDecision(model=model, reason=reason, baseline_model=config.model)
+
+    if len(messages) <= 1:
+        return decide(policy.cheap_model, "opening turn")
+    if len(text.split()) < policy.short_words:
+        return decide(policy.cheap_model, "short answer")
+    if previous is not None and is_low_confidence(previous):
+        return decide(policy.capable_model, "previous evaluation unscored")
+    if len(text) >= policy.long_chars:
+        return decide(policy.capable_model, "long answer")
+    if config.role in TECHNICAL_ROLES and len(_TECHNICAL_MARKERS.findall(text)) >= policy.technical_markers:
+        return decide(policy.capable_model, "technical answer")
+    if config.prompt_style in REASONING_STYLES and len(text) >= policy.reasoning_chars:
+        return decide(policy.capable_model, "reasoning prompt style")
+    return decide(policy.cheap_model, "simple answer")
+
+class RoutingStats:
+    """Process-wide routing decisions and cost difference against the baselines"""
+
+    def __init__(self):
+        self.decisions = {}
+        self.saved = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, decision, saved):
+        with self._lock:
+            key = f"{decision.model}/{decision.reason}"
+            self.decisions[key] = self.decisions.get(key, 0) + 1
+            self.saved += saved
+
+routing_stats = RoutingStats()
+
+def get_routing_stats():
+    """Turns per model and reason, and the total estimated saving in dollars"""
+    with routing_stats._lock:
+        return {"decisions": dict(routing_stats.decisions), "saved": routing_stats.saved}
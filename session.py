@@ -0,0 +1,684 @@
+# session.py
+"""
+Headless interview engine.
+InterviewSession holds the turn logic (prompt selection, history assembly,
+the OpenAI call, score extraction, JSON evaluation formatting and running
+statistics) behind an explicit state object, so it can run outside a
+Streamlit rerun: many sessions per process, batch jobs and benchmarks.
+app.py is a thin view over it.
+"""
+
+import asyncio
+import re
+import threading
+import uuid
+from dataclasses import asdict, dataclass, field, fields
+from datetime import datetime
+
+from prompts import compile_system_prompt
+from analytics import ScoreAnalytics
+from evaluation import IncrementalJSONParser, EVALUATION_KEYS, EVALUATION_ONLY_KEYS, evaluation_response_format
+from conversation import ConversationWindow, last_question
+from hedging import HedgePolicy
+from resilience import RetryPolicy
+from routing import route_turn, routing_stats
+from provisional import get_provisional_scorer, log_calibration_pair
+from store import RECORD_KINDS
+from utils import (
+    stream_openai,
+    summarize_conversation,
+    check_input,
+    start_moderation,
+    moderated_stream,
+    InputFlaggedError,
+    extract_json,
+    calculate_cost,
+)
+
+SCORE_PATTERN = re.compile(r'\*\*Score:\s*(\d+(?:\.\d+)?)\s*/\s*10\*\*')
+
+TONE_EMOJI = {"Friendly": "😊", "Professional": "💼", "Strict": "📋"}
+
+TONE_GREETINGS = {
+    "Friendly": "Welcome! I'm so excited to help you prepare! 😊",
+    "Professional": "Welcome to your interview preparation session.",
+    "Strict": "Welcome. Let's begin the interview. I expect focused, detailed answers."
+}
+
+# Structured JSON categories shown as badges, in display order
+CATEGORY_LABELS = [
+    ("technical_accuracy", "Technical"),
+    ("communication", "Communication"),
+    ("problem_solving", "Problem Solving"),
+    ("completeness", "Completeness"),
+]
+
+@dataclass
+class InterviewConfig:
+    """Interview setup and model parameters (the sidebar settings)"""
+    role: str
+    level: str
+    domain: str = "General"
+    prompt_style: str = "Zero-shot"
+    tone: str = "Professional"
+    model: str = "gpt-4o-mini"
+    temperature: float = 0.7
+    max_tokens: int = 800
+    top_p: float = 1.0
+    frequency_penalty: float = 0.0
+    presence_penalty: float = 0.0
+    history_turns: int = 6
+    force_cache: bool = False
+    request_timeout: float = 30.0
+    use_fallback: bool = True
+    use_hedging: bool = False
+    use_routing: bool = False
+    use_question_bank: bool = False
+
+    @property
+    def json_mode(self):
+        return self.prompt_style == "Structured JSON"
+
+    @property
+    def system_prompt(self):
+        """Compiled (memoized) system prompt for this configuration"""
+        return self.system_prompt_for(evaluation_only=False)
+
+    def system_prompt_for(self, evaluation_only, question=None, model=None):
+        """
+        System prompt within the budget for `model` (default: the configured
+        model); evaluation_only when the next question comes from the bank.
+        `question` (the one being answered) selects the Few-shot examples and
+        is dropped for other styles.
+        """
+        return compile_system_prompt(self.role, self.level, self.domain, self.prompt_style, self.tone,
+                                     evaluation_only, question if self.prompt_style == "Few-shot" else None,
+                                     model or self.model)
+
+    def retry_policy(self):
+        return RetryPolicy(
+            timeout=self.request_timeout,
+            fallback_models=("gpt-4o-mini",) if self.use_fallback else ()
+        )
+
+@dataclass
+class SessionState:
+    """Everything an interview session accumulates"""
+    messages: list = field(default_factory=list)
+    scores: list = field(default_factory=list)
+    response_scores: list = field(default_factory=list)
+    analytics: ScoreAnalytics = field(default_factory=ScoreAnalytics)
+    question_count: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    total_tokens: int = 0
+    session_cost: float = 0.0
+    usage_log: list = field(default_factory=list)
+    routing_savings: float = 0.0
+    asked_questions: list = field(default_factory=list)
+    context_summary: str = ""
+    summarized_count: int = 0
+    started_at: datetime = field(default_factory=datetime.now)
+
+    @property
+    def average_score(self):
+        """Mean overall score so far (0.0 before the first scored answer)"""
+        return self.analytics.mean or 0.0
+
+@dataclass
+class TurnResult:
+    """Outcome of one answered question"""
+    display_response: str
+    response_score: float = None
+    scores: dict = None
+    json_data: dict = None
+    json_strategy: str = None
+    completion: object = None
+    routing: object = None
+    bank_question: object = None
+    provisional: object = None
+
+    @property
+    def final_scores(self):
+        """The model's overall and category scores (None where missing)"""
+        overall = self.response_score
+        if overall is None and self.json_data:
+            overall = self.json_data.get("overall_score")
+        scores = {"overall": overall}
+        for category, _ in CATEGORY_LABELS:
+            details = (self.scores or {}).get(category)
+            scores[category] = details.get("score") if isinstance(details, dict) else None
+        return scores
+
+def clamp_score(value):
+    """A score clamped to 1-10; numeric strings are parsed, anything else is None"""
+    if isinstance(value, str):
+        try:
+            value = float(value.strip().removesuffix("/10"))
+        except ValueError:
+            return None
+    if not isinstance(value, (int, float)) or isinstance(value, bool) or value != value:
+        return None
+    return min(10.0, max(1.0, value)) if isinstance(value, float) else min(10, max(1, value))
+
+def clamp_evaluation_scores(json_data):
+    """Clamp overall_score and every category score of an evaluation in place"""
+    if "overall_score" in json_data:
+        json_data["overall_score"] = clamp_score(json_data["overall_score"])
+    evaluation = json_data.get("evaluation")
+    if isinstance(evaluation, dict):
+        for details in evaluation.values():
+            if isinstance(details, dict) and "score" in details:
+                details["score"] = clamp_score(details["score"])
+    return json_data
+
+def extract_score(ai_response):
+    """Read the `**Score: X/10**` marker, clamped to 1-10 (None if absent)"""
+    score_match = SCORE_PATTERN.search(ai_response)
+    if not score_match:
+        return None
+    return clamp_score(float(score_match.group(1)))
+
+def format_evaluation(json_data):
+    """Markdown rendering of a Structured JSON evaluation"""
+    scores_data = json_data.get("evaluation", {})
+    display_response = f"""
+**Evaluation:**
+
+📊 **Overall Score:** {json_data.get('overall_score') or 'N/A'}/10
+
+**Detailed Feedback:**
+"""
+    for category, details in scores_data.items():
+        if isinstance(details, dict):
+            score = details.get('score') or 'N/A'
+            feedback = details.get('feedback', '')
+            display_response += f"\n**{category.replace('_', ' ').title()}:** {score}/10\n{feedback}\n"
+
+    if json_data.get('strengths'):
+        display_response += f"\n**✅ Strengths:**\n"
+        for strength in json_data['strengths']:
+            display_response += f"- {strength}\n"
+
+    if json_data.get('improvements'):
+        display_response += f"\n**💡 Areas for Improvement:**\n"
+        for improvement in json_data['improvements']:
+            display_response += f"- {improvement}\n"
+
+    if json_data.get('recommendation'):
+        display_response += f"\n**Recommendation:**\n{json_data['recommendation']}\n"
+
+    if json_data.get('question'):
+        display_response += f"\n**Next Question:**\n{json_data['question']}"
+
+    return display_response
+
+def parse_response(ai_response, json_mode, json_data=None, expected_keys=EVALUATION_KEYS):
+    """
+    Turn the raw model output into a TurnResult. In JSON mode, json_data is
+    the already-parsed evaluation if available; otherwise the object with
+    the expected keys is extracted from the text.
+    """
+    result = TurnResult(display_response=ai_response, response_score=extract_score(ai_response))
+    if json_mode:
+        if json_data is not None:
+            result.json_strategy = "stream"
+        else:
+            extraction = extract_json(ai_response, expected_keys)
+            json_data = extraction.data
+            result.json_strategy = extraction.strategy
+            if json_data is None:
+                print("Evaluation JSON not found in response; scores for this turn are unavailable")
+            elif extraction.missing_keys:
+                print(f"Evaluation JSON is missing keys: {', '.join(extraction.missing_keys)}")
+        if json_data:
+            # json_object models (no strict schema) may score outside 1-10
+            result.json_data = clamp_evaluation_scores(json_data)
+            result.scores = json_data.get("evaluation", {})
+            result.display_response = format_evaluation(json_data)
+    return result
+
+def ask_bank_question(result, question):
+    """Add a question bank question as the next question of a TurnResult"""
+    result.bank_question = question
+    if result.json_data is not None:
+        result.json_data["question"] = question.text
+        result.display_response = format_evaluation(result.json_data)
+    else:
+        result.display_response = f"{result.display_response}\n\n**Next Question:**\n{question.text}"
+
+def score_badge(label, score):
+    """HTML for a coloured score badge"""
+    try:
+        value = float(score)
+    except (TypeError, ValueError):
+        value = 0
+    score_class = "score-high" if value >= 7 else "score-medium" if value >= 5 else "score-low"
+    return f'<div class="score-badge {score_class}">{label}: {score}/10</div>'
+
+def message_badges(message):
+    """
+    Badge HTML for a stored message (response score and JSON category
+    scores). Computed once and kept on the message as "badges_html", so
+    re-rendering the history does not rebuild it.
+    """
+    if "badges_html" not in message:
+        html = ""
+        if message.get("response_score") is not None:
+            html += f'<div>{score_badge("Response Score", message["response_score"])}</div>'
+        if message.get("scores"):
+            scores = message["scores"]
+            badges = []
+            for key, label in CATEGORY_LABELS:
+                details = scores.get(key)
+                badges.append(score_badge(label, details.get("score") or 0 if isinstance(details, dict) else 0))
+            html += f'<div>{"".join(badges)}</div>'
+        message["badges_html"] = html
+    return message["badges_html"]
+
+def provisional_badges(provisional):
+    """HTML for a provisional (locally estimated) score and category hints"""
+    badges = "".join(
+        score_badge(label, provisional.categories[key]) for key, label in CATEGORY_LABELS
+    )
+    return (
+        f'<div>{score_badge("Estimated Score", provisional.overall)}</div>'
+        f'<div style="opacity: 0.7">{badges}</div>'
+    )
+
+def welcome_message(config):
+    """Opening message with the session configuration and first question"""
+    return f"""{TONE_GREETINGS[config.tone]}
+
+**Session Configuration:**
+- Role: {config.level} {config.role}
+- Domain: {config.domain}
+- Technique: {config.prompt_style}
+- Interviewer Tone: {TONE_EMOJI[config.tone]} {config.tone}
+
+{"💡 Remember: I'll be scoring each of your responses from 1-10 based on quality, depth, and relevance." if config.tone != "Strict" else "⚠️ Note: Each response will be scored from 1-10. I maintain high standards."}
+
+Let's begin with our first question:
+
+**Tell me about yourself and why you're interested in this {config.role} position.**"""
+
+class TurnStream:
+    """
+    Iterable over the response text of one turn as it streams in.
+    Once exhausted, `result` holds the TurnResult and the session state
+    has been updated. In JSON mode the evaluation is parsed incrementally
+    as it arrives (see evaluation_updates). A question from the question
+    bank is added to the result as the next question.
+    """
+
+    def __init__(self, session, answer, completion_stream, moderation, routing=None, question=None,
+                 provisional=None):
+        self.session = session
+        self.answer = answer
+        self.completion_stream = completion_stream
+        self.moderation = moderation
+        self.routing = routing
+        self.question = question
+        self.provisional = provisional
+        self.expected_keys = EVALUATION_ONLY_KEYS if question is not None else EVALUATION_KEYS
+        self.parser = IncrementalJSONParser() if session.config.json_mode else None
+        self.result = None
+        self._updated = False
+
+    def __iter__(self):
+        for chunk in moderated_stream(self.completion_stream, self.moderation):
+            if self.parser is not None:
+                self._feed(chunk)
+            yield chunk
+        completion = self.completion_stream.result
+        json_data = None
+        if self.parser is not None and self.parser.done and all(key in self.parser.value for key in self.expected_keys):
+            json_data = self.parser.value
+        self.result = parse_response(completion.content, self.session.config.json_mode, json_data, self.expected_keys)
+        self.result.completion = completion
+        self.result.routing = self.routing
+        self.result.provisional = self.provisional
+        if self.question is not None:
+            ask_bank_question(self.result, self.question)
+        self.session._record_turn(self.answer, self.result)
+
+    def evaluation_updates(self):
+        """
+        Consume the turn, yielding the formatted evaluation so far each time
+        a field of the JSON response completes (JSON mode only).
+        """
+        for _ in self:
+            if self._updated and self.parser is not None:
+                self._updated = False
+                yield format_evaluation(self.parser.value)
+
+    def _feed(self, chunk):
+        try:
+            if self.parser.feed(chunk):
+                self._updated = True
+        except ValueError:
+            # Not JSON after all; the full text is parsed once complete
+            self.parser = None
+
+class InterviewSession:
+    """
+    One candidate's interview.
+
+    Args:
+        config: InterviewConfig; may be replaced between turns
+        state: SessionState to resume (a new one by default)
+        cache: Optional cache.CompletionCache shared between sessions
+        store: Optional store.SessionStore; every turn is appended to it
+        session_id: ID in the store (a new random one by default)
+        question_bank: Optional question_bank.QuestionBank, used when
+            config.use_question_bank is set
+    """
+
+    def __init__(self, config, state=None, cache=None, store=None, session_id=None, question_bank=None):
+        self.config = config
+        self.state = state or SessionState()
+        self.cache = cache
+        self.store = store
+        self.question_bank = question_bank
+        self.session_id = session_id or uuid.uuid4().hex
+        # Number of records of each kind already in the store
+        self._saved = {kind: 0 for kind in RECORD_KINDS}
+        # Guards the statistics and saves against the background summary
+        self._lock = threading.RLock()
+        # Held while the conversation summary is being updated
+        self._fold_lock = threading.Lock()
+        self._fold_thread = None
+
+    @classmethod
+    def resume(cls, session_id, store, cache=None, question_bank=None):
+        """Load a stored session by ID; returns None if the store does not know it"""
+        stored = store.load(session_id)
+        if stored is None:
+            return None
+        config_fields = {f.name for f in fields(InterviewConfig)}
+        config = InterviewConfig(**{k: v for k, v in stored["config"].items() if k in config_fields})
+        state_fields = {f.name for f in fields(SessionState)} - set(RECORD_KINDS)
+        values = {k: v for k, v in stored["fields"].items() if k in state_fields}
+        if "started_at" in values:
+            values["started_at"] = datetime.fromisoformat(values["started_at"])
+        if "latency" in values.get("analytics", {}):
+            values["analytics"] = ScoreAnalytics.from_dict(values["analytics"])
+        else:
+            # Stored before the analytics (or their latency) were kept
+            values["analytics"] = ScoreAnalytics.from_records(
+                stored["response_scores"], stored["scores"], stored["usage_log"]
+            )
+        state = SessionState(**values, **{kind: stored[kind] for kind in RECORD_KINDS})
+        session = cls(config, state, cache=cache, store=store, session_id=session_id, question_bank=question_bank)
+        session._saved = {kind: len(stored[kind]) for kind in RECORD_KINDS}
+        return session
+
+    def save(self):
+        """Append everything recorded since the last save to the store"""
+        if self.store is None:
+            return
+        with self._lock:
+            self._save()
+
+    def _save(self):
+        records = {}
+        for kind in RECORD_KINDS:
+            items = getattr(self.state, kind)
+            if len(items) > self._saved[kind]:
+                records[kind] = (self._saved[kind], items[self._saved[kind]:])
+        values = {
+            f.name: getattr(self.state, f.name)
+            for f in fields(SessionState) if f.name not in RECORD_KINDS
+        }
+        values["started_at"] = self.state.started_at.isoformat()
+        values["analytics"] = self.state.analytics.to_dict()
+        try:
+            self.store.append(self.session_id, asdict(self.config), values, records)
+        except Exception as e:
+            print(f"Session store error: {e}")
+            return
+        # Only what was written: records appended meanwhile go with the next save
+        for kind, (start, items) in records.items():
+            self._saved[kind] = start + len(items)
+
+    def start(self):
+        """Add the welcome message if the interview has not started yet"""
+        if not self.state.messages:
+            self.state.messages.append({
+                "role": "assistant",
+                "content": welcome_message(self.config),
+                "response_score": None
+            })
+            self.save()
+        return self.state.messages[-1]
+
+    def stream_answer(self, answer):
+        """
+        Submit an answer and stream the interviewer's reply.
+
+        The local guard runs first; the Moderation API then runs concurrently
+        with the completion. Raises InputFlaggedError if the answer is
+        rejected. The returned TurnStream's `provisional` holds a local
+        score estimate to show until the model's evaluation arrives. With
+        routing enabled the model is chosen per turn by
+        routing.route_turn. With the question bank enabled the next question
+        is drawn from the bank and the model only evaluates the answer.
+        Few-shot examples are retrieved for the question being answered. The
+        session state only changes once the turn completes.
+        """
+        if check_input(answer):
+            raise InputFlaggedError("Input rejected by the input guard")
+        moderation = start_moderation(answer)
+        self.start()
+
+        config = self.config
+        provisional = get_provisional_scorer().score(answer, config.role, config.level, config.domain)
+        routing = route_turn(answer, config, self.state.messages) if config.use_routing else None
+        model = routing.model if routing else config.model
+        question = self._next_bank_question() if config.use_question_bank else None
+        system_prompt = config.system_prompt_for(evaluation_only=question is not None,
+                                                 question=last_question(self.state.messages), model=model)
+        history = self.state.messages + [{"role": "user", "content": answer}]
+        api_messages = self._build_api_messages(history, system_prompt, model)
+
+        completion_stream = stream_openai(
+            system_prompt=system_prompt,
+            messages=api_messages,
+            model=model,
+            temperature=config.temperature,
+            max_tokens=config.max_tokens,
+            top_p=config.top_p,
+            frequency_penalty=config.frequency_penalty,
+            presence_penalty=config.presence_penalty,
+            response_format=evaluation_response_format(model, question is not None) if config.json_mode else None,
+            cache=self.cache,
+            force_cache=config.force_cache,
+            policy=config.retry_policy(),
+            hedge=HedgePolicy() if config.use_hedging else None
+        )
+        return TurnStream(self, answer, completion_stream, moderation, routing, question, provisional)
+
+    def submit_answer(self, answer):
+        """Submit an answer and return the TurnResult once complete"""
+        turn = self.stream_answer(answer)
+        for _ in turn:
+            pass
+        return turn.result
+
+    async def asubmit_answer(self, answer):
+        """Async submit_answer; the blocking call runs in a worker thread"""
+        return await asyncio.to_thread(self.submit_answer, answer)
+
+    def record_usage(self, completion, routing=None, question_num=None, summary=False):
+        """
+        Add a CompletionResult's token usage and cost to the statistics. For
+        a routed turn, the cost difference against the baseline model (the
+        same tokens priced at that model) is recorded and logged.
+
+        The entry is stamped with `question_num`, the turn the call was made
+        for; by default the turn in flight (question_count + 1). History
+        summaries are marked with `summary`.
+        """
+        with self._lock:
+            state = self.state
+            usage = completion.to_dict()
+            usage["question_num"] = state.question_count + 1 if question_num is None else question_num
+            if summary:
+                usage["summary"] = True
+            else:
+                state.analytics.add_latency(usage["latency"])
+            if routing is not None:
+                baseline_cost = calculate_cost(
+                    routing.baseline_model, completion.prompt_tokens, completion.completion_tokens
+                )["total_cost"]
+                saved = baseline_cost - usage["cost"]
+                usage["routing"] = {"reason": routing.reason, "baseline_model": routing.baseline_model, "saved": saved}
+                state.routing_savings += saved
+                routing_stats.record(routing, saved)
+                print(f"Routed question {usage['question_num']} to {completion.model} ({routing.reason}); "
+                      f"saved ${saved:.5f} against {routing.baseline_model}")
+            state.usage_log.append(usage)
+            state.prompt_tokens += completion.prompt_tokens
+            state.completion_tokens += completion.completion_tokens
+            state.total_tokens += completion.total_tokens
+            state.session_cost += usage["cost"]
+
+    def export(self):
+        """Session transcript, scores and usage as a JSON-serializable dict"""
+        config = self.config
+        state = self.state
+        return {
+            "role": config.role,
+            "level": config.level,
+            "domain": config.domain,
+            "tone": config.tone,
+            "prompt_style": config.prompt_style,
+            "messages": [
+                {k: v for k, v in message.items() if k != "badges_html"}
+                for message in state.messages
+            ],
+            "scores": state.scores,
+            "response_scores": state.response_scores,
+            "average_score": state.average_score,
+            "analytics": state.analytics.summary(),
+            "session_duration": str(datetime.now() - state.started_at),
+            "prompt_tokens": state.prompt_tokens,
+            "completion_tokens": state.completion_tokens,
+            "total_tokens": state.total_tokens,
+            "usage": state.usage_log,
+            "total_cost": state.session_cost
+        }
+
+    def _summarize(self, previous_summary, messages):
+        """Summarizer for the conversation window that also records its usage"""
+        completion = summarize_conversation(previous_summary, messages, cache=self.cache)
+        self.record_usage(completion, summary=True)
+        return completion.content
+
+    def _next_bank_question(self):
+        """An unasked question bank question for this configuration, or None"""
+        if self.question_bank is None:
+            return None
+        config = self.config
+        return self.question_bank.next_question(config.role, config.level, config.domain, self.state.asked_questions)
+
+    def _window(self):
+        """ConversationWindow over the summary kept in the state"""
+        return ConversationWindow(
+            self._summarize,
+            keep_turns=self.config.history_turns,
+            summary=self.state.context_summary,
+            summarized_count=self.state.summarized_count
+        )
+
+    def _keep_summary(self, window):
+        with self._lock:
+            self.state.context_summary = window.summary
+            self.state.summarized_count = window.summarized_count
+
+    def _build_api_messages(self, history, system_prompt, model):
+        """
+        Token-budgeted messages for `model`; keeps the summary in the state.
+        While a background summary is still running the history is sent
+        with the previous summary rather than waiting for it.
+        """
+        if not self._fold_lock.acquire(blocking=False):
+            return self._window().build(history, system_prompt, model, enforce_budget=False)
+        try:
+            window = self._window()
+            api_messages = window.build(history, system_prompt, model)
+            self._keep_summary(window)
+        finally:
+            self._fold_lock.release()
+        return api_messages
+
+    def _fold_in_background(self):
+        """
+        Fold turns that fell out of the verbatim window into the summary in
+        a worker thread, so the next turn's request does not wait for the
+        summarizer.
+        """
+        if not self._window().needs_fold(self.state.messages):
+            return
+        if self._fold_thread is not None and self._fold_thread.is_alive():
+            return
+        messages = list(self.state.messages)
+
+        def fold():
+            with self._fold_lock:
+                window = self._window()
+                if window.fold(messages):
+                    self._keep_summary(window)
+                    self.save()
+
+        self._fold_thread = threading.Thread(target=fold, name=f"summary-{self.session_id[:8]}", daemon=True)
+        self._fold_thread.start()
+
+    def wait_for_summary(self, timeout=None):
+        """Wait for a background summary to finish (batch jobs and tests)"""
+        if self._fold_thread is not None:
+            self._fold_thread.join(timeout)
+
+    def _record_turn(self, answer, result):
+        """Append the answered turn to the state and update the statistics"""
+        state = self.state
+        question_num = state.question_count + 1
+
+        # A background summary may save the session meanwhile
+        with self._lock:
+            if result.json_data:
+                state.scores.append({
+                    "question_num": question_num,
+                    "overall": result.json_data.get('overall_score', 0),
+                    "details": result.scores
+                })
+
+            if result.response_score is not None:
+                state.response_scores.append({
+                    "question_num": question_num,
+                    "overall": result.response_score
+                })
+            state.analytics.update(question_num, result.final_scores)
+
+            state.messages.append({"role": "user", "content": answer})
+            message = {
+                "role": "assistant",
+                "content": result.display_response,
+                "scores": result.scores,
+                "response_score": result.response_score
+            }
+            message_badges(message)
+            state.messages.append(message)
+            state.question_count = question_num
+            if result.bank_question is not None:
+                state.asked_questions.append(result.bank_question.id)
+
+            if result.completion is not None:
+                self.record_usage(result.completion, result.routing, question_num)
+        if result.provisional is not None and result.final_scores["overall"] is not None:
+            log_calibration_pair(
+                result.provisional, result.final_scores, self.config.role, self.config.level,
+                result.completion.model if result.completion is not None else self.config.model
+            )
+        self.save()
+        self._fold_in_background()
@@ -0,0 +1,173 @@
+# singleflight.py
+"""
+Single-flight coalescing of identical in-flight API calls.
+Concurrent callers issuing the same request (same request hash) share one
+upstream call: the first caller runs it and the others wait for its result.
+Streams are shared the same way, each subscriber replaying the chunks
+received so far and then following the live stream. Nothing is kept once
+the call completes, so this is not a cache.
+"""
+
+import threading
+from concurrent.futures import Future
+
+class _Abandoned(Exception):
+    """The leading call was interrupted (not failed); followers run their own"""
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key.
+
+    Args:
+        name: Label for the statistics
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.coalesced = 0
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, func):
+        """
+        Run func(), or wait for the identical call already in flight.
+        Returns (result, shared) where shared is True for callers that
+        received another caller's result. Exceptions raised by func() are
+        raised to every caller sharing the call.
+        """
+        while True:
+            with self._lock:
+                self.calls += 1
+                future = self._flights.get(key)
+                leader = future is None
+                if leader:
+                    future = self._flights[key] = Future()
+                else:
+                    self.coalesced += 1
+
+            if not leader:
+                try:
+                    return future.result(), True
+                except _Abandoned:
+                    continue
+
+            try:
+                result = func()
+            except Exception as e:
+                future.set_exception(e)
+                raise
+            except BaseException:
+                # e.g. the leader's script was stopped by a Streamlit rerun
+                future.set_exception(_Abandoned())
+                raise
+            else:
+                future.set_result(result)
+                return result, False
+            finally:
+                with self._lock:
+                    del self._flights[key]
+
+    def stream(self, key, open_stream):
+        """
+        Subscribe to the stream for `key`, opening it with open_stream() (an
+        iterable) if none is in flight. Returns (iterator, shared). The
+        upstream is read on demand by whichever subscriber gets ahead and is
+        closed once every subscriber has stopped.
+        """
+        with self._lock:
+            self.calls += 1
+            broadcast = self._flights.get(key)
+            shared = broadcast is not None
+            if shared:
+                self.coalesced += 1
+            else:
+                broadcast = self._flights[key] = _Broadcast(self, key, open_stream)
+            broadcast.subscribers += 1
+        return broadcast.iterate(), shared
+
+    def _finish(self, broadcast):
+        with self._lock:
+            if self._flights.get(broadcast.key) is broadcast:
+                del self._flights[broadcast.key]
+
+    def _unsubscribe(self, broadcast):
+        with self._lock:
+            broadcast.subscribers -= 1
+            abandoned = broadcast.subscribers == 0 and not broadcast.done
+            if abandoned and self._flights.get(broadcast.key) is broadcast:
+                del self._flights[broadcast.key]
+        if abandoned:
+            broadcast.close()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._flights),
+            }
+
+class _Broadcast:
+    """One upstream iterable replayed to every subscriber"""
+
+    def __init__(self, group, key, open_stream):
+        self.group = group
+        self.key = key
+        self.subscribers = 0
+        self.done = False
+        self._open_stream = open_stream
+        self._upstream = None
+        self._items = []
+        self._error = None
+        self._lock = threading.Lock()
+
+    def iterate(self):
+        i = 0
+        try:
+            while True:
+                if i < len(self._items):
+                    yield self._items[i]
+                    i += 1
+                    continue
+                with self._lock:
+                    if i < len(self._items):
+                        continue
+                    if self._error is not None:
+                        raise self._error
+                    if self.done:
+                        return
+                    self._pull()
+        finally:
+            self.group._unsubscribe(self)
+
+    def _pull(self):
+        """Read the next upstream item (called with the lock held)"""
+        try:
+            if self._upstream is None:
+                self._upstream = iter(self._open_stream())
+            self._items.append(next(self._upstream))
+        except StopIteration:
+            self.done = True
+            self.group._finish(self)
+        except Exception as e:
+            self._error = e
+            self.done = True
+            self.group._finish(self)
+
+    def close(self):
+        with self._lock:
+            if self._upstream is not None and hasattr(self._upstream, "close"):
+                self._upstream.close()
+            self.done = True
+
+completion_flights = SingleFlight("completions")
+stream_flights = SingleFlight("streams")
+moderation_flights = SingleFlight("moderations")
+
+def get_single_flight_stats():
+    """Calls and coalesced calls per kind of request in this process"""
+    groups = (completion_flights, stream_flights, moderation_flights)
+    stats = {group.name: group.stats() for group in groups}
+    stats["coalesced"] = sum(s["coalesced"] for s in stats.values())
+    return stats
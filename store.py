@@ -0,0 +1,249 @@
+# store.py
+"""
+Durable interview session storage.
+A session store keeps each interview's configuration, running statistics
+and append-only records (messages, scores, response scores, usage) so a
+session can be resumed by ID after a restart, redeploy or reconnect.
+SQLiteSessionStore (WAL mode) is the default; MemorySessionStore keeps
+everything in process memory.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import contextmanager
+
+DEFAULT_STORE_PATH = os.path.join(".cache", "sessions.sqlite3")
+
+# Append-only lists of a SessionState, persisted item by item
+RECORD_KINDS = ("messages", "scores", "response_scores", "usage_log")
+
+class SessionStore(ABC):
+    """
+    Interface for session stores.
+
+    A stored session is a dict with "config" (dict), "fields" (dict of the
+    scalar state fields) and one list per entry in RECORD_KINDS.
+    """
+
+    @abstractmethod
+    def append(self, session_id, config, fields, records):
+        """
+        Save a session's config and fields and append new records.
+
+        Args:
+            session_id: Session ID
+            config: Interview configuration dict
+            fields: Scalar state fields (replace the stored ones)
+            records: {kind: (first_index, items)} of records to append
+        """
+
+    @abstractmethod
+    def load(self, session_id):
+        """The stored session dict, or None if unknown"""
+
+    @abstractmethod
+    def list_sessions(self, limit=20):
+        """Most recently updated sessions as (session_id, updated_at, fields)"""
+
+    @abstractmethod
+    def iter_sessions(self, updated_after=0.0, page_size=500):
+        """
+        (session_id, updated_at) of every session updated after
+        `updated_after`, oldest update first, read a page at a time
+        """
+
+    @abstractmethod
+    def delete(self, session_id):
+        """Forget a session"""
+
+class MemorySessionStore(SessionStore):
+    """Sessions kept in a dict; lost when the process exits"""
+
+    def __init__(self):
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def append(self, session_id, config, fields, records):
+        with self._lock:
+            session = self._sessions.setdefault(session_id, {kind: [] for kind in RECORD_KINDS})
+            session["config"] = json.loads(json.dumps(config))
+            session["fields"] = json.loads(json.dumps(fields))
+            session["updated_at"] = time.time()
+            for kind, (start, items) in records.items():
+                del session[kind][start:]
+                session[kind].extend(json.loads(json.dumps(items)))
+
+    def load(self, session_id):
+        with self._lock:
+            session = self._sessions.get(session_id)
+            return json.loads(json.dumps(session)) if session is not None else None
+
+    def list_sessions(self, limit=20):
+        with self._lock:
+            ordered = sorted(self._sessions.items(), key=lambda item: item[1]["updated_at"], reverse=True)
+            return [(session_id, s["updated_at"], dict(s["fields"])) for session_id, s in ordered[:limit]]
+
+    def iter_sessions(self, updated_after=0.0, page_size=500):
+        with self._lock:
+            updated = [(s["updated_at"], session_id) for session_id, s in self._sessions.items()]
+        for updated_at, session_id in sorted(updated):
+            if updated_at > updated_after:
+                yield session_id, updated_at
+
+    def delete(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+class SQLiteSessionStore(SessionStore):
+    """
+    SQLite session store in WAL mode, so readers do not block the writer and
+    several worker processes can share one database file.
+
+    Args:
+        path: Database file (created if missing)
+    """
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS sessions (
+                    id TEXT PRIMARY KEY,
+                    config TEXT NOT NULL,
+                    fields TEXT NOT NULL,
+                    created REAL NOT NULL,
+                    updated REAL NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS records (
+                    session_id TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    seq INTEGER NOT NULL,
+                    data TEXT NOT NULL,
+                    PRIMARY KEY (session_id, kind, seq)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS sessions_updated ON sessions (updated)")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def append(self, session_id, config, fields, records):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO sessions (id, config, fields, created, updated) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET config = excluded.config, fields = excluded.fields, "
+                "updated = excluded.updated",
+                (session_id, json.dumps(config), json.dumps(fields), now, now)
+            )
+            for kind, (start, items) in records.items():
+                conn.executemany(
+                    "INSERT OR REPLACE INTO records (session_id, kind, seq, data) VALUES (?, ?, ?, ?)",
+                    [(session_id, kind, start + i, json.dumps(item)) for i, item in enumerate(items)]
+                )
+
+    def load(self, session_id):
+        with self._connect() as conn:
+            row = conn.execute("SELECT config, fields FROM sessions WHERE id = ?", (session_id,)).fetchone()
+            if row is None:
+                return None
+            session = {"config": json.loads(row[0]), "fields": json.loads(row[1])}
+            session.update({kind: [] for kind in RECORD_KINDS})
+            for kind, data in conn.execute(
+                "SELECT kind, data FROM records WHERE session_id = ? ORDER BY kind, seq", (session_id,)
+            ):
+                session[kind].append(json.loads(data))
+        return session
+
+    def list_sessions(self, limit=20):
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, updated, fields FROM sessions ORDER BY updated DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [(session_id, updated, json.loads(fields)) for session_id, updated, fields in rows]
+
+    def iter_sessions(self, updated_after=0.0, page_size=500):
+        # Keyset pagination: no connection or cursor is held between pages
+        last = (updated_after, "")
+        while True:
+            with self._connect() as conn:
+                rows = conn.execute(
+                    "SELECT id, updated FROM sessions WHERE updated > ? OR (updated = ? AND id > ?) "
+                    "ORDER BY updated, id LIMIT ?",
+                    (last[0], last[0], last[1], page_size)
+                ).fetchall()
+            for session_id, updated in rows:
+                if updated > updated_after:
+                    yield session_id, updated
+            if len(rows) < page_size:
+                return
+            last = (rows[-1][1], rows[-1][0])
+
+    def delete(self, session_id):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM records WHERE session_id = ?", (session_id,))
+            conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+class SessionPool:
+    """
+    Bounded in-memory working set of live sessions on top of a store.
+    Sessions beyond `max_sessions` are dropped from memory (least recently
+    used first) and reloaded from the store when next requested.
+
+    Args:
+        store: SessionStore the sessions persist to
+        max_sessions: Sessions kept in memory
+    """
+
+    def __init__(self, store, max_sessions=100):
+        self.store = store
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id, load):
+        """
+        The live session for an ID. On a miss, load(session_id) is called
+        (it should resume from the store, returning None if unknown).
+        """
+        with self._lock:
+            if session_id in self._sessions:
+                self._sessions.move_to_end(session_id)
+                return self._sessions[session_id]
+        session = load(session_id)
+        if session is not None:
+            self.put(session_id, session)
+        return session
+
+    def put(self, session_id, session):
+        with self._lock:
+            self._sessions[session_id] = session
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def discard(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sessions)
@@ -0,0 +1,61 @@
+# tests/conftest.py
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# utils creates the OpenAI client at import; the tests never call the API
+os.environ.setdefault("OPENAI_API_KEY", "test")
+# Mock scores stay out of the scorer calibration log
+os.environ.setdefault("PROVISIONAL_SCORE_LOG", "")
+
+REPLY = "Good answer.\n\n**Score: 7/10**\n\nNext, how would you test it?"
+
+class FakeCompletions:
+    """
+    chat.completions stand-in that records every request. Streams send
+    `reply` in chunks of `chunk_size` characters; `error` is raised by the
+    next request, or after the first chunk with `fail_mid_stream`.
+    """
+
+    def __init__(self):
+        self.calls = []
+        self.reply = REPLY
+        self.summary = "- summary of the earlier turns"
+        self.chunk_size = None
+        self.error = None
+        self.fail_mid_stream = False
+
+    def create(self, **params):
+        self.calls.append(params)
+        if self.error is not None and not self.fail_mid_stream:
+            raise self.error
+        usage = SimpleNamespace(prompt_tokens=100, completion_tokens=20, total_tokens=120)
+        if params.get("stream"):
+            return self._stream(params["model"], usage)
+        message = SimpleNamespace(content=self.summary)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage, model=params["model"])
+
+    def _stream(self, model, usage):
+        size = self.chunk_size or len(self.reply)
+        for i in range(0, len(self.reply), size):
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=self.reply[i:i + size]))],
+                                  usage=None, model=model)
+            if self.fail_mid_stream:
+                raise self.error
+        yield SimpleNamespace(choices=[], usage=usage, model=model)
+
+@pytest.fixture
+def fake_openai(monkeypatch):
+    """Replace the OpenAI client; returns the FakeCompletions"""
+    import utils
+    completions = FakeCompletions()
+    client = SimpleNamespace(
+        chat=SimpleNamespace(completions=completions),
+        moderations=SimpleNamespace(create=lambda **k: SimpleNamespace(results=[SimpleNamespace(flagged=False)])),
+    )
+    client.with_options = lambda **k: client
+    monkeypatch.setattr(utils, "client", client)
+    return completions
@@ -0,0 +1,27 @@
+# tests/test_analytics.py
+from analytics import ScoreAnalytics
+from prompts import ROLES, LEVELS
+from session import InterviewConfig, InterviewSession
+from store import MemorySessionStore
+
+def test_response_time_is_kept_incrementally(fake_openai):
+    store = MemorySessionStore()
+    interview = InterviewSession(InterviewConfig(ROLES[0], LEVELS[1], history_turns=1), store=store)
+    for _ in range(4):
+        interview.submit_answer("I would use a hash map keyed by user ID.")
+        interview.wait_for_summary(5)
+
+    state = interview.state
+    evaluations = [u for u in state.usage_log if not u.get("summary")]
+    assert len(evaluations) == 4 and len(state.usage_log) == 5
+    assert state.analytics.latency.count == 4
+    assert state.analytics.latency.total == sum(u["latency"] for u in evaluations)
+
+    resumed = InterviewSession.resume(interview.session_id, store)
+    assert resumed.state.analytics.latency == state.analytics.latency
+
+def test_response_time_is_rebuilt_for_older_sessions():
+    usage_log = [{"latency": 1.0}, {"latency": 5.0, "summary": True}, {"latency": 2.0}]
+    analytics = ScoreAnalytics.from_records([], [], usage_log)
+    assert (analytics.latency.count, analytics.latency.mean) == (2, 1.5)
+    assert ScoreAnalytics.from_dict(analytics.to_dict()).latency == analytics.latency
@@ -0,0 +1,22 @@
+# tests/test_bench_hotpath.py
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+from bench_hotpath import check
+
+BASELINE = {"calibration_us": 200.0, "benchmarks": {
+    "tiny": {"relative": 0.0025},    # 0.5 µs
+    "large": {"relative": 0.05},     # 10 µs
+}}
+
+def results(tiny, large):
+    return {"benchmarks": {"tiny": {"relative": tiny}, "large": {"relative": large}}}
+
+def test_sub_microsecond_noise_is_not_a_regression():
+    assert check(results(0.0075, 0.05), BASELINE, 2.0) == []
+
+def test_slowdowns_beyond_the_threshold_and_floor_are_regressions():
+    assert check(results(0.0025, 0.11), BASELINE, 2.0) == ["large"]
+    assert check(results(0.02, 0.09), BASELINE, 2.0) == ["tiny"]
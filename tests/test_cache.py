@@ -0,0 +1,64 @@
+# tests/test_cache.py
+from cache import CompletionCache, make_cache_key
+from utils import _build_params
+
+def params(content="What is a hash map?", **overrides):
+    args = dict(model="gpt-4o-mini", temperature=0, max_tokens=800, top_p=1.0,
+                frequency_penalty=0.0, presence_penalty=0.0, response_format=None)
+    args.update(overrides)
+    return _build_params("system", [{"role": "user", "content": content}], **args)
+
+def test_key_is_stable_across_identical_requests():
+    assert make_cache_key(params()) == make_cache_key(params())
+    assert make_cache_key(params()) == make_cache_key(dict(reversed(list(params().items()))))
+    streamed = dict(params(), stream=True, stream_options={"include_usage": True})
+    assert make_cache_key(streamed) == make_cache_key(params())
+
+def test_key_changes_with_anything_that_changes_the_output():
+    keys = {
+        make_cache_key(params()),
+        make_cache_key(params("What is a heap?")),
+        make_cache_key(params(model="gpt-4o")),
+        make_cache_key(params(temperature=0.2)),
+        make_cache_key(params(max_tokens=300)),
+    }
+    assert len(keys) == 5
+
+def test_hit_and_miss_are_counted(tmp_path):
+    cache = CompletionCache(str(tmp_path / "completions.sqlite3"))
+    key = make_cache_key(params())
+    assert cache.get(key) is None
+    cache.put(key, {"content": "A table of buckets."})
+    assert cache.get(key) == {"content": "A table of buckets."}
+    assert cache.get(make_cache_key(params("What is a heap?"))) is None
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 2, 1)
+    assert stats["hit_rate"] == 1 / 3
+
+def test_entries_persist_across_instances(tmp_path):
+    path = str(tmp_path / "nested" / "completions.sqlite3")
+    key = make_cache_key(params())
+    CompletionCache(path).put(key, {"content": "A table of buckets."})
+
+    reopened = CompletionCache(path)
+    assert reopened.get(key) == {"content": "A table of buckets."}
+    assert reopened.stats()["hits"] == 1
+
+def test_expired_and_least_recently_used_entries_are_evicted(tmp_path):
+    cache = CompletionCache(str(tmp_path / "completions.sqlite3"), max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+
+    expired = CompletionCache(cache.path, ttl=-1)
+    assert expired.get("a") is None
+    assert expired.purge_expired() == 1
+    assert expired.stats()["entries"] == 0
+
+def test_only_deterministic_requests_are_cached_unless_forced():
+    assert CompletionCache.should_use(0)
+    assert not CompletionCache.should_use(0.7)
+    assert CompletionCache.should_use(0.7, force=True)
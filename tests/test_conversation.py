@@ -0,0 +1,64 @@
+# tests/test_conversation.py
+import threading
+
+import session as session_module
+from conversation import ConversationWindow, SUMMARY_HEADER
+from prompts import ROLES, LEVELS
+from session import InterviewConfig, InterviewSession
+from utils import CompletionResult
+
+def turns(n):
+    messages = [{"role": "assistant", "content": "Welcome. What is a hash map?"}]
+    for i in range(n):
+        messages += [{"role": "user", "content": f"answer {i}"}, {"role": "assistant", "content": f"question {i}?"}]
+    return messages
+
+def test_build_does_not_fold_within_budget():
+    calls = []
+    window = ConversationWindow(lambda summary, evicted: calls.append(evicted) or "summary", keep_turns=1)
+    messages = turns(4)
+    assert window.needs_fold(messages)
+
+    assert window.build(messages, "system", "gpt-4o-mini") == [
+        {"role": m["role"], "content": m["content"]} for m in messages
+    ]
+    assert calls == []
+
+    assert window.fold(messages)
+    assert window.summarized_count == len(messages) - 2
+    assert window.build(messages, "system", "gpt-4o-mini")[0]["content"].startswith(SUMMARY_HEADER)
+
+def test_build_folds_for_the_given_models_budget():
+    window = ConversationWindow(lambda summary, evicted: "summary", keep_turns=6,
+                                budgets={"small": 50, "large": 100000})
+    messages = turns(4)
+    assert window.build(messages, "system", "large")[0]["role"] == "assistant"
+    assert window.build(messages, "system", "small")[0]["content"].startswith(SUMMARY_HEADER)
+
+def test_summary_is_folded_in_the_background(fake_openai, monkeypatch):
+    release = threading.Event()
+    summaries = []
+
+    def summarize(previous_summary, messages, cache=None):
+        release.wait(5)
+        summaries.append(messages)
+        return CompletionResult("- earlier turns", "gpt-4o-mini", 50, 10, 0.1)
+
+    monkeypatch.setattr(session_module, "summarize_conversation", summarize)
+    interview = InterviewSession(InterviewConfig(ROLES[0], LEVELS[1], history_turns=1))
+    for _ in range(3):
+        interview.submit_answer("I would use a hash map keyed by user ID.")
+    assert interview._fold_thread.is_alive()
+
+    # The next turn does not wait for the summary still being written
+    interview.submit_answer("I would add a cache in front of it.")
+    assert summaries == []
+    assert fake_openai.calls[-1]["messages"][1]["role"] == "assistant"
+
+    release.set()
+    interview.wait_for_summary(5)
+    assert len(summaries) == 1
+    assert interview.state.summarized_count == 5
+
+    interview.submit_answer("I would shard by user ID.")
+    assert fake_openai.calls[-1]["messages"][1]["content"].startswith(SUMMARY_HEADER)
@@ -0,0 +1,78 @@
+# tests/test_evaluation.py
+import json
+
+import pytest
+
+from evaluation import (EVALUATION_CATEGORIES, EVALUATION_KEYS, EVALUATION_ONLY_KEYS, EVALUATION_ONLY_SCHEMA,
+                        EVALUATION_SCHEMA, IncrementalJSONParser, evaluation_response_format)
+
+def test_scores_are_bounded_from_1_to_10():
+    for schema in (EVALUATION_SCHEMA, EVALUATION_ONLY_SCHEMA):
+        categories = schema["properties"]["evaluation"]["properties"]
+        scores = [categories[name]["properties"]["score"] for name in EVALUATION_CATEGORIES]
+        for score in scores + [schema["properties"]["overall_score"]]:
+            assert (score["type"], score["minimum"], score["maximum"]) == ("integer", 1, 10)
+
+DOCUMENT = json.dumps({
+    "evaluation": {
+        "technical_accuracy": {"score": 8, "feedback": "Covers \"collisions\" and C:\\temp paths\nwell."},
+        "communication": {"score": 7, "feedback": "Clear \u2014 caf\u00e9 \U0001f600"},
+    },
+    "overall_score": 7.5,
+    "strengths": ["hashing", ""],
+    "improvements": [],
+    "recommendation": None,
+    "question": "Why is lookup O(1)?",
+    "next_question_hint": True,
+}, ensure_ascii=True)
+
+def feed_in_chunks(text, size):
+    parser = IncrementalJSONParser()
+    events = []
+    for i in range(0, len(text), size):
+        events += parser.feed(text[i:i + size])
+    return parser, events
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, len(DOCUMENT)])
+def test_parser_matches_json_loads_at_any_chunk_boundary(size):
+    parser, events = feed_in_chunks("```json\n" + DOCUMENT + "\n```", size)
+    assert parser.done
+    assert parser.value == json.loads(DOCUMENT)
+    assert events[0] == (("evaluation", "technical_accuracy", "score"), 8)
+    assert (("strengths", 1), "") in events
+    assert events[-1] == (("next_question_hint",), True)
+
+def test_escapes_split_across_chunks():
+    parser = IncrementalJSONParser()
+    for chunk in ['{"feedback": "a\\', '"b\\', 'u00', 'e9\\', 'n\\\\', '"}']:
+        parser.feed(chunk)
+    assert parser.value == {"feedback": 'a"b\u00e9\n\\'}
+
+def test_truncated_input_keeps_the_completed_fields():
+    cut = DOCUMENT.index('"overall_score"') + len('"overall_score": 7')
+    parser, events = feed_in_chunks(DOCUMENT[:cut], 5)
+    assert not parser.done
+    # The number may still continue, so it is not reported yet
+    assert "overall_score" not in parser.value
+    assert parser.value["evaluation"]["communication"]["score"] == 7
+    assert events[-1][0] == ("evaluation", "communication", "feedback")
+
+    mid_string = DOCUMENT[:DOCUMENT.index("Why is") + 3]
+    parser, events = feed_in_chunks(mid_string, 4)
+    assert not parser.done and "question" not in parser.value
+
+def test_text_after_the_document_is_ignored_and_garbage_is_rejected():
+    parser = IncrementalJSONParser()
+    parser.feed('{"a": 1} {"b": 2}')
+    assert parser.done and parser.value == {"a": 1}
+    with pytest.raises(ValueError):
+        IncrementalJSONParser().feed('{"a": x}')
+
+def test_response_format_is_strict_only_on_structured_output_models():
+    for model in ("gpt-4o", "gpt-4o-mini"):
+        schema = evaluation_response_format(model)["json_schema"]
+        assert schema["strict"] and tuple(schema["schema"]["required"]) == EVALUATION_KEYS
+        only = evaluation_response_format(model, evaluation_only=True)["json_schema"]["schema"]
+        assert tuple(only["required"]) == EVALUATION_ONLY_KEYS
+        assert "question" not in only["properties"]
+    assert evaluation_response_format("gpt-4-turbo") == {"type": "json_object"}
@@ -0,0 +1,28 @@
+# tests/test_export.py
+from conversation import last_question
+from export import session_turns
+from prompts import ROLES, LEVELS
+from session import InterviewConfig, InterviewSession, welcome_message
+from store import MemorySessionStore
+
+def test_last_question_of_the_welcome_message():
+    config = InterviewConfig(ROLES[0], LEVELS[1])
+    messages = [{"role": "assistant", "content": welcome_message(config)}]
+    assert last_question(messages) == f"Tell me about yourself and why you're interested in this {ROLES[0]} position."
+
+def test_turn_usage_matches_the_api_calls(fake_openai):
+    store = MemorySessionStore()
+    interview = InterviewSession(InterviewConfig(ROLES[0], LEVELS[1], history_turns=1), store=store)
+    # The summary folded after turn 3 is made for turn 4
+    for _ in range(4):
+        interview.submit_answer("I would use a hash map keyed by user ID.")
+        interview.wait_for_summary(5)
+    summaries = [call for call in fake_openai.calls if not call.get("stream")]
+    assert len(summaries) == 1
+
+    turns = session_turns(interview.session_id, store.load(interview.session_id))
+    assert [turn["turn"] for turn in turns] == [1, 2, 3, 4]
+    assert turns[0]["question"].startswith("Tell me about yourself")
+    assert sum(turn["prompt_tokens"] for turn in turns) == 100 * len(fake_openai.calls)
+    assert [turn["prompt_tokens"] for turn in turns] == [100, 100, 100, 200]
+    assert all(turn["model"] == "gpt-4o-mini" for turn in turns)
@@ -0,0 +1,62 @@
+# tests/test_json_extract.py
+import json
+import os
+import random
+
+import pytest
+
+from utils import extract_json, extract_json_from_response
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                           "benchmarks", "json_corpus.jsonl")
+
+with open(CORPUS_PATH, encoding="utf-8") as f:
+    CORPUS = [json.loads(line) for line in f if line.strip()]
+
+def overall_score(data):
+    return data.get("overall_score") if isinstance(data, dict) else None
+
+@pytest.mark.parametrize("case", CORPUS, ids=[case["name"] for case in CORPUS])
+def test_corpus(case):
+    extraction = extract_json(case["text"])
+    assert overall_score(extraction.data) == case["overall_score"]
+    assert (extraction.data is None) == (extraction.strategy == "none")
+
+def test_strategy_and_missing_keys():
+    by_name = {case["name"]: case["text"] for case in CORPUS}
+    assert extract_json(by_name["bare"]).strategy == "direct"
+    assert extract_json(by_name["fenced_json"]).strategy == "embedded"
+    partial = extract_json(by_name["partial_keys"])
+    assert "question" in partial.missing_keys and "overall_score" not in partial.missing_keys
+    assert extract_json(by_name["note_object_first"]).candidates == 2
+    assert extract_json_from_response(by_name["no_json"]) is None
+
+@pytest.mark.parametrize("text, expected", [
+    ("{ " * 10_000, None),
+    ("{a} " * 10_000 + '{"overall_score": 5}', 5),
+    ('{"a} ' * 10_000, None),
+], ids=["unclosed_braces", "prose_braces", "quoted_prose_braces"])
+def test_pathological_inputs(text, expected):
+    assert overall_score(extract_json(text).data) == expected
+
+def mutate(text, rng):
+    """Truncate, duplicate or inject braces/quotes at a random position"""
+    if not text:
+        return rng.choice(["{", "}", '"', "{}"])
+    i = rng.randrange(len(text))
+    kind = rng.randrange(4)
+    if kind == 0:
+        return text[:i]
+    if kind == 1:
+        return text[:i] + rng.choice(['{', '}', '"', '\\', '[', ']', ',']) + text[i:]
+    if kind == 2:
+        return text[i:]
+    return text + text[:i]
+
+@pytest.mark.parametrize("seed", range(4))
+def test_mutated_responses_never_raise(seed):
+    rng = random.Random(seed)
+    for _ in range(500):
+        extraction = extract_json(mutate(rng.choice(CORPUS)["text"], rng))
+        assert extraction.data is None or isinstance(extraction.data, dict)
+        assert extraction.strategy in ("direct", "embedded", "none")
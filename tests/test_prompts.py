@@ -0,0 +1,11 @@
+# tests/test_prompts.py
+from prompts import ROLES, LEVELS, DOMAINS, join_sections, system_prompt_sections
+
+def test_few_shot_examples_follow_the_stable_sections():
+    first, second = (
+        system_prompt_sections(ROLES[0], LEVELS[1], DOMAINS[0], "Few-shot", "Professional",
+                               evaluation_only=True, question=question)
+        for question in ("How would you design a rate limiter?", "How do you find a memory leak?")
+    )
+    assert [name for name, _ in first] == ["scoring", "criteria", "tone", "technique", "evaluation_only", "examples"]
+    assert join_sections(first[:-1]) == join_sections(second[:-1])
@@ -0,0 +1,94 @@
+# tests/test_provisional.py
+import json
+
+import numpy as np
+import pytest
+
+from prompts import ROLES, ROLE_DETAILS, LEVELS, DOMAINS
+from provisional import (DEFAULT_WEIGHTS, FEATURE_NAMES, OUTPUTS, ProvisionalScorer, calibrate, extract_features,
+                         focus_matrix, get_provisional_scorer)
+from session import InterviewConfig, InterviewSession
+
+@pytest.mark.parametrize("role", ROLES)
+def test_every_role_has_its_own_focus_areas(role):
+    assert role in ROLE_DETAILS
+    vocabulary, matrix = focus_matrix(role, LEVELS[1], DOMAINS[0])
+    assert vocabulary and matrix.shape[0] >= 6
+
+def test_focus_coverage_follows_the_role():
+    answer = "I built the deployment pipeline with Docker and Kubernetes and added monitoring and alerting."
+    coverage = FEATURE_NAMES.index("focus_coverage")
+    devops = extract_features(answer, "DevOps Engineer", LEVELS[1])[coverage]
+    analyst = extract_features(answer, "Data Analyst", LEVELS[1])[coverage]
+    assert devops > analyst
+
+STAR_ANSWER = """When I was at my last company, our checkout API was timing out under load.
+My task was to bring p99 latency under 300 ms before the holiday sale.
+
+I designed a read-through cache and moved the slow queries to a replica, because the primary was saturated.
+As a result, latency dropped by 60% and we handled 3x the traffic."""
+
+def test_structured_answers_score_above_filler():
+    scorer = ProvisionalScorer()
+    strong = scorer.score(STAR_ANSWER, "Backend Developer", LEVELS[1])
+    weak = scorer.score("um, I guess maybe like caching stuff, not sure", "Backend Developer", LEVELS[1])
+    assert strong.overall > weak.overall
+    assert all(strong.categories[name] > weak.categories[name] for name in OUTPUTS[1:])
+    for score in (strong, weak):
+        values = list(score.to_dict().values())
+        assert all(1.0 <= value <= 10.0 and value == round(value, 1) for value in values)
+        assert len(score.features) == len(FEATURE_NAMES)
+
+def test_star_markers_and_empty_answers():
+    features = dict(zip(FEATURE_NAMES, extract_features(STAR_ANSWER, "Backend Developer", LEVELS[1])))
+    assert features["star"] == 1.0 and features["reasoning"] > 0 and features["numbers"] > 0
+    empty = extract_features("   ", "Backend Developer", LEVELS[1])
+    assert np.isfinite(empty).all()
+    # Only the bias is left
+    assert ProvisionalScorer().score("", "Backend Developer", LEVELS[1]).overall == DEFAULT_WEIGHTS[0, -1]
+
+def records(weights, n, seed=0):
+    rng = np.random.default_rng(seed)
+    features = rng.uniform(0, 1, (n, len(FEATURE_NAMES)))
+    features[:, -1] = 1.0
+    finals = np.clip(features @ weights.T, 1, 10)
+    return [{"features": f.tolist(), "final": dict(zip(OUTPUTS, y.tolist()))} for f, y in zip(features, finals)]
+
+def test_calibration_fits_logged_scores():
+    target = np.tile(np.linspace(1, 3, len(FEATURE_NAMES)), (len(OUTPUTS), 1)) * 0.5
+    logged = records(target, 200)
+    logged[0]["final"]["completeness"] = None
+    weights, report = calibrate(logged, ridge=1e-6)
+    for name, (samples, before, after) in report.items():
+        assert samples == (199 if name == "completeness" else 200)
+        assert after < before and after < 0.05
+    assert np.allclose(ProvisionalScorer(weights).predict(np.array(logged[1]["features"])),
+                       [list(logged[1]["final"].values())], atol=0.1)
+
+def test_outputs_with_few_scores_keep_the_default_weights():
+    weights, report = calibrate(records(DEFAULT_WEIGHTS * 2, 10))
+    assert np.array_equal(weights, DEFAULT_WEIGHTS)
+    assert report["overall"] == (10, None, None)
+
+def test_weights_round_trip_and_reject_other_features(tmp_path):
+    path = tmp_path / "weights.json"
+    path.write_text(json.dumps({"feature_names": FEATURE_NAMES, "outputs": OUTPUTS,
+                                "weights": (DEFAULT_WEIGHTS * 2).tolist()}))
+    assert np.array_equal(ProvisionalScorer.load(str(path)).weights, DEFAULT_WEIGHTS * 2)
+    path.write_text(json.dumps({"feature_names": FEATURE_NAMES[:-1], "outputs": OUTPUTS, "weights": []}))
+    with pytest.raises(ValueError):
+        ProvisionalScorer.load(str(path))
+
+def test_completed_turn_logs_the_provisional_and_final_scores(fake_openai, tmp_path, monkeypatch):
+    log = tmp_path / "provisional.jsonl"
+    monkeypatch.setenv("PROVISIONAL_SCORE_LOG", str(log))
+    interview = InterviewSession(InterviewConfig("Backend Developer", LEVELS[1]))
+    turn = interview.stream_answer(STAR_ANSWER)
+    assert turn.provisional.overall == get_provisional_scorer().score(STAR_ANSWER, "Backend Developer", LEVELS[1]).overall
+    for _ in turn:
+        pass
+
+    [record] = [json.loads(line) for line in log.read_text().splitlines()]
+    assert record["final"]["overall"] == 7
+    assert record["provisional"] == turn.provisional.to_dict()
+    assert (record["role"], record["model"]) == ("Backend Developer", "gpt-4o-mini")
@@ -0,0 +1,63 @@
+# tests/test_ratelimit.py
+import contextvars
+import threading
+
+import pytest
+
+import hedging
+from hedging import HedgeBudget, HedgePolicy, LatencyTracker, run_hedged
+from ratelimit import RateLimit, RateLimiter, RateLimitTimeout, call_with_queue_notices
+
+MODEL = "gpt-4o-mini"
+
+@pytest.fixture
+def hedged(monkeypatch):
+    """Fresh hedging state with enough latency history to hedge right away"""
+    tracker = LatencyTracker()
+    tracker.record(MODEL, "total", 0.01)
+    monkeypatch.setattr(hedging, "latency_tracker", tracker)
+    monkeypatch.setattr(hedging, "hedge_budget", HedgeBudget())
+    return HedgePolicy(min_samples=1, min_delay=0.01, budget_ratio=1.0)
+
+@pytest.fixture
+def limiter():
+    """A limiter whose only request this minute is already taken"""
+    limiter = RateLimiter(default=RateLimit(rpm=1), poll_interval=0.01)
+    limiter.acquire(MODEL, 0)
+    return limiter
+
+def test_hedged_queue_positions_are_shown_on_the_calling_thread(hedged, limiter):
+    notices = []
+
+    def notify(position, queue_length, model):
+        notices.append((position, model, threading.current_thread()))
+
+    with pytest.raises(RateLimitTimeout):
+        call_with_queue_notices(
+            lambda: run_hedged(lambda: limiter.acquire(MODEL, 0, max_wait=0.3), MODEL, "total", hedged),
+            notify,
+        )
+    assert hedging.hedge_budget.hedges == 1
+    assert notices
+    assert all(model == MODEL and thread is threading.current_thread() for _, model, thread in notices)
+
+def test_positions_reported_after_the_call_returned_are_dropped(limiter):
+    notices = []
+    returned = threading.Event()
+
+    def queue_late():
+        returned.wait(5)
+        with pytest.raises(RateLimitTimeout):
+            limiter.acquire(MODEL, 0, max_wait=0.1)
+
+    def call():
+        # Outlives the call with its context, like a losing hedged attempt
+        loser = threading.Thread(target=contextvars.copy_context().run, args=(queue_late,))
+        loser.start()
+        return loser
+
+    loser = call_with_queue_notices(call, lambda *notice: notices.append(notice))
+    returned.set()
+    loser.join()
+    assert limiter.stats.timeouts == 1
+    assert notices == []
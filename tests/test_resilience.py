@@ -0,0 +1,51 @@
+# tests/test_resilience.py
+import openai
+import pytest
+
+import resilience
+from ratelimit import RateLimitTimeout
+from resilience import CircuitBreaker, RetryPolicy, call_with_resilience
+
+class Unauthorized(openai.APIStatusError):
+    """A 401 without building an HTTP response"""
+
+    def __init__(self):
+        Exception.__init__(self, "unauthorized")
+        self.status_code = 401
+
+@pytest.fixture
+def breaker(monkeypatch):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.0)
+    monkeypatch.setattr(resilience, "get_breaker", lambda model: breaker)
+    return breaker
+
+def half_open(breaker):
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+@pytest.mark.parametrize("error", [Unauthorized(), RateLimitTimeout("queue full"), KeyboardInterrupt()])
+def test_half_open_trial_with_non_retryable_error_is_settled(breaker, error):
+    half_open(breaker)
+
+    def fail(model, timeout):
+        raise error
+
+    with pytest.raises(type(error)):
+        call_with_resilience(fail, "gpt-4o-mini", RetryPolicy(), sleep=lambda s: None)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    result, model = call_with_resilience(lambda m, t: "ok", "gpt-4o-mini", RetryPolicy(), sleep=lambda s: None)
+    assert (result, model) == ("ok", "gpt-4o-mini")
+    assert breaker.state == CircuitBreaker.CLOSED
+
+def test_half_open_trial_times_out(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(resilience.time, "monotonic", lambda: now[0])
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10.0, trial_timeout=20.0)
+    breaker.record_failure()
+    now[0] += 10
+    assert breaker.allow()
+    assert not breaker.allow()
+    now[0] += 20
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
@@ -0,0 +1,62 @@
+# tests/test_routing.py
+import pytest
+
+import routing
+import session as session_module
+from prompts import LEVELS
+from routing import RoutingPolicy, RoutingStats, route_turn
+from session import InterviewConfig, InterviewSession
+from utils import calculate_cost
+
+HISTORY = [
+    {"role": "assistant", "content": "Welcome. Tell me about yourself."},
+    {"role": "user", "content": "I build web services."},
+    {"role": "assistant", "content": "How would you speed up a slow endpoint?", "response_score": 7},
+]
+WORDS = "I would first measure where the time goes and then fix the slowest part of the request path "
+TECHNICAL = "I would add an index, put a cache in front of the database and check the latency at p99. "
+
+def config(role="Backend Developer", prompt_style="Zero-shot"):
+    return InterviewConfig(role, LEVELS[1], prompt_style=prompt_style, model="gpt-4o")
+
+@pytest.mark.parametrize("answer, messages, cfg, expected", [
+    (WORDS * 20, HISTORY[:1], config(), ("gpt-4o-mini", "opening turn")),
+    ("Add an index.", HISTORY, config(), ("gpt-4o-mini", "short answer")),
+    (WORDS * 2, HISTORY[:-1] + [{"role": "assistant", "content": "Next?"}], config(),
+     ("gpt-4o", "previous evaluation unscored")),
+    (WORDS * 12, HISTORY, config(), ("gpt-4o", "long answer")),
+    (TECHNICAL * 2, HISTORY, config(), ("gpt-4o", "technical answer")),
+    (TECHNICAL * 2, HISTORY, config(role="Product Manager"), ("gpt-4o-mini", "simple answer")),
+    (WORDS * 6, HISTORY, config(prompt_style="Chain-of-Thought"), ("gpt-4o", "reasoning prompt style")),
+    (WORDS * 6, HISTORY, config(), ("gpt-4o-mini", "simple answer")),
+], ids=["opening", "short", "unscored", "long", "technical", "non-technical-role", "reasoning", "simple"])
+def test_route_turn(answer, messages, cfg, expected):
+    decision = route_turn(answer, cfg, messages)
+    assert (decision.model, decision.reason) == expected
+    assert decision.baseline_model == "gpt-4o"
+
+def test_an_evaluation_with_category_scores_is_not_low_confidence():
+    messages = HISTORY[:-1] + [{"role": "assistant", "content": "{}", "scores": {"communication": 6}}]
+    assert route_turn(WORDS * 2, config(), messages).reason == "simple answer"
+
+def test_policy_thresholds_apply():
+    policy = RoutingPolicy(cheap_model="small", capable_model="large", short_words=3, long_chars=20)
+    assert route_turn("Add an index now.", config(), HISTORY, policy).model == "small"
+    assert route_turn("Add an index, then measure again.", config(), HISTORY, policy).model == "large"
+
+def test_routed_turn_records_the_saving_against_the_baseline(fake_openai, monkeypatch):
+    stats = RoutingStats()
+    monkeypatch.setattr(routing, "routing_stats", stats)
+    monkeypatch.setattr(session_module, "routing_stats", stats)
+    cfg = config()
+    cfg.use_routing = True
+    interview = InterviewSession(cfg)
+    interview.submit_answer("I build web services.")
+
+    assert fake_openai.calls[-1]["model"] == "gpt-4o-mini"
+    saved = calculate_cost("gpt-4o", 100, 20)["total_cost"] - calculate_cost("gpt-4o-mini", 100, 20)["total_cost"]
+    assert interview.state.usage_log[-1]["routing"] == {
+        "reason": "opening turn", "baseline_model": "gpt-4o", "saved": pytest.approx(saved)
+    }
+    assert interview.state.routing_savings == pytest.approx(saved)
+    assert stats.decisions == {"gpt-4o-mini/opening turn": 1}
@@ -0,0 +1,37 @@
+# tests/test_session.py
+import json
+
+import pytest
+
+from session import clamp_score, extract_score, parse_response
+
+@pytest.mark.parametrize("value, expected", [
+    (7, 7), (7.5, 7.5), (0, 1), (-3, 1), (11, 10), (42.0, 10.0), ("8", 8.0), ("9/10", 9.0),
+    ("high", None), (None, None), (True, None), ([7], None), (float("nan"), None),
+])
+def test_clamp_score(value, expected):
+    assert clamp_score(value) == expected
+
+def test_score_marker_is_clamped():
+    assert extract_score("Well done. **Score: 12/10**") == 10.0
+    assert extract_score("No score here") is None
+
+def test_json_object_scores_are_clamped_before_they_are_recorded():
+    evaluation = {
+        "evaluation": {
+            "technical_accuracy": {"score": 14, "feedback": "a"},
+            "communication": {"score": 0, "feedback": "b"},
+            "problem_solving": {"score": "excellent", "feedback": "c"},
+            "completeness": {"score": "6", "feedback": "d"},
+        },
+        "overall_score": 12,
+        "strengths": [], "improvements": [], "recommendation": "r",
+        "question": "Next?", "next_question_hint": "h",
+    }
+    result = parse_response(json.dumps(evaluation), json_mode=True)
+    assert result.final_scores == {
+        "overall": 10, "technical_accuracy": 10, "communication": 1,
+        "problem_solving": None, "completeness": 6.0,
+    }
+    assert "**Overall Score:** 10/10" in result.display_response
+    assert "**Problem Solving:** N/A/10" in result.display_response
@@ -0,0 +1,137 @@
+# tests/test_singleflight.py
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from singleflight import SingleFlight
+from utils import stream_openai
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+def run_concurrently(group, func, callers=4):
+    """Start `callers` identical calls and release func once all have joined"""
+    release = threading.Event()
+
+    def leader_call():
+        release.wait(5)
+        return func()
+
+    with ThreadPoolExecutor(callers) as pool:
+        futures = [pool.submit(group.do, "key", leader_call) for _ in range(callers)]
+        wait_until(lambda: group.stats()["coalesced"] == callers - 1)
+        release.set()
+        return futures
+
+def test_concurrent_identical_calls_share_one_call():
+    group = SingleFlight("test")
+    calls = []
+    futures = run_concurrently(group, lambda: calls.append(1) or "answer")
+
+    results = [future.result() for future in futures]
+    assert calls == [1]
+    assert sorted(shared for _, shared in results) == [False, True, True, True]
+    assert {result for result, _ in results} == {"answer"}
+    assert group.stats() == {"calls": 4, "coalesced": 3, "in_flight": 0}
+
+    # Nothing is kept once the call completed
+    assert group.do("key", lambda: "again") == ("again", False)
+
+def test_error_is_raised_to_every_caller():
+    group = SingleFlight("test")
+
+    def fail():
+        raise ValueError("upstream failed")
+
+    for future in run_concurrently(group, fail):
+        with pytest.raises(ValueError, match="upstream failed"):
+            future.result()
+
+def test_interrupted_leader_lets_the_followers_run_their_own_call():
+    group = SingleFlight("test")
+    started, release = threading.Event(), threading.Event()
+
+    def interrupted():
+        started.set()
+        release.wait(5)
+        raise KeyboardInterrupt
+
+    with ThreadPoolExecutor(1) as pool:
+        leader = pool.submit(group.do, "key", interrupted)
+        started.wait(5)
+        with ThreadPoolExecutor(1) as follower_pool:
+            follower = follower_pool.submit(group.do, "key", lambda: "own call")
+            wait_until(lambda: group.stats()["coalesced"] == 1)
+            release.set()
+            assert follower.result(5) == ("own call", False)
+        with pytest.raises(KeyboardInterrupt):
+            leader.result(5)
+
+def test_late_subscriber_replays_the_stream():
+    group = SingleFlight("test")
+    opened = []
+
+    def open_stream():
+        opened.append(1)
+        return iter("abc")
+
+    first, shared = group.stream("key", open_stream)
+    assert not shared
+    assert next(first) == "a"
+    second, shared = group.stream("key", open_stream)
+    assert shared
+    assert list(second) == ["a", "b", "c"]
+    assert list(first) == ["b", "c"]
+    assert opened == [1]
+    assert group.stats()["in_flight"] == 0
+
+def test_upstream_is_closed_once_every_subscriber_stopped():
+    group = SingleFlight("test")
+    closed = []
+
+    def open_stream():
+        try:
+            yield from "abc"
+        finally:
+            closed.append(1)
+
+    first, _ = group.stream("key", open_stream)
+    second, _ = group.stream("key", open_stream)
+    next(first), next(second)
+    first.close()
+    assert closed == []
+    second.close()
+    assert closed == [1]
+    assert group.stats()["in_flight"] == 0
+
+def test_stream_error_is_raised_to_every_subscriber():
+    group = SingleFlight("test")
+
+    def open_stream():
+        yield "a"
+        raise ConnectionResetError("reset")
+
+    first, _ = group.stream("key", open_stream)
+    second, _ = group.stream("key", open_stream)
+    for subscriber in (first, second):
+        with pytest.raises(ConnectionResetError):
+            list(subscriber)
+
+def test_coalesced_stream_reports_no_tokens(fake_openai):
+    messages = [{"role": "user", "content": "What is a hash map?"}]
+    first = stream_openai("system", messages, temperature=0.3)
+    second = stream_openai("system", messages, temperature=0.3)
+    first_deltas = iter(first)
+    next(first_deltas)
+    list(second)
+    list(first_deltas)
+
+    assert len(fake_openai.calls) == 1
+    assert first.result.content == second.result.content
+    assert (first.result.prompt_tokens, first.result.coalesced) == (100, False)
+    assert (second.result.prompt_tokens, second.result.coalesced) == (0, True)
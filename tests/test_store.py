@@ -0,0 +1,63 @@
+# tests/test_store.py
+import threading
+import time
+
+from prompts import ROLES, LEVELS
+from session import InterviewConfig, InterviewSession
+from store import MemorySessionStore, RECORD_KINDS
+
+class SlowStore(MemorySessionStore):
+    """Memory store whose writes take a while, like a busy database"""
+
+    def __init__(self, during_append=None):
+        super().__init__()
+        self.during_append = during_append
+
+    def append(self, session_id, config, fields, records):
+        time.sleep(0.005)
+        if self.during_append is not None:
+            self.during_append()
+        super().append(session_id, config, fields, records)
+
+def assert_resumed_state_matches(interview, store):
+    resumed = InterviewSession.resume(interview.session_id, store)
+    for kind in RECORD_KINDS:
+        assert getattr(resumed.state, kind) == getattr(interview.state, kind), kind
+
+def test_saves_while_turns_are_recorded_lose_nothing(fake_openai):
+    store = SlowStore()
+    interview = InterviewSession(InterviewConfig(ROLES[0], LEVELS[1], history_turns=1), store=store)
+    interview.start()
+    done = threading.Event()
+
+    def keep_saving():
+        while not done.is_set():
+            interview.save()
+
+    saver = threading.Thread(target=keep_saving)
+    saver.start()
+    try:
+        for _ in range(6):
+            interview.submit_answer("I would use a hash map keyed by user ID.")
+    finally:
+        done.set()
+        saver.join()
+    interview.wait_for_summary(5)
+    interview.save()
+    assert_resumed_state_matches(interview, store)
+
+def test_records_added_during_a_save_go_with_the_next_one():
+    interview = None
+
+    def add_message():
+        interview.state.messages.append({"role": "user", "content": "added during the save"})
+
+    store = SlowStore(during_append=add_message)
+    interview = InterviewSession(InterviewConfig(ROLES[0], LEVELS[1]), store=store)
+    interview.start()
+    assert len(interview.state.messages) == 2
+    assert len(store.load(interview.session_id)["messages"]) == 1
+
+    store.during_append = None
+    interview.save()
+    assert_resumed_state_matches(interview, store)
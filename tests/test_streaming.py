@@ -0,0 +1,60 @@
+# tests/test_streaming.py
+import pytest
+
+from cache import CompletionCache
+from utils import calculate_cost, stream_openai
+
+MESSAGES = [{"role": "user", "content": "What is a hash map?"}]
+
+def consume(stream):
+    return list(stream), stream.result
+
+def test_deltas_are_assembled_into_the_result(fake_openai):
+    fake_openai.reply = "  A hash map stores key/value pairs.\n"
+    fake_openai.chunk_size = 4
+    deltas, result = consume(stream_openai("system", MESSAGES))
+
+    assert len(deltas) == 10
+    assert "".join(deltas) == fake_openai.reply
+    assert result.content == "A hash map stores key/value pairs."
+    assert result.time_to_first_token is not None
+    assert result.time_to_first_token <= result.latency
+    params = fake_openai.calls[-1]
+    assert params["stream"] and params["stream_options"] == {"include_usage": True}
+
+def test_usage_and_cost_come_from_the_usage_chunk(fake_openai):
+    deltas, result = consume(stream_openai("system", MESSAGES))
+
+    assert (result.model, result.prompt_tokens, result.completion_tokens) == ("gpt-4o-mini", 100, 20)
+    assert not result.cached and not result.coalesced
+    assert result.cost() == calculate_cost("gpt-4o-mini", 100, 20)
+    assert result.cost()["total_cost"] == pytest.approx(100 / 1000 * 0.00015 + 20 / 1000 * 0.0006)
+    assert result.to_dict()["prompt_tokens"] == 100
+
+def test_error_opening_the_stream_is_raised(fake_openai):
+    fake_openai.error = ValueError("bad request")
+    with pytest.raises(Exception, match="OpenAI API error: bad request"):
+        consume(stream_openai("system", MESSAGES, model="gpt-4"))
+    assert len(fake_openai.calls) == 1
+
+def test_error_mid_stream_is_raised_after_the_first_delta(fake_openai):
+    fake_openai.chunk_size = 5
+    fake_openai.error = ConnectionResetError("connection reset")
+    fake_openai.fail_mid_stream = True
+    stream = stream_openai("system", MESSAGES, model="gpt-4")
+    deltas = []
+    with pytest.raises(Exception, match="OpenAI API error: connection reset"):
+        for delta in stream:
+            deltas.append(delta)
+    assert deltas == [fake_openai.reply[:5]]
+    assert stream.result is None
+
+def test_deterministic_stream_is_served_from_the_cache(fake_openai, tmp_path):
+    cache = CompletionCache(str(tmp_path / "completions.sqlite3"))
+    first = consume(stream_openai("system", MESSAGES, temperature=0, cache=cache))[1]
+    deltas, second = consume(stream_openai("system", MESSAGES, temperature=0, cache=cache))
+
+    assert len(fake_openai.calls) == 1
+    assert deltas == [first.content]
+    assert second.cached and (second.prompt_tokens, second.completion_tokens) == (0, 0)
+    assert second.cost()["total_cost"] == 0
@@ -0,0 +1,42 @@
+# tokens.py
+"""
+Token counting helpers.
+Uses tiktoken when it is installed and falls back to a character-based
+estimate (~4 characters per token for English text) otherwise.
+"""
+
+from functools import lru_cache
+
+try:
+    import tiktoken
+except ImportError:  # optional dependency
+    tiktoken = None
+
+# Per-message overhead of the chat format (role markers, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+@lru_cache(maxsize=None)
+def _get_encoding(model):
+    """Return the tiktoken encoding for a model, or None if unavailable"""
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+def count_tokens(text, model="gpt-4o-mini"):
+    """Count (or estimate) the number of tokens in a piece of text"""
+    if not text:
+        return 0
+    encoding = _get_encoding(model)
+    if encoding is None:
+        return max(1, (len(text) + 3) // 4)
+    return len(encoding.encode(text))
+
+def count_message_tokens(messages, model="gpt-4o-mini"):
+    """Count (or estimate) the prompt tokens of a list of chat messages"""
+    return sum(
+        count_tokens(message["content"], model) + MESSAGE_OVERHEAD_TOKENS
+        for message in messages
+    )
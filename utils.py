@@ -1,46 +1,236 @@
 # utils.py
 from openai import OpenAI
-import streamlit as st
+import itertools
 import re
 import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
+from cache import CompletionCache, make_cache_key
+from guard import get_default_guard
+from evaluation import EVALUATION_KEYS
+from resilience import call_with_resilience, UpstreamUnavailableError
+from hedging import run_hedged
+from ratelimit import get_rate_limiter
+from singleflight import completion_flights, stream_flights, moderation_flights
+from tokens import count_tokens, count_message_tokens
 
-client = OpenAI()
+# Retries are handled by resilience.call_with_resilience, not the SDK
+client = OpenAI(max_retries=0)
+
+def _estimate_tokens(params, model):
+    """Tokens a request counts against the TPM quota: prompt plus max_tokens"""
+    return count_message_tokens(params["messages"], model) + params.get("max_tokens", 0)
+
+def _create_completion(params, model, timeout):
+    """One chat completion attempt for call_with_resilience (rate limited)"""
+    with get_rate_limiter().admit(model, _estimate_tokens(params, model)) as reservation:
+        response = client.with_options(timeout=timeout).chat.completions.create(**{**params, "model": model})
+        reservation.reconcile(response.usage.total_tokens if response.usage else None)
+    return response
+
+class _PrimedStream:
+    """An open completion stream whose chunks up to the first token were read"""
+    
+    def __init__(self, stream, reservation=None):
+        self.stream = stream
+        self.reservation = reservation
+        self.head = []
+        for chunk in stream:
+            self.head.append(chunk)
+            if chunk.choices and chunk.choices[0].delta.content:
+                break
+    
+    def __iter__(self):
+        for chunk in itertools.chain(self.head, self.stream):
+            if chunk.usage is not None and self.reservation is not None:
+                self.reservation.reconcile(chunk.usage.total_tokens)
+            yield chunk
+    
+    def close(self):
+        if hasattr(self.stream, "close"):
+            self.stream.close()
+
+def _open_stream(params, model, timeout):
+    """One streaming attempt (rate limited); returns once the first token has arrived"""
+    reservation = get_rate_limiter().acquire(model, _estimate_tokens(params, model))
+    with reservation:
+        stream = client.with_options(timeout=timeout).chat.completions.create(**{**params, "model": model})
+        return _PrimedStream(stream, reservation)
+
+# Seconds to wait for the Moderation API before failing open
+MODERATION_TIMEOUT = 3.0
+MODERATION_MODEL = "omni-moderation-latest"
+
+_moderation_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="moderation")
+
+@dataclass
+class CompletionResult:
+    """Outcome of a single chat completion call"""
+    content: str
+    model: str
+    prompt_tokens: int
+    completion_tokens: int
+    latency: float
+    time_to_first_token: float = None
+    cached: bool = False
+    coalesced: bool = False
+    
+    @property
+    def total_tokens(self):
+        return self.prompt_tokens + self.completion_tokens
+    
+    def cost(self):
+        """Price this call with calculate_cost"""
+        return calculate_cost(self.model, self.prompt_tokens, self.completion_tokens)
+    
+    def to_dict(self):
+        """Usage record suitable for session statistics and export"""
+        return {
+            "model": self.model,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "total_tokens": self.total_tokens,
+            "latency": round(self.latency, 3),
+            "time_to_first_token": round(self.time_to_first_token, 3) if self.time_to_first_token is not None else None,
+            "cost": self.cost()["total_cost"],
+            "cached": self.cached,
+            "coalesced": self.coalesced,
+        }
+
+def _cached_result(value, model, start):
+    """CompletionResult for a cache hit (no tokens billed)"""
+    return CompletionResult(
+        content=value["content"],
+        model=model,
+        prompt_tokens=0,
+        completion_tokens=0,
+        latency=time.perf_counter() - start,
+        time_to_first_token=time.perf_counter() - start,
+        cached=True,
+    )
+
+def _cache_key(cache, params, force_cache):
+    """Cache key for a request, or None when the cache should be bypassed"""
+    if cache is None or not CompletionCache.should_use(params["temperature"], force_cache):
+        return None
+    return make_cache_key(params)
+
+class CompletionStream:
+    """
+    Iterable over the text deltas of a streamed completion.
+    
+    Once the iteration is exhausted, `result` holds the CompletionResult
+    with the full text, the token usage reported by the API and timings.
+    Identical streams in flight at the same time share one API call; the
+    subscribers that joined an existing stream report no tokens.
+    """
+    
+    def __init__(self, params, cache=None, cache_key=None, policy=None, hedge=None, flight_key=None):
+        self.params = params
+        self.cache = cache
+        self.cache_key = cache_key
+        self.policy = policy
+        self.hedge = hedge
+        self.flight_key = flight_key or make_cache_key(params)
+        self.result = None
+    
+    def _open(self):
+        """Generator of (served model, chunk) for one upstream stream"""
+        # Only the wait for the first token is retried or hedged;
+        # partial output is never replayed
+        stream, model = call_with_resilience(
+            lambda m, timeout: run_hedged(
+                lambda: _open_stream(self.params, m, timeout), m, "ttft", self.hedge,
+                cancel=_PrimedStream.close
+            ),
+            self.params["model"], self.policy
+        )
+        try:
+            for chunk in stream:
+                yield model, chunk
+        finally:
+            # Abort the HTTP response once no subscriber is reading it
+            stream.close()
+    
+    def __iter__(self):
+        parts = []
+        usage = None
+        first_token_at = None
+        start = time.perf_counter()
+        
+        if self.cache_key is not None:
+            cached = self.cache.get(self.cache_key)
+            if cached is not None:
+                self.result = _cached_result(cached, self.params["model"], start)
+                yield self.result.content
+                return
+        
+        model = self.params["model"]
+        chunks, shared = stream_flights.stream(self.flight_key, self._open)
+        try:
+            for model, chunk in chunks:
+                if chunk.usage is not None and not shared:
+                    usage = chunk.usage
+                if chunk.choices and chunk.choices[0].delta.content:
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter()
+                    parts.append(chunk.choices[0].delta.content)
+                    yield chunk.choices[0].delta.content
+        except UpstreamUnavailableError:
+            raise
+        except Exception as e:
+            raise Exception(f"OpenAI API error: {str(e)}")
+        finally:
+            # Leave the shared stream (closed once nobody reads it)
+            chunks.close()
+        
+        end = time.perf_counter()
+        self.result = CompletionResult(
+            content="".join(parts).strip(),
+            model=model,
+            prompt_tokens=usage.prompt_tokens if usage else 0,
+            completion_tokens=usage.completion_tokens if usage else 0,
+            latency=end - start,
+            time_to_first_token=(first_token_at - start) if first_token_at is not None else None,
+            coalesced=shared,
+        )
+        if self.cache_key is not None and model == self.params["model"] and not shared:
+            self.cache.put(self.cache_key, {"content": self.result.content})
 
 def get_openai_api_key():
     """Get OpenAI API key from Streamlit secrets or environment"""
+    import streamlit as st
     return st.secrets.get("OPENAI_API_KEY", None)
 
-def moderate_input(prompt):
+class InputFlaggedError(Exception):
+    """Raised when the moderation check flags a candidate's input"""
+
+def check_input(prompt):
     """
-    Security guard to prevent prompt injection and inappropriate content.
-    Uses OpenAI's Moderation API and custom validation.
+    Local security checks that need no network round trip: empty input,
+    length limit and prompt injection patterns. Returns True if blocked.
     """
-    if not prompt or len(prompt.strip()) == 0:
-        return True
-    
-    # Check length (prevent extremely long inputs)
-    if len(prompt) > 2000:
-        return True
-    
-    # Check for prompt injection attempts
-    injection_patterns = [
-        r"ignore\s+(previous|above|all)\s+instructions?",
-        r"disregard\s+(previous|above|all)",
-        r"you\s+are\s+now",
-        r"new\s+instructions?:",
-        r"system\s*:\s*",
-        r"</?\s*system\s*>",
-        r"<\|im_start\|>",
-        r"<\|im_end\|>",
-    ]
-    
-    for pattern in injection_patterns:
-        if re.search(pattern, prompt.lower()):
-            return True
-    
-    # Use OpenAI Moderation API for content safety
+    return get_default_guard().check_input(prompt)
+
+def moderate_content(prompt, timeout=MODERATION_TIMEOUT):
+    """
+    Content safety check with OpenAI's Moderation API, bounded by a timeout.
+    Returns True if flagged. Fails open on errors and timeouts. Concurrent
+    checks of the same text share one API call.
+    """
+    key = make_cache_key({"model": MODERATION_MODEL, "input": prompt})
+    flagged, _ = moderation_flights.do(key, lambda: _moderate(prompt, timeout))
+    return flagged
+
+def _moderate(prompt, timeout):
+    """One Moderation API call for moderate_content"""
     try:
-        moderation = client.moderations.create(input=prompt)
+        with get_rate_limiter().admit(MODERATION_MODEL, count_tokens(prompt), max_wait=timeout):
+            moderation = client.with_options(timeout=timeout, max_retries=0).moderations.create(
+                input=prompt, model=MODERATION_MODEL
+            )
         if moderation.results[0].flagged:
             return True
     except Exception as e:
@@ -50,17 +240,97 @@ def moderate_input(prompt):
     
     return False
 
+def moderate_input(prompt):
+    """
+    Security guard to prevent prompt injection and inappropriate content.
+    Uses OpenAI's Moderation API and custom validation.
+    """
+    return check_input(prompt) or moderate_content(prompt)
+
+def start_moderation(prompt, timeout=MODERATION_TIMEOUT):
+    """Run moderate_content in the background and return its Future"""
+    return _moderation_executor.submit(moderate_content, prompt, timeout)
+
+def moderated_stream(chunks, moderation, timeout=MODERATION_TIMEOUT):
+    """
+    Speculatively stream a completion while its input is still being moderated.
+    
+    The completion request starts immediately; chunks are held back until the
+    moderation Future resolves and released only if the input was not flagged.
+    If it was, the completion stream is closed (aborting the request) and
+    InputFlaggedError is raised. A moderation result that does not arrive
+    within `timeout` seconds is treated as not flagged (fail open).
+    
+    Args:
+        chunks: Iterable of text deltas (e.g. a CompletionStream)
+        moderation: Future from start_moderation
+        timeout: Maximum seconds to wait for the moderation result
+    """
+    deadline = time.monotonic() + timeout
+    iterator = iter(chunks)
+    buffered = []
+    
+    def raise_if_flagged():
+        try:
+            flagged = moderation.result(timeout=max(0.0, deadline - time.monotonic()))
+        except FutureTimeoutError:
+            print("Moderation API timeout")
+            flagged = False
+        if flagged:
+            raise InputFlaggedError("Input flagged by moderation")
+    
+    try:
+        for chunk in iterator:
+            if buffered is None:
+                yield chunk
+                continue
+            buffered.append(chunk)
+            if moderation.done() or time.monotonic() >= deadline:
+                raise_if_flagged()
+                yield from buffered
+                buffered = None
+        
+        if buffered is not None:
+            raise_if_flagged()
+            yield from buffered
+    finally:
+        if hasattr(iterator, "close"):
+            iterator.close()
+
 def validate_system_prompt(system_prompt):
-    """Validate that system prompt hasn't been tampered with"""
-    dangerous_keywords = ["jailbreak", "DAN", "developer mode", "unrestricted"]
-    for keyword in dangerous_keywords:
-        if keyword.lower() in system_prompt.lower():
-            return False
-    return True
+    """Validate that system prompt hasn't been tampered with (cached per prompt)"""
+    return get_default_guard().validate_system_prompt(system_prompt)
+
+def _build_params(system_prompt, messages, model, temperature, max_tokens, top_p,
+                  frequency_penalty, presence_penalty, response_format):
+    """Validate the system prompt and assemble the chat completion request"""
+    # Validate system prompt
+    if not validate_system_prompt(system_prompt):
+        raise ValueError("Invalid system prompt detected")
+    
+    # Build messages array
+    api_messages = [{"role": "system", "content": system_prompt}]
+    api_messages.extend(messages)
+    
+    params = {
+        "model": model,
+        "messages": api_messages,
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+        "top_p": top_p,
+        "frequency_penalty": frequency_penalty,
+        "presence_penalty": presence_penalty,
+    }
+    
+    if response_format:
+        params["response_format"] = response_format
+    
+    return params
 
 def call_openai(system_prompt, messages, model="gpt-4o-mini", temperature=0.7, 
                 max_tokens=800, top_p=1.0, frequency_penalty=0.0, presence_penalty=0.0,
-                response_format=None):
+                response_format=None, cache=None, force_cache=False, policy=None,
+                hedge=None):
     """
     Call OpenAI API with conversation history and configurable parameters.
     
@@ -74,34 +344,116 @@ def call_openai(system_prompt, messages, model="gpt-4o-mini", temperature=0.7,
         frequency_penalty: Penalize frequent tokens (-2.0 to 2.0)
         presence_penalty: Penalize tokens that have appeared (-2.0 to 2.0)
         response_format: Optional response format (e.g., {"type": "json_object"})
+        cache: Optional CompletionCache; only used for temperature 0 requests
+        force_cache: Use the cache even when temperature > 0
+        policy: Optional resilience.RetryPolicy (timeouts, retries, fallback models)
+        hedge: Optional hedging.HedgePolicy to duplicate unusually slow calls
+    
+    Returns:
+        CompletionResult with the response text, the token usage reported
+        by the API, the model that served it and the wall-clock latency of
+        the call (including retries).
     """
-    # Validate system prompt
-    if not validate_system_prompt(system_prompt):
-        raise ValueError("Invalid system prompt detected")
+    params = _build_params(system_prompt, messages, model, temperature, max_tokens,
+                           top_p, frequency_penalty, presence_penalty, response_format)
+    start = time.perf_counter()
     
-    # Build messages array
-    api_messages = [{"role": "system", "content": system_prompt}]
-    api_messages.extend(messages)
+    # Serve byte-identical deterministic requests from the cache
+    cache_key = _cache_key(cache, params, force_cache)
+    if cache_key is not None:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return _cached_result(cached, model, start)
     
-    # Call OpenAI API
+    # Call OpenAI API; identical calls already in flight are joined, not repeated
     try:
-        params = {
-            "model": model,
-            "messages": api_messages,
-            "temperature": temperature,
-            "max_tokens": max_tokens,
-            "top_p": top_p,
-            "frequency_penalty": frequency_penalty,
-            "presence_penalty": presence_penalty,
-        }
-        
-        if response_format:
-            params["response_format"] = response_format
-        
-        response = client.chat.completions.create(**params)
-        return response.choices[0].message.content.strip()
+        (response, served_model), shared = completion_flights.do(
+            cache_key or make_cache_key(params),
+            lambda: call_with_resilience(
+                lambda m, timeout: run_hedged(
+                    lambda: _create_completion(params, m, timeout), m, "total", hedge
+                ),
+                model, policy
+            )
+        )
+        latency = time.perf_counter() - start
+    except UpstreamUnavailableError:
+        raise
     except Exception as e:
         raise Exception(f"OpenAI API error: {str(e)}")
+    
+    usage = response.usage if not shared else None
+    result = CompletionResult(
+        content=response.choices[0].message.content.strip(),
+        model=served_model,
+        prompt_tokens=usage.prompt_tokens if usage else 0,
+        completion_tokens=usage.completion_tokens if usage else 0,
+        latency=latency,
+        coalesced=shared,
+    )
+    if cache_key is not None and served_model == model and not shared:
+        cache.put(cache_key, {"content": result.content})
+    return result
+
+def stream_openai(system_prompt, messages, model="gpt-4o-mini", temperature=0.7,
+                  max_tokens=800, top_p=1.0, frequency_penalty=0.0, presence_penalty=0.0,
+                  response_format=None, cache=None, force_cache=False, policy=None,
+                  hedge=None):
+    """
+    Streaming variant of call_openai.
+    
+    Returns a CompletionStream that yields text deltas as soon as the model
+    produces them, so the UI can render the first tokens instead of waiting
+    for the whole completion. After the stream is consumed its `result`
+    attribute holds the same CompletionResult call_openai would return.
+    Takes the same arguments as call_openai.
+    """
+    params = _build_params(system_prompt, messages, model, temperature, max_tokens,
+                           top_p, frequency_penalty, presence_penalty, response_format)
+    cache_key = _cache_key(cache, params, force_cache)
+    params["stream"] = True
+    params["stream_options"] = {"include_usage": True}
+    
+    return CompletionStream(params, cache=cache, cache_key=cache_key, policy=policy, hedge=hedge,
+                            flight_key=cache_key)
+
+def summarize_conversation(previous_summary, messages, model="gpt-4o-mini", max_tokens=300,
+                           cache=None):
+    """
+    Fold interview messages into a running summary.
+    
+    Args:
+        previous_summary: Summary of the turns folded so far ("" if none)
+        messages: Messages to add to the summary
+        model: OpenAI model to use for summarization
+        max_tokens: Maximum length of the summary
+        cache: Optional CompletionCache (summaries are deterministic)
+    
+    Returns:
+        CompletionResult whose content is the refreshed summary
+    """
+    transcript = "\n\n".join(
+        f"{'Interviewer' if m['role'] == 'assistant' else 'Candidate'}: {m['content']}"
+        for m in messages
+    )
+    system_prompt = """You maintain a compact running summary of a mock job interview.
+Update the existing summary with the new exchanges. Keep, as terse bullet points:
+- each question asked and the topic it covered
+- the key points of the candidate's answer
+- the score given (if any) and the main feedback
+Do not invent details. Reply with the updated summary only."""
+    
+    return call_openai(
+        system_prompt=system_prompt,
+        messages=[{
+            "role": "user",
+            "content": f"Existing summary:\n{previous_summary or '(none)'}\n\nNew exchanges:\n{transcript}"
+        }],
+        model=model,
+        temperature=0.0,
+        max_tokens=max_tokens,
+        cache=cache,
+    )
 
 def calculate_cost(model, input_tokens, output_tokens):
     """
@@ -132,27 +484,81 @@ def calculate_cost(model, input_tokens, output_tokens):
         "total_cost": total_cost
     }
 
+@dataclass
+class JSONExtraction:
+    """
+    Result of extract_json.
+
+    Attributes:
+        data: Best-matching JSON object, or None
+        strategy: "direct" (the whole response is the object), "embedded"
+            (found inside surrounding text or a code fence) or "none"
+        missing_keys: Expected keys the chosen object lacks
+        candidates: Number of objects decoded along the way
+    """
+    data: dict = None
+    strategy: str = "none"
+    missing_keys: tuple = ()
+    candidates: int = 0
+
+_json_decoder = json.JSONDecoder()
+# Where a JSON object can start: "{" followed by a key or the closing brace
+_OBJECT_START = re.compile(r'\{\s*["}]')
+# Each failed decode costs O(offset) to build its error, so bound them
+MAX_FAILED_DECODES = 32
+_extraction_counts = {}
+_extraction_lock = threading.Lock()
+
+def extract_json(response_text, expected_keys=EVALUATION_KEYS):
+    """
+    Find the JSON object in a model response that best matches the expected
+    keys (the evaluation shape by default), in a single pass.
+
+    JSONDecoder.raw_decode is tried at each position where an object can
+    start. A failed attempt resumes after the position where decoding failed
+    and a successful one after the decoded object, so the text is scanned
+    about once. Prose braces, code fences and trailing objects are skipped
+    over; among the decoded objects the one with the most expected keys wins.
+    """
+    result = JSONExtraction()
+    text = response_text or ""
+    best_matches = -1
+    failures = 0
+    match = _OBJECT_START.search(text)
+    while match and failures < MAX_FAILED_DECODES:
+        position = match.start()
+        try:
+            data, end = _json_decoder.raw_decode(text, position)
+        except json.JSONDecodeError as e:
+            if e.msg.startswith("Unterminated string"):
+                # No closing quote anywhere after this; no later object can decode
+                break
+            failures += 1
+            match = _OBJECT_START.search(text, max(e.pos, position + 1))
+            continue
+
+        if isinstance(data, dict):
+            result.candidates += 1
+            matches = sum(1 for key in expected_keys if key in data)
+            if matches > best_matches:
+                best_matches = matches
+                result.data = data
+                result.missing_keys = tuple(key for key in expected_keys if key not in data)
+                whole = not text[:position].strip() and not text[end:].strip()
+                result.strategy = "direct" if whole else "embedded"
+            if not result.missing_keys:
+                break
+        match = _OBJECT_START.search(text, end)
+
+    with _extraction_lock:
+        _extraction_counts[result.strategy] = _extraction_counts.get(result.strategy, 0) + 1
+    return result
+
+def get_extraction_stats():
+    """How often each extract_json strategy was used in this process"""
+    with _extraction_lock:
+        return dict(_extraction_counts)
+
 def extract_json_from_response(response_text):
     """Extract JSON from AI response that might contain markdown or extra text"""
-    try:
-        # First, try direct JSON parse
-        return json.loads(response_text)
-    except:
-        # Try to find JSON in markdown code blocks
-        json_match = re.search(r'```json\s*(.*?)\s*```', response_text, re.DOTALL)
-        if json_match:
-            try:
-                return json.loads(json_match.group(1))
-            except:
-                pass
-        
-        # Try to find JSON object in the text
-        json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
-        if json_match:
-            try:
-                return json.loads(json_match.group(0))
-            except:
-                pass
-    
-    return None
-
+    return extract_json(response_text).data